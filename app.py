@@ -1,15 +1,20 @@
 import streamlit as st
 import os
+import time
 
 # Import modules
 from modules.ui import initialize_session_state, show_sidebar, load_css
 from modules.data_manager import ensure_directories, initialize_data_files
+from modules.deadlines import recover_open_attempts
+from modules.pass_evaluation import resume_pass_evaluation
 from modules.pages.login import login_page
 from modules.pages.quiz import quiz_page
 from modules.pages.scores import scores_page
 from modules.pages.dashboard import dashboard_page
 from modules.pages.documentation import documentation_page
 from modules.pages.admin import admin_page
+from modules.pages.verify import verify_page
+from modules.diagnostics import record_session_state_size, record_session_metrics, increment_session_metric
 
 # Configure the app with improved settings
 st.set_page_config(
@@ -32,23 +37,42 @@ def initialize_app():
     # Initialize data files with defaults if they don't exist
     initialize_data_files()
     
+    # Pick up timed attempts left open by a previous server process
+    recover_open_attempts()
+    
+    # Re-evaluate pass/fail if a passing score changed while the server was down
+    resume_pass_evaluation()
+    
     # Initialize session state for user tracking
     initialize_session_state()
     
-    # Apply custom CSS for modern UI
+    # Apply custom CSS for modern UI; added only here, as the first element of every
+    # full run, so it is identical between reruns and sent to the browser once
     st.markdown(load_css(), unsafe_allow_html=True)
 
 # Main app function with enhanced routing
 def main():
+    cpu_start = time.thread_time()
+    increment_session_metric("full_runs")
+    
     # Initialize the app
     initialize_app()
     
+    # Certificate verification links (?verify=<certificate ID>) open the public verification page
+    if "verify" in st.query_params:
+        st.session_state.verify_code = st.query_params["verify"]
+        del st.query_params["verify"]
+        st.session_state.current_page = "verify"
+    
     # Show the sidebar for navigation if authenticated
     if st.session_state.authenticated:
         show_sidebar()
     
     # Render the appropriate page based on state and role
-    if not st.session_state.authenticated:
+    if st.session_state.current_page == "verify":
+        # Public, no login required
+        verify_page()
+    elif not st.session_state.authenticated:
         login_page()
     else:
         # Default to dashboard
@@ -70,6 +94,10 @@ def main():
             # If invalid page, redirect to dashboard
             st.session_state.current_page = "dashboard"
             dashboard_page()
+    
+    # Track per-session memory (sampled) and CPU time of full runs for the admin diagnostics view
+    record_session_state_size()
+    record_session_metrics(script_cpu_ms=round((time.thread_time() - cpu_start) * 1000, 2))
 
 # Run the app
 if __name__ == "__main__":
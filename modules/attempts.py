@@ -0,0 +1,324 @@
+import time
+import math
+import datetime
+from array import array
+from functools import lru_cache
+import numpy as np
+from .data_manager import (
+    DEFAULT_COURSE, get_question_bank, get_questions_by_versions, get_course_settings, save_quiz_score,
+    save_practice_result, load_users
+)
+from .checkpoints import read_journal, close_journal
+from .quiz_assembly import category_mask, record_exposure
+from .irt import get_bank_parameters, estimate_ability, expected_percentage
+from .review_queue import record_review_outcomes
+from .certificate_codes import issue_certificate_code
+
+# An attempt is a plain dict shared between the session that owns it and the
+# deadline scheduler. The answer containers are the same objects the quiz page
+# keeps in session state, so the attempt always reflects the latest answers:
+# {
+#     "attempt_id", "username", "course",
+#     "mode" ("standard", "adaptive", "practice" or "review"),
+#     "question_ids" (list), "question_versions" (list, content hash per question),
+#     "selected" (array, -1 while unanswered),
+#     "latency_ms" (array), "categories" (categories the quiz was drawn from),
+#     "option_codes" (array, option order per question as a Lehmer code),
+#     "started_at" (epoch seconds), "deadline" (epoch seconds or None),
+#     "form_id" (exam form or None),
+#     "status" ("open", "submitting", "submitted" or "discarded"), "result"
+# }
+
+# Questions with more options than this keep their stored order (13! no longer fits the code array)
+MAX_SHUFFLED_OPTIONS = 12
+
+def random_option_code(num_options, rng=None):
+    """
+    Draw a random option order for one question
+
+    Every integer in [0, n!) is the Lehmer code of exactly one permutation,
+    so a uniform integer is a uniformly shuffled order.
+
+    Args:
+        num_options (int): Number of answer options
+        rng (numpy.random.Generator, optional): Random generator
+
+    Returns:
+        int: Lehmer code of the option order (0 keeps the stored order)
+    """
+    if num_options < 2 or num_options > MAX_SHUFFLED_OPTIONS:
+        return 0
+    rng = rng if rng is not None else np.random.default_rng()
+    return int(rng.integers(math.factorial(num_options)))
+
+@lru_cache(maxsize=4096)
+def option_order(code, num_options):
+    """
+    Decode a Lehmer code into the order options are shown in
+
+    Args:
+        code (int): Lehmer code from random_option_code()
+        num_options (int): Number of answer options
+
+    Returns:
+        tuple: Stored option indices in display order
+    """
+    remaining = list(range(num_options))
+    order = []
+    for k in range(num_options - 1, -1, -1):
+        digit, code = divmod(code, math.factorial(k))
+        order.append(remaining.pop(min(digit, len(remaining) - 1)))
+    return tuple(order)
+
+def new_attempt(attempt_id, username, mode, question_ids, selected, latency_ms, categories, duration=None,
+                form_id=None, option_codes=None, question_versions=None, course=None):
+    """
+    Create the shared record of a quiz attempt
+
+    Args:
+        attempt_id (str): ID of the quiz attempt
+        username (str): Username of the user taking the quiz
+        mode (str): "standard", "adaptive", "practice" or "review" (the last two are saved
+            to the practice history only)
+        question_ids (list): Question IDs in quiz order
+        selected (array): Selected option per question, -1 while unanswered
+        latency_ms (array): Answer time per question in milliseconds
+        categories (list): Categories the quiz was drawn from
+        duration (float, optional): Time limit in seconds; untimed if None
+        form_id (str, optional): Exam form the questions were taken from
+        option_codes (array, optional): Option order per question; stored order if None
+        question_versions (list, optional): Version hash of each question as it was handed out
+        course (str, optional): Course the questions belong to; the default course if None
+
+    Returns:
+        dict: The attempt record
+    """
+    started_at = time.time()
+    return {
+        "attempt_id": attempt_id,
+        "username": username,
+        "course": course or DEFAULT_COURSE,
+        "mode": mode,
+        "question_ids": question_ids,
+        "question_versions": question_versions if question_versions is not None else [],
+        "selected": selected,
+        "latency_ms": latency_ms,
+        "option_codes": option_codes if option_codes is not None else array('I', [0] * len(question_ids)),
+        "categories": list(categories),
+        "started_at": started_at,
+        "deadline": started_at + duration if duration else None,
+        "form_id": form_id,
+        "status": "open",
+        "result": None,
+    }
+
+def restore_attempt(path):
+    """
+    Rebuild an unfinished attempt from its journal
+
+    Args:
+        path (str): Journal file path from checkpoints.list_journals()
+
+    Returns:
+        tuple or None: (attempt record, extra page settings), None if the journal is unreadable
+    """
+    journal = read_journal(path)
+    if journal is None:
+        return None
+    header, deltas = journal
+
+    # Questions first (adaptive quizzes add them as they go), then the answers
+    question_ids = list(header["attempt"]["question_ids"])
+    question_versions = list(header["attempt"].get("question_versions") or [])
+    option_codes = array('I', header["attempt"].get("option_codes") or [0] * len(question_ids))
+    for delta in deltas:
+        if delta["t"] == "q":
+            question_ids.append(delta["id"])
+            option_codes.append(delta.get("o", 0))
+            if "v" in delta:
+                question_versions.append(delta["v"])
+    selected = array('b', [-1] * len(question_ids))
+    latency_ms = array('I', [0] * len(question_ids))
+    for delta in deltas:
+        if delta["t"] == "a" and delta["i"] < len(question_ids):
+            selected[delta["i"]] = delta["s"]
+            latency_ms[delta["i"]] = delta["ms"]
+
+    attempt = dict(
+        header["attempt"],
+        question_ids=question_ids,
+        question_versions=question_versions if len(question_versions) == len(question_ids) else [],
+        option_codes=option_codes,
+        selected=selected,
+        latency_ms=latency_ms,
+        status="open",
+        result=None
+    )
+    return attempt, header.get("extra", {})
+
+def is_expired(attempt, now=None):
+    """Whether a timed attempt is past its deadline"""
+    now = now if now is not None else time.time()
+    return attempt["deadline"] is not None and now >= attempt["deadline"]
+
+def grade_attempt(bank, attempt):
+    """
+    Grade an attempt against the answer key of the question versions it was given
+
+    Attempts that recorded question versions are graded against exactly
+    those versions, so later edits to the bank do not change the result.
+    Older attempts fall back to the current bank and skip questions that are
+    no longer in it. Unanswered questions count towards the category totals
+    but not the score.
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+        attempt (dict): Attempt record
+
+    Returns:
+        dict: {"score", "max_score", "categories": {category: {"correct", "total"}},
+            "responses": [(question_id, selected, correct, latency_ms, version)], "positions":
+            bank positions of the answered questions still in the bank, "correct": correct
+            flag per entry in positions}
+    """
+    index = bank["index"]
+    question_ids = list(attempt["question_ids"])
+    versions = attempt.get("question_versions") or []
+    if len(versions) == len(question_ids):
+        questions = get_questions_by_versions(question_ids, versions)
+    else:
+        questions = [bank["questions"][index[qid]] for qid in question_ids if qid in index]
+
+    categories = {}
+    responses, positions, correct = [], [], []
+    max_score = 0
+
+    # Questions that could not be resolved were dropped, so map them back to their quiz position
+    quiz_position = {qid: idx for idx, qid in enumerate(question_ids)}
+    for question in questions:
+        qid = question["id"]
+        idx = quiz_position[qid]
+        max_score += 1
+        category = categories.setdefault(question.get("category", "General"), {"correct": 0, "total": 0})
+        category["total"] += 1
+
+        selected = attempt["selected"][idx] if idx < len(attempt["selected"]) else -1
+        if selected < 0:
+            continue
+        is_correct = selected == question["answer"]
+        if is_correct:
+            category["correct"] += 1
+        latency = attempt["latency_ms"][idx] if idx < len(attempt["latency_ms"]) else 0
+        responses.append((qid, selected, is_correct, latency, question.get("version")))
+        if qid in index:
+            positions.append(index[qid])
+            correct.append(is_correct)
+
+    return {
+        "score": sum(1 for response in responses if response[2]),
+        "max_score": max_score,
+        "categories": categories,
+        "responses": responses,
+        "positions": positions,
+        "correct": correct,
+    }
+
+def finalize_attempt(attempt):
+    """
+    Grade an attempt and save its score
+
+    Used both when the user finishes a quiz and when the deadline scheduler
+    submits an expired one, so both paths store the same results. Call it
+    only once per attempt (see deadlines.submit_attempt).
+
+    Args:
+        attempt (dict): Attempt record
+
+    Returns:
+        dict: {"score", "max_score", "percentage", "passed", "passing_score", "categories",
+            "time_taken", "timed_out", "completed_at", "details"}; details holds the
+            "certificate_id" and "certificate_name" of a passing score
+    """
+    course = attempt.get("course", DEFAULT_COURSE)
+    bank = get_question_bank(course)
+    graded = grade_attempt(bank, attempt)
+
+    # Answering stops at the deadline, so never report more time than the limit
+    now = time.time()
+    timed_out = is_expired(attempt, now)
+    ended_at = min(now, attempt["deadline"]) if attempt["deadline"] is not None else now
+    time_taken = round(ended_at - attempt["started_at"], 1)
+
+    # Adaptive quizzes report the expected score on the question pool at the estimated ability
+    percentage = None
+    details = {"timed_out": True} if timed_out else {}
+    if attempt.get("form_id"):
+        details["form_id"] = attempt["form_id"]
+    if attempt["mode"] == "adaptive":
+        params = get_bank_parameters(bank)
+        positions = graded["positions"]
+        theta, sd = estimate_ability(
+            params["a"][positions], params["b"][positions], np.array(graded["correct"], dtype=float)
+        )
+        pool = category_mask(bank, attempt["categories"])
+        percentage = expected_percentage(theta, params["a"][pool], params["b"][pool])
+        details.update({"mode": "adaptive", "ability": round(theta, 3), "ability_se": round(sd, 3)})
+        record_exposure(bank, attempt["question_ids"])
+    if percentage is None:
+        percentage = (graded["score"] / graded["max_score"]) * 100 if graded["max_score"] > 0 else 0
+
+    course_settings = get_course_settings(course)
+    passing_score = course_settings.get("passing_score", 80)
+
+    # Every answer feeds the user's spaced-repetition review queue
+    record_review_outcomes(attempt["username"], course, [(response[0], response[2]) for response in graded["responses"]])
+
+    if attempt["mode"] in ("practice", "review"):
+        # Practice and review results go to their own store and never count toward certification
+        details["mode"] = attempt["mode"]
+        save_practice_result(attempt["username"], {
+            "attempt_id": attempt["attempt_id"],
+            "mode": attempt["mode"],
+            "course": course,
+            "score": graded["score"],
+            "max_score": graded["max_score"],
+            "percentage": percentage,
+            "time_taken": time_taken,
+            "categories": graded["categories"],
+        })
+    else:
+        # The certificate code is signed for the holder's name and saved with the
+        # score, so reprints carry the same name and code and keep verifying
+        if percentage >= passing_score:
+            name = load_users().get(attempt["username"], {}).get("name", attempt["username"])
+            details["certificate_name"] = name
+            details["certificate_id"] = issue_certificate_code(
+                name, course, attempt["attempt_id"], datetime.date.today(),
+                course_settings.get("certificate_validity_days", 365)
+            )
+        save_quiz_score(
+            attempt["username"],
+            graded["score"],
+            graded["max_score"],
+            categories=graded["categories"],
+            time_taken=time_taken,
+            percentage=percentage,
+            details=details or None,
+            attempt_id=attempt["attempt_id"],
+            responses=graded["responses"],
+            course=course
+        )
+    close_journal(attempt)
+
+    return {
+        "score": graded["score"],
+        "max_score": graded["max_score"],
+        "percentage": percentage,
+        "passed": percentage >= passing_score,
+        "passing_score": passing_score,
+        "categories": graded["categories"],
+        "time_taken": time_taken,
+        "timed_out": timed_out,
+        "completed_at": ended_at,
+        "details": details,
+    }
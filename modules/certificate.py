@@ -1,153 +1,131 @@
 import datetime
 import base64
+import hashlib
 import os
-from .data_manager import LOGO_PATH
+import re
+import threading
+from collections import OrderedDict
+from string import Template
+from .data_manager import LOGO_PATH, get_course, get_course_settings, config_generation
 
-def create_certificate(name, score, date, cert_id=None):
-    """
-    Generate an enhanced HTML certificate with improved design
-    
-    Args:
-        name (str): Name of the recipient
-        score (str): Score percentage
-        date (str): Date of completion
-        cert_id (str, optional): Unique certificate ID
-    
-    Returns:
-        str: HTML content of the certificate
-    """
-    # Generate a certificate ID if not provided
-    if not cert_id:
-        import hashlib
-        cert_id = hashlib.md5(f"{name}_{score}_{date}".encode()).hexdigest()[:8].upper()
-    
-    # Check if we have a company logo
-    if os.path.exists(LOGO_PATH):
-        # Encode logo to base64 for embedding in HTML
-        with open(LOGO_PATH, "rb") as img_file:
-            logo_base64 = base64.b64encode(img_file.read()).decode()
-        logo_embed = f"data:image/png;base64,{logo_base64}"
-    else:
-        # Use placeholder if no logo
-        logo_embed = "https://via.placeholder.com/150x100?text=COMPANY+LOGO"
-    
-    # Creating an enhanced certificate with better design
-    html = f"""
+# Certificate page; layout fields ($logo, $title, $training, $statement, $validity)
+# are filled once per course and logo, the rest per certificate
+CERTIFICATE_TEMPLATE = Template("""
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Forklift Operator Certificate</title>
+        <title>$title</title>
         <style>
             @import url('https://fonts.googleapis.com/css2?family=Montserrat:wght@400;600;700&family=Playfair+Display:wght@700&display=swap');
             
-            * {{
+            * {
                 margin: 0;
                 padding: 0;
                 box-sizing: border-box;
-            }}
+            }
             
-            body {{
+            body {
                 font-family: 'Montserrat', sans-serif;
                 background-color: #f5f5f5;
                 color: #333;
                 padding: 20px;
-            }}
+            }
             
-            .certificate-container {{
+            .certificate-container {
                 width: 850px;
                 position: relative;
                 margin: 0 auto;
                 background-color: #fff;
                 overflow: hidden;
-            }}
+            }
             
-            .certificate {{
+            .certificate {
                 border: 20px solid transparent;
                 border-image: linear-gradient(45deg, #1E88E5, #0D47A1) 1;
                 padding: 40px;
                 position: relative;
                 background-color: #fff;
                 z-index: 2;
-            }}
+            }
             
-            .watermark {{
+            .watermark {
                 position: absolute;
                 top: 0;
                 left: 0;
                 width: 100%;
                 height: 100%;
-                background-image: url('{logo_embed}');
+                background-image: url('$logo');
                 background-repeat: no-repeat;
                 background-position: center;
                 background-size: 60%;
                 opacity: 0.05;
                 z-index: 1;
                 pointer-events: none;
-            }}
+            }
             
-            .header {{
+            .header {
                 display: flex;
                 justify-content: space-between;
                 align-items: center;
                 margin-bottom: 30px;
                 padding-bottom: 20px;
                 border-bottom: 1px solid #eaeaea;
-            }}
+            }
             
-            .logo {{
+            .logo {
                 max-height: 80px;
-            }}
+            }
             
-            .certificate-id {{
+            .certificate-id {
                 font-family: 'Montserrat', sans-serif;
                 font-size: 14px;
                 color: #888;
                 text-align: right;
-            }}
+            }
             
-            .certificate-title {{
+            .certificate-title {
                 text-align: center;
                 margin: 20px 0 40px;
-            }}
+            }
             
-            .certificate-heading {{
+            .certificate-heading {
                 font-family: 'Playfair Display', serif;
                 font-size: 48px;
                 color: #1E88E5;
                 margin-bottom: 10px;
                 text-transform: uppercase;
                 letter-spacing: 2px;
-            }}
+            }
             
-            .certificate-subheading {{
+            .certificate-subheading {
                 font-size: 22px;
                 color: #555;
                 font-weight: 600;
-            }}
+            }
             
-            .recipient-section {{
+            .recipient-section {
                 text-align: center;
                 margin: 40px 0;
-            }}
+            }
             
-            .presented-to {{
+            .presented-to {
                 font-size: 16px;
                 color: #666;
                 margin-bottom: 15px;
-            }}
+            }
             
-            .recipient-name {{
+            .recipient-name {
                 font-family: 'Playfair Display', serif;
                 font-size: 36px;
                 color: #333;
                 position: relative;
                 display: inline-block;
                 padding: 0 20px 10px;
-            }}
+            }
             
-            .recipient-name::after {{
+            .recipient-name::after {
                 content: '';
                 position: absolute;
                 bottom: 0;
@@ -155,94 +133,94 @@ def create_certificate(name, score, date, cert_id=None):
                 width: 100%;
                 height: 1px;
                 background: linear-gradient(to right, transparent, #1E88E5, transparent);
-            }}
+            }
             
-            .achievement {{
+            .achievement {
                 margin: 40px 0;
                 text-align: center;
                 font-size: 18px;
                 line-height: 1.6;
                 color: #555;
-            }}
+            }
             
-            .score {{
+            .score {
                 font-weight: 700;
                 color: #1E88E5;
                 font-size: 26px;
                 margin: 10px 0;
                 display: block;
-            }}
+            }
             
-            .date-section {{
+            .date-section {
                 text-align: center;
                 margin: 30px 0;
                 font-size: 16px;
                 color: #666;
-            }}
+            }
             
-            .date {{
+            .date {
                 font-weight: 600;
                 color: #333;
-            }}
+            }
             
-            .signature-section {{
+            .signature-section {
                 display: flex;
                 justify-content: space-between;
                 margin-top: 60px;
-            }}
+            }
             
-            .signature {{
+            .signature {
                 text-align: center;
                 width: 45%;
-            }}
+            }
             
-            .signature-line {{
+            .signature-line {
                 width: 80%;
                 height: 1px;
                 background-color: #333;
                 margin: 10px auto;
-            }}
+            }
             
-            .signature-name {{
+            .signature-name {
                 font-weight: 600;
                 font-size: 16px;
-            }}
+            }
             
-            .signature-title {{
+            .signature-title {
                 font-size: 14px;
                 color: #666;
-            }}
+            }
             
-            .footer {{
+            .footer {
                 margin-top: 40px;
                 font-size: 12px;
                 color: #888;
                 text-align: center;
                 padding-top: 20px;
                 border-top: 1px solid #eaeaea;
-            }}
+            }
             
-            .validity {{
+            .validity {
                 margin-top: 10px;
                 font-style: italic;
-            }}
+            }
             
-            .verification {{
+            .verification {
                 margin-top: 5px;
                 font-weight: 600;
-            }}
+            }
             
-            @media print {{
-                body {{
+            @media print {
+                body {
                     background-color: white;
                     padding: 0;
-                }}
+                }
                 
-                .certificate-container {{
+                .certificate-container {
                     width: 100%;
                     box-shadow: none;
-                }}
-            }}
+                }
+            }
         </style>
     </head>
     <body>
@@ -251,10 +229,10 @@ def create_certificate(name, score, date, cert_id=None):
                 <div class="watermark"></div>
                 
                 <div class="header">
-                    <img src="{logo_embed}" alt="Company Logo" class="logo">
+                    <img src="$logo" alt="Company Logo" class="logo">
                     <div class="certificate-id">
-                        Certificate ID: {cert_id}<br>
-                        Issue Date: {date}
+                        Certificate ID: $cert_id<br>
+                        Issue Date: $date
                     </div>
                 </div>
                 
@@ -265,19 +243,19 @@ def create_certificate(name, score, date, cert_id=None):
                 
                 <div class="recipient-section">
                     <p class="presented-to">This certifies that</p>
-                    <h3 class="recipient-name">{name}</h3>
+                    <h3 class="recipient-name">$name</h3>
                 </div>
                 
                 <div class="achievement">
                     has successfully completed the<br>
-                    <strong>Forklift Operator Safety Training</strong><br>
+                    <strong>$training</strong><br>
                     demonstrating proficiency in safety protocols and operational procedures<br>
                     with a score of<br>
-                    <span class="score">{score}%</span>
+                    <span class="score">$score%</span>
                 </div>
                 
                 <div class="date-section">
-                    Completed on <span class="date">{date}</span>
+                    Completed on <span class="date">$date</span>
                 </div>
                 
                 <div class="signature-section">
@@ -295,15 +273,199 @@ def create_certificate(name, score, date, cert_id=None):
                 </div>
                 
                 <div class="footer">
-                    <p>This certificate validates that the recipient has demonstrated knowledge of forklift safety procedures 
-                    and is qualified in accordance with OSHA standards for the operation of forklifts.</p>
-                    <p class="validity">Valid for one year from the date of issue.</p>
-                    <p class="verification">Verify certificate authenticity with Certificate ID: {cert_id}</p>
+                    <p>$statement</p>
+                    <p class="validity">$validity</p>
+                    <p class="verification">Verify certificate authenticity with Certificate ID: $cert_id</p>
                 </div>
             </div>
         </div>
     </body>
     </html>
+    """)
+
+# Placeholder shown when no company logo has been uploaded
+LOGO_PLACEHOLDER = "https://via.placeholder.com/150x100?text=COMPANY+LOGO"
+
+# Encoded logo and per-course texts and templates, shared by all sessions. The
+# course entries are tagged with data_manager.config_generation() and are
+# current while it is unchanged, so a render reads no files.
+_template_lock = threading.Lock()
+_logo_cache = {"mtime": None, "embed": LOGO_PLACEHOLDER}
+_course_texts = {}  # {course: (generation, texts)}
+_course_templates = {}  # {course: (generation, parts)}
+
+# Rendered certificate files by certificate ID, most recently used last
+CERTIFICATE_FILE_CACHE_SIZE = 64
+_certificate_files = OrderedDict()  # {(cert_id, file_format): (parts, name, score, date, bytes)}
+
+# Fields filled in per certificate
+CERTIFICATE_FIELDS = re.compile(r"\$(name|score|date|cert_id)\b")
+
+def get_logo_embed():
+    """
+    Get the company logo as a data URI for embedding in HTML
+
+    The logo is read and base64-encoded once and again only when the file
+    changes (by modification time).
+
+    Returns:
+        str: Data URI of the logo, or a placeholder image URL if there is no logo
     """
+    try:
+        mtime = os.stat(LOGO_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    with _template_lock:
+        if _logo_cache["mtime"] != mtime:
+            embed = LOGO_PLACEHOLDER
+            if mtime is not None:
+                try:
+                    with open(LOGO_PATH, "rb") as img_file:
+                        embed = f"data:image/png;base64,{base64.b64encode(img_file.read()).decode()}"
+                except OSError as e:
+                    print(f"Error reading logo {LOGO_PATH}: {e}")
+            _logo_cache.update(mtime=mtime, embed=embed)
+        return _logo_cache["embed"]
+
+def certificate_texts(course=None):
+    """
+    Get the course-specific texts printed on a certificate
+
+    Read from the course registry and settings once and again only after
+    they are saved.
+
+    Args:
+        course (str, optional): Course the certificate is for; the default course if None
+
+    Returns:
+        dict: {"title", "training", "statement", "validity"}
+    """
+    # Taken before reading, so a save during the read leaves the entry stale
+    generation = config_generation()
+    with _template_lock:
+        cached = _course_texts.get(course)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+    certificate = get_course(course)["certificate"]
+    validity_days = get_course_settings(course).get("certificate_validity_days", 365)
+    validity = "Valid for one year from the date of issue." if validity_days == 365 else \
+        f"Valid for {validity_days} days from the date of issue."
+    texts = {
+        "title": certificate["title"],
+        "training": certificate["training"],
+        "statement": certificate["statement"],
+        "validity": validity,
+    }
+    with _template_lock:
+        _course_texts[course] = (generation, texts)
+    return texts
+
+def get_certificate_template(course=None):
+    """
+    Get the certificate template of a course with its layout fields filled in
+
+    The filled-in page is split once around the per-certificate fields, so
+    rendering a certificate only joins strings and never rescans the
+    embedded logo. Rebuilt only after the logo, courses or settings are
+    saved.
+
+    Args:
+        course (str, optional): Course the certificate is for; the default course if None
+
+    Returns:
+        tuple: Literal text and field names alternating, starting and ending with text
+    """
+    generation = config_generation()
+    with _template_lock:
+        cached = _course_templates.get(course)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+    logo_embed = get_logo_embed()
+    texts = certificate_texts(course)
+    layout = dict(texts, logo=logo_embed)
+    # Split on the per-certificate fields before filling in the layout, so a "$"
+    # in the course texts or logo can never be taken for a field
+    parts = tuple(
+        Template(part).safe_substitute(layout) if i % 2 == 0 else part
+        for i, part in enumerate(CERTIFICATE_FIELDS.split(CERTIFICATE_TEMPLATE.template))
+    )
+    with _template_lock:
+        _course_templates[course] = (generation, parts)
+    return parts
+
+def create_certificate(name, score, date, cert_id=None, course=None):
+    """
+    Generate an enhanced HTML certificate with improved design
     
-    return html
\ No newline at end of file
+    Args:
+        name (str): Name of the recipient
+        score (str): Score percentage
+        date (str): Date of completion
+        cert_id (str, optional): Unique certificate ID
+        course (str, optional): Course the certificate is for; the default course if None
+    
+    Returns:
+        str: HTML content of the certificate
+    """
+    # Generate a certificate ID if not provided
+    if not cert_id:
+        cert_id = hashlib.md5(f"{name}_{score}_{date}".encode()).hexdigest()[:8].upper()
+    
+    fields = {"name": name, "score": score, "date": date, "cert_id": cert_id}
+    return render_certificate(get_certificate_template(course), fields)
+
+def render_certificate(parts, fields):
+    """
+    Substitute the variable fields into a prepared certificate page
+
+    Args:
+        parts (tuple): Prepared page from get_certificate_template()
+        fields (dict): "name", "score", "date" and "cert_id"
+
+    Returns:
+        str: HTML content of the certificate
+    """
+    parts = list(parts)
+    parts[1::2] = [str(fields[field]) for field in parts[1::2]]
+    return "".join(parts)
+
+def get_certificate_file(cert_id, name, score, date, course=None, file_format="html"):
+    """
+    Get a certificate as a file for download
+
+    Files are cached by certificate ID and format, so pages that offer the
+    same certificate on every rerun render it once. A cached file is rebuilt
+    if the logo, courses or settings were saved since.
+
+    Args:
+        cert_id (str): Certificate ID
+        name (str): Name of the recipient
+        score (str): Score percentage
+        date (str): Date of completion
+        course (str, optional): Course the certificate is for; the default course if None
+        file_format (str): "html" or "pdf"
+
+    Returns:
+        bytes: Certificate file
+    """
+    parts = get_certificate_template(course)
+    key = (cert_id, file_format)
+    with _template_lock:
+        cached = _certificate_files.get(key)
+        if cached is not None and cached[:4] == (parts, name, score, date):
+            _certificate_files.move_to_end(key)
+            return cached[4]
+
+    if file_format == "pdf":
+        from .certificate_pdf import create_certificate_pdf
+        data = create_certificate_pdf(name, score, date, cert_id, course=course)
+    else:
+        data = create_certificate(name, score, date, cert_id, course=course).encode()
+    with _template_lock:
+        _certificate_files[key] = (parts, name, score, date, data)
+        while len(_certificate_files) > CERTIFICATE_FILE_CACHE_SIZE:
+            _certificate_files.popitem(last=False)
+    return data
@@ -0,0 +1,192 @@
+import os
+import hmac
+import base64
+import struct
+import hashlib
+import secrets
+import datetime
+import threading
+import unicodedata
+from .data_manager import DATA_DIR, DEFAULT_COURSE, load_courses, revoked_certificate_ids
+
+# Signed certificate codes. A code carries everything needed to check it, so
+# verification needs only the server key and the revocation set, never the
+# score history. The 15 code bytes are:
+#   version (4 bits) and validity in days (12 bits)
+#   issue date (days since CODE_EPOCH, 16 bits)
+#   attempt ID (5 bytes, the 10 hex digits of the quiz attempt)
+#   HMAC-SHA256 tag (6 bytes) over the above, the course and the holder's name
+# written as 24 base32 characters in groups of four.
+
+CERTIFICATE_KEY_FILE = os.path.join(DATA_DIR, "certificate_signing.key")
+CODE_VERSION = 1
+CODE_EPOCH = datetime.date(2020, 1, 1)
+CODE_BYTES = 15
+TAG_BYTES = 6
+MAX_VALIDITY_DAYS = 0xFFF
+
+# Characters that are easily mistyped for base32 ones
+_CODE_TYPOS = str.maketrans({"0": "O", "1": "I", "8": "B"})
+
+_key_lock = threading.Lock()
+_signing_key = {}
+
+def get_signing_key():
+    """
+    Get the server's certificate signing key, creating it on first use
+
+    The key is created with owner-only permissions and cached for the life
+    of the process. Replacing the key file invalidates all issued codes.
+
+    Returns:
+        bytes: 32-byte key
+    """
+    with _key_lock:
+        if "key" not in _signing_key:
+            try:
+                # Exclusive create, so concurrent first uses end up with the same key
+                fd = os.open(CERTIFICATE_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "w") as f:
+                    f.write(secrets.token_hex(32))
+            except FileExistsError:
+                pass
+            with open(CERTIFICATE_KEY_FILE, "r") as f:
+                _signing_key["key"] = bytes.fromhex(f.read().strip())
+        return _signing_key["key"]
+
+def _normalize_name(name):
+    """Name as covered by the signature: case, spacing and Unicode form do not matter"""
+    return " ".join(unicodedata.normalize("NFKC", name or "").split()).casefold()
+
+def _tag(payload, course, name):
+    """Signature over the code payload, the course and the holder's name"""
+    message = b"\0".join([payload, (course or DEFAULT_COURSE).encode(), _normalize_name(name).encode()])
+    return hmac.new(get_signing_key(), message, hashlib.sha256).digest()[:TAG_BYTES]
+
+def normalize_certificate_code(code):
+    """
+    Bring a typed certificate code into its printed form
+
+    Dashes, spaces and case are ignored and common typos (0, 1, 8) are
+    corrected. IDs that are not signed codes (issued before them) are only
+    stripped and upper-cased.
+
+    Args:
+        code (str): Certificate code as entered
+
+    Returns:
+        str: Code in printed form
+    """
+    compact = "".join((code or "").split()).replace("-", "").upper()
+    candidate = compact.translate(_CODE_TYPOS)
+    if len(candidate) == CODE_BYTES * 8 // 5 and all(ch in "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567" for ch in candidate):
+        return "-".join(candidate[i:i + 4] for i in range(0, len(candidate), 4))
+    return compact
+
+def issue_certificate_code(name, course, attempt_id, issued, validity_days):
+    """
+    Issue a signed certificate code
+
+    The expiry is fixed in the code: changing the course's validity later
+    does not change certificates already issued.
+
+    Args:
+        name (str): Holder's name as printed on the certificate
+        course (str): Course of the certificate
+        attempt_id (str): ID of the passing quiz attempt
+        issued (datetime.date): Issue date
+        validity_days (int): Days the certificate is valid
+
+    Returns:
+        str: Certificate code, e.g. "ABCD-EFGH-IJKL-MNOP-QRST-UVWX"
+    """
+    try:
+        attempt_ref = bytes.fromhex(attempt_id)
+    except ValueError:
+        attempt_ref = b""
+    if len(attempt_ref) != 5:
+        attempt_ref = hashlib.sha1(str(attempt_id).encode()).digest()[:5]
+    validity_days = max(0, min(int(validity_days), MAX_VALIDITY_DAYS))
+    payload = struct.pack(">HH", CODE_VERSION << 12 | validity_days, (issued - CODE_EPOCH).days) + attempt_ref
+    raw = payload + _tag(payload, course, name)
+    return normalize_certificate_code(base64.b32encode(raw).decode())
+
+def _unpack(code):
+    """Split a certificate code into its printed form, fields and signature, or None"""
+    code = normalize_certificate_code(code)
+    try:
+        raw = base64.b32decode(code.replace("-", ""))
+    except ValueError:
+        return None
+    if len(raw) != CODE_BYTES:
+        return None
+    packed, issued_days = struct.unpack(">HH", raw[:4])
+    if packed >> 12 != CODE_VERSION:
+        return None
+    issued = CODE_EPOCH + datetime.timedelta(days=issued_days)
+    fields = {
+        "code": code,
+        "issued": issued,
+        "expires": issued + datetime.timedelta(days=packed & MAX_VALIDITY_DAYS),
+        "attempt_ref": raw[4:9].hex()
+    }
+    return fields, raw[:9], raw[9:]
+
+def decode_certificate_code(code):
+    """
+    Read the fields of a certificate code without checking its signature
+
+    Args:
+        code (str): Certificate code
+
+    Returns:
+        dict or None: {"code", "issued", "expires", "attempt_ref"} or None if it is not a signed code
+    """
+    unpacked = _unpack(code)
+    return unpacked[0] if unpacked else None
+
+def verify_certificate_code(code, name, today=None):
+    """
+    Verify a certificate code against the holder's name
+
+    Runs in constant time with respect to the number of issued certificates:
+    one signature check per course and a lookup in the in-memory revocation
+    set. The score history is never read.
+
+    Args:
+        code (str): Certificate code as entered
+        name (str): Holder's name as printed on the certificate
+        today (datetime.date, optional): Date to check validity on
+
+    Returns:
+        dict: {"status": "valid", "expired", "revoked" or "invalid", "code"} and,
+            unless invalid, "course", "issued", "expires" and "attempt_ref"
+    """
+    unpacked = _unpack(code)
+    if unpacked is None:
+        return {"status": "invalid", "code": normalize_certificate_code(code)}
+    decoded, payload, tag = unpacked
+
+    course = None
+    for course_id in load_courses():
+        if hmac.compare_digest(_tag(payload, course_id, name), tag):
+            course = course_id
+            break
+    if course is None:
+        return {"status": "invalid", "code": decoded["code"]}
+
+    today = today or datetime.date.today()
+    if decoded["code"] in revoked_certificate_ids():
+        status = "revoked"
+    elif today >= decoded["expires"]:
+        status = "expired"
+    else:
+        status = "valid"
+    return {
+        "status": status,
+        "code": decoded["code"],
+        "course": course,
+        "issued": decoded["issued"],
+        "expires": decoded["expires"],
+        "attempt_ref": decoded["attempt_ref"]
+    }
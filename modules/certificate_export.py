@@ -0,0 +1,248 @@
+import os
+import io
+import csv
+import hashlib
+import zipfile
+import datetime
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from .data_manager import DATA_DIR
+from .certifications import get_valid_certificates
+from .certificate import get_certificate_template, render_certificate
+from .certificate_pdf import CERTIFICATE_FONTS, FONT_DIR, write_certificates_pdf
+
+EXPORT_DIR = os.path.join(DATA_DIR, "exports")
+
+# Rendered certificates kept between exports, named <cert_id>-<fingerprint>.html;
+# the fingerprint covers the page template and the certificate fields, so a
+# file is reused exactly as long as the certificate would render the same
+RENDER_CACHE_DIR = os.path.join(EXPORT_DIR, "certificates")
+
+# Batches smaller than this are rendered in this process; starting workers costs more
+POOL_THRESHOLD = 50
+EXPORT_WORKERS = min(4, os.cpu_count() or 1)
+
+# Page templates per course, set once in each worker process
+_worker_templates = {}
+
+def export_file(course, extension):
+    """
+    Path of the export file of a scope
+
+    Args:
+        course (str): Course of the export; None for all courses
+        extension (str): "zip" or "pdf"
+
+    Returns:
+        str: e.g. data/exports/valid_certificates.zip or valid_certificates_forklift.pdf
+    """
+    scope = f"_{course}" if course else ""
+    return os.path.join(EXPORT_DIR, f"valid_certificates{scope}.{extension}")
+
+def _temp_file(directory):
+    """Open a new, uniquely named temporary file in a directory for writing (binary)"""
+    fd, temp_file = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    return temp_file, os.fdopen(fd, "wb")
+
+def _init_worker(templates):
+    """Receive the prepared page templates (process pool initializer)"""
+    _worker_templates.update(templates)
+
+def _render_to_file(job, templates=None):
+    """
+    Render one certificate into the render cache
+
+    Workers write the file themselves and only return its path, so
+    certificate contents never travel back through the pool.
+
+    Args:
+        job (tuple): (path, course, fields)
+        templates (dict, optional): Page templates per course; the worker's if None
+
+    Returns:
+        str: Path of the rendered file
+    """
+    path, course, fields = job
+    html = render_certificate((templates or _worker_templates)[course], fields)
+    temp_file, f = _temp_file(os.path.dirname(path))
+    with f:
+        f.write(html.encode("utf-8"))
+    os.replace(temp_file, path)
+    return path
+
+def _template_fingerprint(parts):
+    """Hash of a prepared page template"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _certificate_fields(cert):
+    """Fields printed on an exported certificate"""
+    return {
+        "name": cert["name"],
+        "score": f"{cert['score']:.1f}",
+        "date": cert["issued"].strftime("%B %d, %Y"),
+        "cert_id": cert["cert_id"]
+    }
+
+def export_certificates(course=None, progress=None):
+    """
+    Export all currently valid certificates into one ZIP file
+
+    Certificates are rendered into the render cache, in a process pool for
+    large batches, skipping any whose cached file is still current. The ZIP
+    is then streamed from those files one at a time, so memory use does not
+    grow with the number of certificates. A manifest.csv lists every
+    certificate in the archive.
+
+    Args:
+        course (str, optional): Only certificates of this course; all courses if None
+        progress (callable, optional): Called as progress(fraction, text) while exporting
+
+    Returns:
+        dict: {"path", "count", "rendered", "reused", "exported_at"}
+    """
+    report = progress or (lambda fraction, text: None)
+    os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+
+    certificates = get_valid_certificates(course)
+    templates = {cert["course"]: get_certificate_template(cert["course"]) for cert in certificates}
+    template_fingerprints = {course_id: _template_fingerprint(parts) for course_id, parts in templates.items()}
+
+    # Work out which certificates need rendering
+    entries, jobs = [], []
+    for cert in certificates:
+        fields = _certificate_fields(cert)
+        fingerprint = hashlib.sha1(
+            "\0".join([template_fingerprints[cert["course"]]] + [fields[key] for key in sorted(fields)]).encode()
+        ).hexdigest()[:16]
+        path = os.path.join(RENDER_CACHE_DIR, f"{cert['cert_id']}-{fingerprint}.html")
+        entries.append((cert, path))
+        if not os.path.exists(path):
+            jobs.append((path, cert["course"], fields))
+
+    # Render the changed ones (first half of the progress bar)
+    total = len(entries) or 1
+    if len(jobs) >= POOL_THRESHOLD and EXPORT_WORKERS > 1:
+        # Spawned workers do not inherit the server's threads and locks
+        with ProcessPoolExecutor(
+            max_workers=EXPORT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(templates,)
+        ) as pool:
+            for done, _ in enumerate(pool.map(_render_to_file, jobs, chunksize=8), start=1):
+                report(done / total / 2, f"Rendered {done} of {len(jobs)} certificates")
+    else:
+        for done, job in enumerate(jobs, start=1):
+            _render_to_file(job, templates)
+            report(done / total / 2, f"Rendered {done} of {len(jobs)} certificates")
+
+    # Stream the files into the archive (second half)
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(["username", "name", "course", "certificate_id", "score", "issued", "expires", "file"])
+    # Each scope has its own file and each export its own temporary file, so
+    # concurrent exports never write into the same file
+    export_path = export_file(course, "zip")
+    temp_file, f = _temp_file(EXPORT_DIR)
+    # Stored, not deflated: the files are mostly the base64 logo, which compresses
+    # by only about a quarter, and deflating would cost more than rendering
+    with f, zipfile.ZipFile(f, "w", compression=zipfile.ZIP_STORED) as archive:
+        for done, (cert, path) in enumerate(entries, start=1):
+            arcname = f"{cert['course']}/{cert['username']}_{cert['cert_id']}.html"
+            archive.write(path, arcname)
+            writer.writerow([
+                cert["username"], cert["name"], cert["course"], cert["cert_id"], f"{cert['score']:.1f}",
+                cert["issued"].strftime("%Y-%m-%d"), cert["expires"].strftime("%Y-%m-%d"), arcname
+            ])
+            report(0.5 + done / total / 2, f"Added {done} of {len(entries)} certificates to the archive")
+        archive.writestr("manifest.csv", manifest.getvalue())
+    os.replace(temp_file, export_path)
+
+    # Drop cached renders of certificates that changed or are no longer valid
+    keep = {os.path.basename(path) for _, path in entries}
+    if course is None:
+        for name in os.listdir(RENDER_CACHE_DIR):
+            if name not in keep:
+                try:
+                    os.remove(os.path.join(RENDER_CACHE_DIR, name))
+                except OSError:
+                    pass
+
+    report(1.0, f"Exported {len(entries)} certificates")
+    return {
+        "path": export_path,
+        "count": len(entries),
+        "rendered": len(jobs),
+        "reused": len(entries) - len(jobs),
+        "exported_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+def export_certificates_pdf(course=None, progress=None):
+    """
+    Export all currently valid certificates into one printable PDF, one page each
+
+    Pages are streamed straight to the file, so a batch of thousands prints
+    from one file without being held in memory. The export is skipped when
+    nothing that ends up on the pages (certificates, course texts, logo,
+    fonts) changed since the last PDF export of the same scope.
+
+    Args:
+        course (str, optional): Only certificates of this course; all courses if None
+        progress (callable, optional): Called as progress(fraction, text) while exporting
+
+    Returns:
+        dict: {"path", "count", "rendered", "reused", "exported_at"}
+    """
+    report = progress or (lambda fraction, text: None)
+    certificates = get_valid_certificates(course)
+
+    # Fingerprint of everything printed on the pages
+    digest = hashlib.sha1(str(course).encode())
+    for course_id in sorted({cert["course"] for cert in certificates}):
+        digest.update(_template_fingerprint(get_certificate_template(course_id)).encode())
+    for file_name, _ in CERTIFICATE_FONTS.values():
+        try:
+            stat = os.stat(os.path.join(FONT_DIR, file_name))
+            digest.update(f"{file_name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        except OSError:
+            pass
+    for cert in certificates:
+        fields = _certificate_fields(cert)
+        digest.update("\0".join([cert["course"]] + [fields[key] for key in sorted(fields)]).encode())
+    fingerprint = digest.hexdigest()
+
+    export_path = export_file(course, "pdf")
+    fingerprint_file = f"{export_path}.sha1"
+    try:
+        with open(fingerprint_file, "r", encoding="utf-8") as f:
+            unchanged = f.read().strip() == fingerprint and os.path.exists(export_path)
+    except OSError:
+        unchanged = False
+
+    total = len(certificates) or 1
+    if not unchanged:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        pages = (dict(_certificate_fields(cert), course=cert["course"]) for cert in certificates)
+        temp_file, f = _temp_file(EXPORT_DIR)
+        with f:
+            write_certificates_pdf(
+                f, pages, title="Valid Certificates",
+                progress=lambda done: report(done / total, f"Wrote {done} of {len(certificates)} pages")
+            )
+        os.replace(temp_file, export_path)
+        with open(fingerprint_file, "w", encoding="utf-8") as f:
+            f.write(fingerprint)
+
+    report(1.0, f"Exported {len(certificates)} certificates")
+    return {
+        "path": export_path,
+        "count": len(certificates),
+        "rendered": 0 if unchanged else len(certificates),
+        "reused": len(certificates) if unchanged else 0,
+        "exported_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
@@ -0,0 +1,248 @@
+import os
+import io
+import hashlib
+from .data_manager import LOGO_PATH, ASSETS_DIR
+from .certificate import certificate_texts
+from .pdf import (
+    new_document, reserve_object, write_object, write_stream, finish_document, pdf_text_string,
+    write_image, load_truetype, standard_font, use_font, text_width, encode_text, write_font
+)
+
+# PDF version of the certificate.py layout. It needs nothing from the network:
+# fonts placed in assets/fonts are embedded (subsetted to the glyphs used),
+# otherwise the PDF base fonts that every reader has built in are used.
+
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595  # A4 landscape, in points
+FONT_DIR = os.path.join(ASSETS_DIR, "fonts")
+
+# Font role: (TrueType file in FONT_DIR, base font used if the file is missing)
+CERTIFICATE_FONTS = {
+    "regular": ("Montserrat-Regular.ttf", "Helvetica"),
+    "bold": ("Montserrat-Bold.ttf", "Helvetica-Bold"),
+    "heading": ("PlayfairDisplay-Bold.ttf", "Times-Bold"),
+}
+
+# Colors of the HTML certificate
+BLUE = "#1E88E5"
+DARK_BLUE = "#0D47A1"
+TEXT = "#333333"
+MUTED = "#555555"
+LIGHT = "#666666"
+FAINT = "#888888"
+RULE = "#EAEAEA"
+
+def _rgb(color):
+    """PDF color operands for a hex color"""
+    return " ".join(f"{int(color[i:i + 2], 16) / 255:.3f}" for i in (1, 3, 5))
+
+def _text(ops, font_use, text, size, x, y, color, align="left", spacing=0.0):
+    """Add a line of text; x is its left edge, center or right edge depending on align"""
+    width = text_width(font_use, text, size) + spacing * len(text)
+    if align == "center":
+        x -= width / 2
+    elif align == "right":
+        x -= width
+    ops.append(
+        f"BT /{font_use['resource']} {size:g} Tf {spacing:g} Tc {_rgb(color)} rg "
+        f"{x:.2f} {y:.2f} Td {encode_text(font_use, text)} Tj ET"
+    )
+    return width
+
+def _line(ops, x1, y1, x2, y2, color, width=1.0):
+    ops.append(f"{_rgb(color)} RG {width:g} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S")
+
+def _wrap(font_use, text, size, max_width):
+    """Split text into lines no wider than max_width"""
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and text_width(font_use, candidate, size) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+def _course_texts(fonts, course):
+    """Course texts from certificate.certificate_texts(), with the footer statement wrapped"""
+    texts = dict(certificate_texts(course))
+    texts["statement_lines"] = _wrap(fonts["regular"], texts["statement"], 8, PAGE_WIDTH - 160)[:2]
+    return texts
+
+def _draw_certificate(fonts, logo, texts, cert):
+    """
+    Page content of one certificate
+
+    Args:
+        fonts (dict): Font use per role
+        logo (tuple or None): (resource name, width, height) of the shared logo image
+        texts (dict): Course texts from _course_texts()
+        cert (dict): {"name", "score", "date", "cert_id"}
+
+    Returns:
+        bytes: Content stream
+    """
+    regular, bold, heading = fonts["regular"], fonts["bold"], fonts["heading"]
+    center = PAGE_WIDTH / 2
+    top = PAGE_HEIGHT
+    ops = []
+
+    # Border (the HTML version uses a blue gradient)
+    ops.append(f"{_rgb(BLUE)} RG 14 w 25 25 {PAGE_WIDTH - 50} {PAGE_HEIGHT - 50} re S")
+    ops.append(f"{_rgb(DARK_BLUE)} RG 1 w 34 34 {PAGE_WIDTH - 68} {PAGE_HEIGHT - 68} re S")
+
+    if logo is not None:
+        resource, width, height = logo
+        # Faint watermark in the middle of the page, then the header logo
+        mark_width = 0.6 * (PAGE_WIDTH - 68)
+        mark_height = mark_width * height / width
+        if mark_height > PAGE_HEIGHT - 120:
+            mark_height = PAGE_HEIGHT - 120
+            mark_width = mark_height * width / height
+        ops.append(
+            f"q /GS1 gs {mark_width:.2f} 0 0 {mark_height:.2f} "
+            f"{center - mark_width / 2:.2f} {(PAGE_HEIGHT - mark_height) / 2:.2f} cm /{resource} Do Q"
+        )
+        logo_height = 50
+        logo_width = logo_height * width / height
+        if logo_width > 160:
+            logo_width, logo_height = 160, 160 * height / width
+        ops.append(f"q {logo_width:.2f} 0 0 {logo_height:.2f} 60 {top - 60 - logo_height:.2f} cm /{resource} Do Q")
+
+    # Header
+    _text(ops, regular, f"Certificate ID: {cert['cert_id']}", 10, PAGE_WIDTH - 60, top - 75, FAINT, "right")
+    _text(ops, regular, f"Issue Date: {cert['date']}", 10, PAGE_WIDTH - 60, top - 89, FAINT, "right")
+    _line(ops, 60, top - 118, PAGE_WIDTH - 60, top - 118, RULE)
+
+    # Title and recipient
+    _text(ops, heading, "CERTIFICATE", 40, center, top - 168, BLUE, "center", spacing=2)
+    _text(ops, bold, "of Achievement", 18, center, top - 194, MUTED, "center")
+    _text(ops, regular, "This certifies that", 12, center, top - 232, LIGHT, "center")
+    name_width = _text(ops, heading, cert["name"], 30, center, top - 270, TEXT, "center")
+    _line(ops, center - name_width / 2 - 20, top - 280, center + name_width / 2 + 20, top - 280, BLUE)
+
+    # Achievement
+    _text(ops, regular, "has successfully completed the", 13, center, top - 308, MUTED, "center")
+    _text(ops, bold, texts["training"], 13, center, top - 326, TEXT, "center")
+    _text(ops, regular, "demonstrating proficiency in safety protocols and operational procedures", 13,
+          center, top - 344, MUTED, "center")
+    _text(ops, regular, "with a score of", 13, center, top - 362, MUTED, "center")
+    _text(ops, bold, f"{cert['score']}%", 22, center, top - 390, BLUE, "center")
+
+    # Completion date, "Completed on" in regular and the date in bold
+    lead, date = "Completed on ", cert["date"]
+    total = text_width(regular, lead, 12) + text_width(bold, date, 12)
+    lead_width = _text(ops, regular, lead, 12, center - total / 2, top - 418, LIGHT)
+    _text(ops, bold, date, 12, center - total / 2 + lead_width, top - 418, TEXT)
+
+    # Signatures
+    for x, signer, role in ((PAGE_WIDTH * 0.3, "Operations Manager", "Certification Authority"),
+                            (PAGE_WIDTH * 0.7, "Training Director", "Safety Department")):
+        _line(ops, x - 100, 132, x + 100, 132, TEXT, 0.8)
+        _text(ops, bold, signer, 11, x, 118, TEXT, "center")
+        _text(ops, regular, role, 9, x, 106, LIGHT, "center")
+
+    # Footer
+    _line(ops, 60, 94, PAGE_WIDTH - 60, 94, RULE)
+    y = 82
+    for line in texts["statement_lines"]:
+        _text(ops, regular, line, 8, center, y, FAINT, "center")
+        y -= 10
+    _text(ops, regular, texts["validity"], 8, center, y, FAINT, "center")
+    _text(ops, bold, f"Verify certificate authenticity with Certificate ID: {cert['cert_id']}", 8,
+          center, y - 10, FAINT, "center")
+
+    return "\n".join(ops).encode("latin-1")
+
+def write_certificates_pdf(stream, certificates, title="Certificates", progress=None):
+    """
+    Write certificates as one PDF, one page per certificate
+
+    Pages are written as they are produced, so certificates can be a
+    generator and memory use stays flat however many pages there are (only
+    object offsets are kept). The fonts, logo image and page resources are
+    written once and shared by all pages; fonts are subsetted at the end to
+    the glyphs the pages used.
+
+    Args:
+        stream (file-like): Binary stream to write to
+        certificates (iterable): {"name", "score", "date", "cert_id", "course"} per page
+        title (str): Document title
+        progress (callable, optional): Called with the number of pages written so far
+
+    Returns:
+        int: Number of pages
+    """
+    doc = new_document(stream)
+    fonts = {}
+    for number, (role, (file_name, base_font)) in enumerate(CERTIFICATE_FONTS.items(), start=1):
+        font = load_truetype(os.path.join(FONT_DIR, file_name)) or standard_font(base_font)
+        fonts[role] = use_font(doc, font, f"F{number}")
+    pages_id = reserve_object(doc)
+
+    # Shared resources
+    logo, xobjects = None, ""
+    if os.path.exists(LOGO_PATH):
+        try:
+            image_id, width, height = write_image(doc, LOGO_PATH)
+            logo = ("Im1", width, height)
+            xobjects = f" /XObject << /Im1 {image_id} 0 R >>"
+        except OSError as e:
+            print(f"Error reading logo {LOGO_PATH}: {e}")
+    watermark_id = write_object(doc, None, "<< /Type /ExtGState /ca 0.05 >>")
+    font_refs = " ".join(f"/{use['resource']} {use['object_id']} 0 R" for use in fonts.values())
+    resources_id = write_object(
+        doc, None, f"<< /Font << {font_refs} >>{xobjects} /ExtGState << /GS1 {watermark_id} 0 R >> >>"
+    )
+
+    page_ids = []
+    course_texts = {}
+    for cert in certificates:
+        course = cert.get("course")
+        if course not in course_texts:
+            course_texts[course] = _course_texts(fonts, course)
+        content_id = write_stream(doc, None, _draw_certificate(fonts, logo, course_texts[course], cert))
+        page_ids.append(write_object(
+            doc, None,
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources {resources_id} 0 R /Contents {content_id} 0 R >>"
+        ))
+        if progress:
+            progress(len(page_ids))
+
+    for font_use in fonts.values():
+        write_font(doc, font_use)
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    write_object(doc, pages_id, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>")
+    catalog_id = write_object(doc, None, f"<< /Type /Catalog /Pages {pages_id} 0 R >>")
+    info_id = write_object(doc, None, f"<< /Title {pdf_text_string(title)} /Producer (Forklift Training) >>")
+    finish_document(doc, catalog_id, info_id)
+    return len(page_ids)
+
+def create_certificate_pdf(name, score, date, cert_id=None, course=None):
+    """
+    Generate a single certificate as a PDF file
+
+    Args:
+        name (str): Name of the recipient
+        score (str): Score percentage
+        date (str): Date of completion
+        cert_id (str, optional): Unique certificate ID
+        course (str, optional): Course the certificate is for; the default course if None
+
+    Returns:
+        bytes: PDF file
+    """
+    # Same fallback ID as the HTML certificate
+    if not cert_id:
+        cert_id = hashlib.md5(f"{name}_{score}_{date}".encode()).hexdigest()[:8].upper()
+
+    buffer = io.BytesIO()
+    write_certificates_pdf(
+        buffer,
+        [{"name": name, "score": score, "date": date, "cert_id": cert_id, "course": course}],
+        title=certificate_texts(course)["title"]
+    )
+    return buffer.getvalue()
@@ -0,0 +1,209 @@
+import os
+import io
+import csv
+import bisect
+import datetime
+import threading
+from .data_manager import (
+    CERTIFICATIONS_FILE, DEFAULT_COURSE, read_certification_log, rebuild_certification_log,
+    compact_certification_log, revoked_certificate_ids
+)
+
+# Current certification of every user per course, kept in memory from the
+# certification log:
+# {
+#     "state": {username: {course: record}},
+#     "expiry": [(expires, username, course), ...] sorted, so a date range is two bisects
+# }
+# New log lines are applied incrementally; a rewritten log (different file or
+# shorter than what was read) is loaded again from the start.
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Days ahead the renewal worklist looks by default
+RENEWAL_WINDOW_DAYS = 30
+
+# Superseded log lines allowed before the log is compacted
+COMPACT_SLACK = 1000
+
+WORKLIST_COLUMNS = ["username", "name", "course", "cert_id", "score", "issued", "expires", "status", "days_left"]
+
+_index_lock = threading.Lock()
+_index = {"file": None, "offset": 0, "lines": 0, "state": {}, "expiry": []}
+
+def _apply(record):
+    """Make a log record the current certification of its user and course"""
+    username, course = record["username"], record["course"]
+    courses = _index["state"].setdefault(username, {})
+    expiry = _index["expiry"]
+    old = courses.get(course)
+    if old is not None:
+        position = bisect.bisect_left(expiry, (old["expires"], username, course))
+        if position < len(expiry) and expiry[position] == (old["expires"], username, course):
+            del expiry[position]
+    courses[course] = record
+    bisect.insort(expiry, (record["expires"], username, course))
+
+def _refresh():
+    """Bring the index up to date with the log (call with _index_lock held)"""
+    try:
+        stat = os.stat(CERTIFICATIONS_FILE)
+    except FileNotFoundError:
+        rebuild_certification_log()
+        stat = os.stat(CERTIFICATIONS_FILE)
+
+    identity = (stat.st_dev, stat.st_ino)
+    if identity != _index["file"] or stat.st_size < _index["offset"]:
+        _index.update(file=identity, offset=0, lines=0, state={}, expiry=[])
+    if stat.st_size == _index["offset"]:
+        return
+
+    records, offset = read_certification_log(_index["offset"])
+    if _index["offset"] == 0 and len(records) > 1:
+        # Full load: build the list unsorted and sort once
+        latest = {}
+        for record in records:
+            latest[(record["username"], record["course"])] = record
+        for (username, course), record in latest.items():
+            _index["state"].setdefault(username, {})[course] = record
+        _index["expiry"] = sorted((record["expires"], username, course) for (username, course), record in latest.items())
+    else:
+        for record in records:
+            _apply(record)
+    _index["offset"] = offset
+    _index["lines"] += len(records)
+
+    if _index["lines"] > 2 * len(_index["expiry"]) + COMPACT_SLACK:
+        compact_certification_log()
+        _index.update(file=None, offset=0, lines=0, state={}, expiry=[])
+        _refresh()
+
+def get_certification(username, course=None):
+    """
+    Get a user's current certification for a course
+
+    This is the user's most recent passing score, whether or not it has
+    expired or was revoked.
+
+    Args:
+        username (str): Username of the user
+        course (str, optional): Course; the default course if None
+
+    Returns:
+        dict or None: {"username", "course", "cert_id", "name", "score", "issued", "expires", "attempt_id"}
+    """
+    with _index_lock:
+        _refresh()
+        record = _index["state"].get(username, {}).get(course or DEFAULT_COURSE)
+        return dict(record) if record else None
+
+def certifications_expiring(start, end, course=None):
+    """
+    Get the certifications that expire in a time range
+
+    Args:
+        start (datetime.datetime): Start of the range (inclusive)
+        end (datetime.datetime): End of the range (exclusive); None for no end
+        course (str, optional): Only certifications of this course; all courses if None
+
+    Returns:
+        list: Certification records, soonest expiry first
+    """
+    with _index_lock:
+        _refresh()
+        expiry, state = _index["expiry"], _index["state"]
+        low = bisect.bisect_left(expiry, (start.strftime(TIMESTAMP_FORMAT),))
+        high = bisect.bisect_left(expiry, (end.strftime(TIMESTAMP_FORMAT),)) if end is not None else len(expiry)
+        return [
+            dict(state[username][record_course])
+            for _, username, record_course in expiry[low:high]
+            if course is None or record_course == course
+        ]
+
+def get_valid_certificates(course=None, as_of=None):
+    """
+    Get the certificates that are valid at a point in time
+
+    A user's certificate for a course comes from their most recent passing
+    score and is valid until the expiry set when it was issued, unless it
+    was revoked.
+
+    Args:
+        course (str, optional): Only certificates of this course; all courses if None
+        as_of (datetime.datetime, optional): Point in time; now if None
+
+    Returns:
+        list: {"username", "name", "course", "cert_id", "score", "issued", "expires"}
+            per valid certificate, soonest expiry first
+    """
+    as_of = as_of or datetime.datetime.now()
+    revoked = revoked_certificate_ids()
+    return [
+        {
+            "username": record["username"],
+            "name": record["name"],
+            "course": record["course"],
+            "cert_id": record["cert_id"],
+            "score": record["score"],
+            "issued": datetime.datetime.fromisoformat(record["issued"]),
+            "expires": datetime.datetime.fromisoformat(record["expires"])
+        }
+        for record in certifications_expiring(as_of + datetime.timedelta(seconds=1), None, course)
+        if record["cert_id"] not in revoked
+    ]
+
+def renewal_worklist(days=RENEWAL_WINDOW_DAYS, overdue_days=0, course=None, now=None):
+    """
+    Get the operators whose certification needs renewing
+
+    Args:
+        days (int): Include certifications expiring within this many days
+        overdue_days (int): Also include certifications that expired within this many days
+        course (str, optional): Only this course; all courses if None
+        now (datetime.datetime, optional): Current time
+
+    Returns:
+        list: One row per certification with the WORKLIST_COLUMNS keys, soonest expiry first
+    """
+    now = now or datetime.datetime.now()
+    today = now.date()
+    revoked = revoked_certificate_ids()
+    now_text = now.strftime(TIMESTAMP_FORMAT)
+    rows = []
+    for record in certifications_expiring(
+        now - datetime.timedelta(days=overdue_days), now + datetime.timedelta(days=days), course
+    ):
+        if record["cert_id"] in revoked:
+            status = "revoked"
+        elif record["expires"] <= now_text:
+            status = "expired"
+        else:
+            status = "expiring"
+        rows.append({
+            "username": record["username"],
+            "name": record["name"],
+            "course": record["course"],
+            "cert_id": record["cert_id"],
+            "score": round(record["score"], 1),
+            "issued": record["issued"][:10],
+            "expires": record["expires"][:10],
+            "status": status,
+            "days_left": (datetime.date.fromisoformat(record["expires"][:10]) - today).days
+        })
+    return rows
+
+def worklist_csv(rows):
+    """
+    Write a renewal worklist as CSV
+
+    Args:
+        rows (list): Rows from renewal_worklist()
+
+    Returns:
+        bytes: UTF-8 encoded CSV with a header row
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=WORKLIST_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode("utf-8")
@@ -0,0 +1,139 @@
+import os
+import json
+from .data_manager import ATTEMPT_JOURNAL_DIR
+
+# Journal of one in-progress attempt: data/attempts/<username>/<attempt_id>.jsonl
+# The first line holds the attempt setup, every later line is one small delta:
+#   {"t": "start", "attempt": {...}, "extra": {...}}   attempt fields and page settings
+#   {"t": "a", "i": 3, "s": 1, "ms": 5400}              answer to question 3
+#   {"t": "q", "id": 42, "v": "9f2c...", "o": 17}          question added with its version and option order (adaptive)
+# The journal is removed once the attempt is saved to scores.json.
+
+# Attempt fields written to the journal header (answer containers are replayed from deltas)
+JOURNAL_FIELDS = ("attempt_id", "username", "course", "mode", "question_ids", "question_versions", "option_codes", "categories", "started_at", "deadline", "form_id")
+
+def journal_path(username, attempt_id):
+    """Return the journal file path for an attempt"""
+    return os.path.join(ATTEMPT_JOURNAL_DIR, username, f"{attempt_id}.jsonl")
+
+def _append(path, record, mode="a"):
+    """Write one journal line and force it to disk"""
+    try:
+        with open(path, mode) as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    except Exception as e:
+        print(f"Error writing to {path}: {e}")
+        return False
+
+def start_journal(attempt, extra=None):
+    """
+    Create the journal for a new attempt
+
+    Args:
+        attempt (dict): Attempt record from attempts.new_attempt()
+        extra (dict, optional): Page settings needed to resume (e.g. adaptive quiz limits)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    path = journal_path(attempt["username"], attempt["attempt_id"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    header = {field: attempt.get(field) for field in JOURNAL_FIELDS}
+    header["question_ids"] = list(header["question_ids"])
+    header["question_versions"] = list(header["question_versions"] or [])
+    header["option_codes"] = list(header["option_codes"] or [])
+    return _append(path, {"t": "start", "attempt": header, "extra": extra or {}}, mode="w")
+
+def journal_answer(attempt, position):
+    """
+    Append an answer to the attempt journal
+
+    Only the answered position is written, so the cost per answer does not
+    grow with the quiz length or the number of saved scores.
+
+    Args:
+        attempt (dict): Attempt record
+        position (int): Position of the answered question in the quiz
+    """
+    return _append(journal_path(attempt["username"], attempt["attempt_id"]), {
+        "t": "a",
+        "i": position,
+        "s": attempt["selected"][position],
+        "ms": attempt["latency_ms"][position],
+    })
+
+def journal_question(attempt, question_id, version, option_code=0):
+    """Append a question added to an adaptive attempt"""
+    return _append(journal_path(attempt["username"], attempt["attempt_id"]), {
+        "t": "q",
+        "id": question_id,
+        "v": version,
+        "o": option_code,
+    })
+
+def close_journal(attempt):
+    """Remove the journal of a saved or discarded attempt"""
+    try:
+        os.remove(journal_path(attempt["username"], attempt["attempt_id"]))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error removing journal for attempt {attempt['attempt_id']}: {e}")
+
+def list_journals(username=None):
+    """
+    List the journals of unfinished attempts
+
+    Args:
+        username (str, optional): Only this user's journals; all users if None
+
+    Returns:
+        list: Journal file paths, most recently written first
+    """
+    if username is not None:
+        user_dirs = [os.path.join(ATTEMPT_JOURNAL_DIR, username)]
+    elif os.path.isdir(ATTEMPT_JOURNAL_DIR):
+        user_dirs = [entry.path for entry in os.scandir(ATTEMPT_JOURNAL_DIR) if entry.is_dir()]
+    else:
+        user_dirs = []
+
+    paths = []
+    for user_dir in user_dirs:
+        if os.path.isdir(user_dir):
+            paths.extend(entry.path for entry in os.scandir(user_dir) if entry.name.endswith(".jsonl"))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+def read_journal(path):
+    """
+    Read an attempt journal
+
+    A partly written last line (e.g. the server stopped mid-write) is ignored.
+
+    Args:
+        path (str): Journal file path
+
+    Returns:
+        tuple or None: (header dict, list of delta records), None if the journal is unreadable
+    """
+    try:
+        with open(path) as f:
+            lines = f.read().split("\n")
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+
+    records = []
+    for line in lines:
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            break
+
+    if not records or records[0].get("t") != "start":
+        return None
+    return records[0], records[1:]
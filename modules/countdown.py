@@ -0,0 +1,26 @@
+import os
+import time
+import streamlit.components.v1 as components
+
+# Static frontend, no build step needed
+_COMPONENT_DIR = os.path.join(os.path.dirname(__file__), "static", "components", "countdown")
+_countdown = components.declare_component("quiz_countdown", path=_COMPONENT_DIR)
+
+def countdown_timer(deadline, key=None):
+    """
+    Show a countdown that ticks in the browser
+
+    The remaining time is computed client-side from the server-issued
+    deadline (corrected for clock offset), so the page does not need to
+    rerun to keep the timer current. The component calls back to the
+    server only when the countdown reaches zero, which triggers a single
+    rerun where the deadline is checked on the server.
+
+    Args:
+        deadline (float): Deadline as epoch seconds (server clock)
+        key (str, optional): Widget key
+
+    Returns:
+        float or None: Server time at which the browser reported expiry, None before that
+    """
+    return _countdown(deadline=deadline, server_now=time.time(), key=key, default=None)
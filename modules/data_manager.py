@@ -2,14 +2,32 @@ import os
 import json
 import datetime
 import hashlib
+import threading
+from types import MappingProxyType
+import numpy as np
 
 # File paths with more organization
 DATA_DIR = "data"
 USER_DB_FILE = os.path.join(DATA_DIR, "users.json")
-QUESTIONS_FILE = os.path.join(DATA_DIR, "questions.json")
+QUESTIONS_FILE = os.path.join(DATA_DIR, "questions.json")  # Legacy flat file, imported into the question store
+QUESTION_STORE_DIR = os.path.join(DATA_DIR, "question_store")
+QUESTION_OBJECTS_DIR = os.path.join(QUESTION_STORE_DIR, "objects")
+QUESTION_HEADS_FILE = os.path.join(QUESTION_STORE_DIR, "heads.json")
 SCORES_FILE = os.path.join(DATA_DIR, "scores.json")
 SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
+EXPOSURE_FILE = os.path.join(DATA_DIR, "item_exposure.json")
+ITEM_PARAMS_FILE = os.path.join(DATA_DIR, "item_parameters.json")
+RESPONSES_FILE = os.path.join(DATA_DIR, "responses.jsonl")
+ATTEMPT_JOURNAL_DIR = os.path.join(DATA_DIR, "attempts")
+EXAM_FORMS_FILE = os.path.join(DATA_DIR, "exam_forms.json")
+COURSES_FILE = os.path.join(DATA_DIR, "courses.json")
+COURSES_DIR = os.path.join(DATA_DIR, "courses")
+PRACTICE_DIR = os.path.join(DATA_DIR, "practice")
+REVIEW_DIR = os.path.join(DATA_DIR, "review")
 USER_SETTINGS_DIR = os.path.join(DATA_DIR, "user_settings")
+REVOKED_CERTIFICATES_FILE = os.path.join(DATA_DIR, "revoked_certificates.json")
+CERTIFICATIONS_FILE = os.path.join(DATA_DIR, "certifications.jsonl")
+PASS_EVALUATION_FILE = os.path.join(DATA_DIR, "pass_evaluation.json")
 ASSETS_DIR = "assets"
 LOGO_PATH = os.path.join(ASSETS_DIR, "XLC2.png")
 BACKUP_DIR = os.path.join(DATA_DIR, "backups")
@@ -21,6 +39,11 @@ def ensure_directories():
     os.makedirs(ASSETS_DIR, exist_ok=True)
     os.makedirs(USER_SETTINGS_DIR, exist_ok=True)
     os.makedirs(BACKUP_DIR, exist_ok=True)
+    os.makedirs(ATTEMPT_JOURNAL_DIR, exist_ok=True)
+    os.makedirs(QUESTION_OBJECTS_DIR, exist_ok=True)
+    os.makedirs(COURSES_DIR, exist_ok=True)
+    os.makedirs(PRACTICE_DIR, exist_ok=True)
+    os.makedirs(REVIEW_DIR, exist_ok=True)
 
 # File operations with error handling
 def read_json_file(file_path, default=None):
@@ -52,13 +75,14 @@ def read_json_file(file_path, default=None):
         
         return default
 
-def write_json_file(file_path, data):
+def write_json_file(file_path, data, backup=True):
     """
     Write JSON to a file with error handling and atomic writing
     
     Args:
         file_path (str): Path to save the JSON file
         data: Data to save as JSON
+        backup (bool): Keep a timestamped backup of the previous file
     
     Returns:
         bool: True if successful, False otherwise
@@ -73,7 +97,7 @@ def write_json_file(file_path, data):
             json.dump(data, f, indent=2)
         
         # Replace the original file (atomic operation)
-        if os.path.exists(file_path):
+        if backup and os.path.exists(file_path):
             # Create backup
             backup_file = os.path.join(
                 BACKUP_DIR, 
@@ -109,8 +133,12 @@ def initialize_data_files():
         }
         write_json_file(USER_DB_FILE, default_users)
     
+    # Import the legacy questions file into the versioned question store
+    if not os.path.exists(QUESTION_HEADS_FILE) and os.path.exists(QUESTIONS_FILE):
+        save_questions(read_json_file(QUESTIONS_FILE, []))
+    
     # Default questions
-    if not os.path.exists(QUESTIONS_FILE):
+    if not os.path.exists(QUESTION_HEADS_FILE):
         default_questions = [
             {
                 "id": 1,
@@ -155,7 +183,7 @@ def initialize_data_files():
                 "difficulty": "Basic"
             }
         ]
-        write_json_file(QUESTIONS_FILE, default_questions)
+        save_questions(default_questions)
     
     # Empty scores file
     if not os.path.exists(SCORES_FILE):
@@ -176,24 +204,371 @@ def initialize_data_files():
             "last_updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         write_json_file(SETTINGS_FILE, default_settings)
+        _config_changed()
+
+# Courses
+# The default course keeps the original data files; every other course has
+# its own directory, data/courses/<course_id>/, holding its question heads and
+# exam forms. Question versions are shared by all courses (content-addressed),
+# and question IDs are unique across courses, so per-question data such as
+# exposure, item parameters and the response log need no course key.
+DEFAULT_COURSE = "forklift"
+DEFAULT_COURSES = {
+    DEFAULT_COURSE: {
+        "name": "Forklift Operator Safety",
+        "settings": {},
+        "certificate": {
+            "title": "Forklift Operator Certificate",
+            "training": "Forklift Operator Safety Training",
+            "statement": "This certificate validates that the recipient has demonstrated knowledge of forklift "
+                         "safety procedures and is qualified in accordance with OSHA standards for the operation "
+                         "of forklifts."
+        }
+    }
+}
+
+# Course-specific settings; everything else comes from the global settings
+COURSE_SETTING_KEYS = ("passing_score", "certificate_validity_days", "default_quiz_questions", "quiz_blueprint")
+
+def load_courses():
+    """
+    Load the course registry
+    
+    Returns:
+        dict: {course_id: {"name", "settings", "certificate"}}, always including the default course
+    """
+    courses = dict(DEFAULT_COURSES)
+    courses.update(read_json_file(COURSES_FILE, {}))
+    return courses
+
+# Generation of the course registry, settings and logo, advanced by every save
+# through this module, so caches derived from them (e.g. prepared certificate
+# pages) can be checked without touching the disk
+_config_lock = threading.Lock()
+_config_generation = {"value": 0}
+
+def config_generation():
+    """Current generation of the course registry, settings and logo"""
+    return _config_generation["value"]
+
+def _config_changed():
+    """Advance the configuration generation after a save"""
+    with _config_lock:
+        _config_generation["value"] += 1
+
+def save_courses(courses):
+    """Save the course registry"""
+    saved = write_json_file(COURSES_FILE, courses)
+    _config_changed()
+    return saved
+
+def get_course(course=None):
+    """
+    Get one course record
+    
+    Args:
+        course (str, optional): Course ID; the default course if None
+        
+    Returns:
+        dict: Course record with "id", "name", "settings" and "certificate"; certificate
+            texts not set for the course are derived from its name
+    """
+    course = course or DEFAULT_COURSE
+    record = load_courses().get(course, {})
+    name = record.get("name", course)
+    
+    certificate = dict(DEFAULT_COURSES[DEFAULT_COURSE]["certificate"])
+    if course != DEFAULT_COURSE:
+        certificate.update({
+            "title": f"{name} Certificate",
+            "training": f"{name} Training",
+            "statement": f"This certificate validates that the recipient has demonstrated knowledge of the "
+                         f"safety procedures covered by the {name} course."
+        })
+    certificate.update(record.get("certificate", {}))
+    
+    return {
+        "id": course,
+        "name": name,
+        "settings": record.get("settings", {}),
+        "certificate": certificate
+    }
+
+def get_course_settings(course=None):
+    """
+    Get the settings that apply to a course
+    
+    Args:
+        course (str, optional): Course ID; the default course if None
+        
+    Returns:
+        dict: Global settings overridden by the course's own settings
+    """
+    settings = load_settings()
+    settings.update(get_course(course)["settings"])
+    return settings
+
+def save_course_settings(course, settings):
+    """
+    Save the course-specific settings of a course
+    
+    The default course stores them in the global settings file, as before
+    courses existed; other courses keep them in the course registry.
+    
+    Args:
+        course (str): Course ID
+        settings (dict): Settings to store; keys outside COURSE_SETTING_KEYS are ignored
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    updates = {k: v for k, v in settings.items() if k in COURSE_SETTING_KEYS}
+    if (course or DEFAULT_COURSE) == DEFAULT_COURSE:
+        global_settings = load_settings()
+        global_settings.update(updates)
+        return save_settings(global_settings)
+    
+    courses = read_json_file(COURSES_FILE, {})
+    courses.setdefault(course, {"name": course}).setdefault("settings", {}).update(updates)
+    return save_courses(courses)
+
+def course_dir(course=None):
+    """Return the data directory of a course (the data directory itself for the default course)"""
+    course = course or DEFAULT_COURSE
+    return DATA_DIR if course == DEFAULT_COURSE else os.path.join(COURSES_DIR, course)
+
+def question_heads_file(course=None):
+    """Return the question heads file of a course"""
+    course = course or DEFAULT_COURSE
+    return QUESTION_HEADS_FILE if course == DEFAULT_COURSE else os.path.join(course_dir(course), "question_heads.json")
+
+def exam_forms_file(course=None):
+    """Return the exam forms file of a course"""
+    course = course or DEFAULT_COURSE
+    return EXAM_FORMS_FILE if course == DEFAULT_COURSE else os.path.join(course_dir(course), "exam_forms.json")
 
 # Load data with improved caching
 def load_users():
     """Load users from JSON file"""
     return read_json_file(USER_DB_FILE, {})
 
-def load_questions():
-    """Load questions from JSON file"""
-    return read_json_file(QUESTIONS_FILE, [])
+def load_questions(course=None):
+    """
+    Load the current version of every question of a course
+    
+    Args:
+        course (str, optional): Course ID; the default course if None
+    
+    Returns:
+        list: Question dicts in bank order, each with its "id" and content "version"
+    """
+    heads_file = question_heads_file(course)
+    if not os.path.exists(heads_file):
+        # Default course not imported into the question store yet
+        return read_json_file(QUESTIONS_FILE, []) if heads_file == QUESTION_HEADS_FILE else []
+    
+    questions = []
+    for question_id, version in read_json_file(heads_file, []):
+        content = load_question_version(version)
+        if content is not None:
+            questions.append(dict(content, id=question_id, version=version))
+    return questions
 
 def load_scores():
     """Load scores from JSON file"""
     return read_json_file(SCORES_FILE, [])
 
+# Versioned question store
+# Every question version is an immutable object named after the hash of its
+# content, data/question_store/objects/<ab>/<hash>.json. heads.json lists the
+# current version per question ID in bank order: [[question_id, version], ...].
+# Editing a question writes one new object and the small heads file; old
+# versions stay on disk, so attempts that recorded them keep their exact text.
+_QUESTION_META_FIELDS = ("id", "version")
+_version_lock = threading.Lock()
+_version_cache = {}  # {version: content}, safe to keep forever as versions never change
+
+def question_version(question):
+    """
+    Compute the content hash of a question
+    
+    Args:
+        question (dict): Question dict; its ID and version fields are ignored
+        
+    Returns:
+        str: Version hash
+    """
+    content = {k: v for k, v in question.items() if k not in _QUESTION_META_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:20]
+
+def _question_object_path(version):
+    """Return the object file path of a question version"""
+    return os.path.join(QUESTION_OBJECTS_DIR, version[:2], f"{version}.json")
+
+def _store_question_version(question):
+    """Write a question version unless an identical one is already stored; returns its hash"""
+    version = question_version(question)
+    path = _question_object_path(version)
+    if not os.path.exists(path):
+        content = {k: v for k, v in question.items() if k not in _QUESTION_META_FIELDS}
+        write_json_file(path, content, backup=False)
+    return version
+
+def load_question_version(version):
+    """
+    Load one stored question version
+    
+    Args:
+        version (str): Version hash
+        
+    Returns:
+        dict or None: Question content without ID, None if the version is unknown
+    """
+    with _version_lock:
+        content = _version_cache.get(version)
+    if content is None:
+        content = read_json_file(_question_object_path(version))
+        if content is not None:
+            with _version_lock:
+                _version_cache[version] = content
+    return content
+
+# Shared question bank cache (one parsed copy per course and process, reused by every session).
+# Banks are loaded on first use, so a course nobody takes costs nothing.
+_question_bank_lock = threading.Lock()
+_question_bank_cache = {}  # {course: {"mtime", "bank"}}
+
+def _freeze_question(question):
+    """Return a read-only view of a question dict with its options as a tuple"""
+    frozen = dict(question)
+    frozen["options"] = tuple(question.get("options", []))
+    return MappingProxyType(frozen)
+
+def get_question_bank(course=None):
+    """
+    Get the shared, read-only question bank of a course
+    
+    The bank is parsed once per change of the course's question heads and
+    shared by all sessions, so quiz sessions only need to keep question IDs.
+    
+    Args:
+        course (str, optional): Course ID; the default course if None
+    
+    Returns:
+        dict: {"course": course ID, "questions": tuple of read-only questions,
+               "index": {question_id: position in questions}}
+    """
+    course = course or DEFAULT_COURSE
+    try:
+        mtime = os.stat(question_heads_file(course)).st_mtime_ns
+    except OSError:
+        mtime = None
+    
+    with _question_bank_lock:
+        cached = _question_bank_cache.get(course)
+        if cached is None or cached["bank"] is None or cached["mtime"] != mtime:
+            questions = tuple(_freeze_question(q) for q in load_questions(course))
+            cached = _question_bank_cache[course] = {
+                "mtime": mtime,
+                "bank": MappingProxyType({
+                    "course": course,
+                    "questions": questions,
+                    "index": MappingProxyType({q["id"]: pos for pos, q in enumerate(questions)})
+                })
+            }
+        return cached["bank"]
+
+def loaded_courses():
+    """IDs of the courses whose question banks are currently loaded in this process"""
+    with _question_bank_lock:
+        return sorted(course for course, cached in _question_bank_cache.items() if cached["bank"] is not None)
+
+def _invalidate_question_bank(course=None):
+    """Drop the cached bank of a course after its questions changed"""
+    with _question_bank_lock:
+        _question_bank_cache.pop(course or DEFAULT_COURSE, None)
+
+def next_question_id():
+    """
+    Get the next free question ID
+    
+    Question IDs are unique across all courses, so only the small heads
+    files are read, not the questions themselves.
+    
+    Returns:
+        int: One more than the highest question ID of any course
+    """
+    highest = 0
+    for course in load_courses():
+        heads_file = question_heads_file(course)
+        if os.path.exists(heads_file):
+            highest = max([highest] + [head[0] for head in read_json_file(heads_file, [])])
+        elif course == DEFAULT_COURSE:
+            highest = max([highest] + [q["id"] for q in read_json_file(QUESTIONS_FILE, [])])
+    return highest + 1
+
+def get_questions_by_ids(question_ids, course=None):
+    """
+    Resolve question IDs against the shared question bank of a course
+    
+    Args:
+        question_ids (list): Question IDs in quiz order
+        course (str, optional): Course ID; the default course if None
+        
+    Returns:
+        list: Read-only questions in the same order; IDs no longer in the bank are skipped
+    """
+    bank = get_question_bank(course)
+    index = bank["index"]
+    return [bank["questions"][index[qid]] for qid in question_ids if qid in index]
+
+_frozen_versions = {}  # {(question_id, version): read-only question}
+
+def get_questions_by_versions(question_ids, versions):
+    """
+    Resolve the exact question versions an attempt was given
+    
+    Unlike get_questions_by_ids(), later edits or deletions in the bank do
+    not change the result.
+    
+    Args:
+        question_ids (list): Question IDs in quiz order
+        versions (list): Version hash per question
+        
+    Returns:
+        list: Read-only questions in the same order; unknown versions are skipped
+    """
+    questions = []
+    for question_id, version in zip(question_ids, versions):
+        key = (question_id, version)
+        frozen = _frozen_versions.get(key)
+        if frozen is None:
+            content = load_question_version(version)
+            if content is None:
+                continue
+            frozen = _freeze_question(dict(content, id=question_id, version=version))
+            with _version_lock:
+                _frozen_versions[key] = frozen
+        questions.append(frozen)
+    return questions
+
 def load_settings():
     """Load application settings from JSON file"""
     return read_json_file(SETTINGS_FILE, {})
 
+def load_item_exposure():
+    """Load how many times each question has been handed out, keyed by question ID"""
+    return read_json_file(EXPOSURE_FILE, {})
+
+def load_item_parameters():
+    """Load calibrated IRT item parameters"""
+    return read_json_file(ITEM_PARAMS_FILE, {})
+
+def load_exam_forms(course=None):
+    """Load the pre-generated exam forms of a course"""
+    return read_json_file(exam_forms_file(course), {})
+
 def load_user_settings(username):
     """Load user-specific settings"""
     user_settings_file = os.path.join(USER_SETTINGS_DIR, f"{username}.json")
@@ -204,9 +579,49 @@ def save_users(users):
     """Save users to JSON file"""
     return write_json_file(USER_DB_FILE, users)
 
-def save_questions(questions):
-    """Save questions to JSON file"""
-    return write_json_file(QUESTIONS_FILE, questions)
+def save_questions(questions, course=None):
+    """
+    Make a list of questions the current question bank of a course
+    
+    Only versions that are not stored yet are written, plus the heads file.
+    
+    Args:
+        questions (list): Question dicts in bank order
+        course (str, optional): Course ID; the default course if None
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    heads = [[q["id"], _store_question_version(q)] for q in questions]
+    result = write_json_file(question_heads_file(course), heads)
+    _invalidate_question_bank(course)
+    return result
+
+def save_question(question, course=None):
+    """
+    Store a new version of one question and point its ID at it
+    
+    Args:
+        question (dict): Question dict with its ID; appended if the ID is new
+        course (str, optional): Course ID; the default course if None
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    version = _store_question_version(question)
+    heads = read_json_file(question_heads_file(course), [])
+    for head in heads:
+        if head[0] == question["id"]:
+            if head[1] == version:
+                return True
+            head[1] = version
+            break
+    else:
+        heads.append([question["id"], version])
+    
+    result = write_json_file(question_heads_file(course), heads)
+    _invalidate_question_bank(course)
+    return result
 
 def save_scores(scores):
     """Save scores to JSON file"""
@@ -214,15 +629,381 @@ def save_scores(scores):
 
 def save_settings(settings):
     """Save application settings to JSON file"""
-    return write_json_file(SETTINGS_FILE, settings)
+    saved = write_json_file(SETTINGS_FILE, settings)
+    _config_changed()
+    return saved
+
+def save_logo(data):
+    """
+    Save the company logo
+    
+    Args:
+        data (bytes): Image file contents
+    """
+    os.makedirs(os.path.dirname(LOGO_PATH), exist_ok=True)
+    with open(LOGO_PATH, "wb") as f:
+        f.write(data)
+    _config_changed()
+
+def remove_logo():
+    """Remove the company logo"""
+    try:
+        os.remove(LOGO_PATH)
+    except FileNotFoundError:
+        pass
+    _config_changed()
+
+_exposure_lock = threading.Lock()
+
+def record_item_exposure(question_ids):
+    """
+    Count one more exposure for each question handed out in a quiz
+    
+    Args:
+        question_ids (list): IDs of the questions in the quiz
+    """
+    # Every session records exposures when a quiz starts, so serialize the read-modify-write
+    with _exposure_lock:
+        exposure = load_item_exposure()
+        for qid in question_ids:
+            exposure[str(qid)] = exposure.get(str(qid), 0) + 1
+        
+        # Exposure counts are derived data, so skip the backup copy
+        return write_json_file(EXPOSURE_FILE, exposure, backup=False)
+
+def save_item_parameters(parameters):
+    """Save calibrated IRT item parameters"""
+    return write_json_file(ITEM_PARAMS_FILE, parameters)
+
+def save_exam_forms(forms, course=None):
+    """Save pre-generated exam forms of a course"""
+    return write_json_file(exam_forms_file(course), forms)
 
 def save_user_settings(username, settings):
     """Save user-specific settings"""
     user_settings_file = os.path.join(USER_SETTINGS_DIR, f"{username}.json")
     return write_json_file(user_settings_file, settings)
 
+# Per-question response log
+# One JSON line per attempt, in column form:
+# {"attempt_id", "username", "timestamp", "question_ids", "selected", "correct", "latency_ms", "versions"}
+def append_response_log(attempt_id, username, timestamp, responses):
+    """
+    Append the per-question responses of one attempt to the response log
+    
+    Args:
+        attempt_id (str): ID of the quiz attempt (matches the score row ID)
+        username (str): Username of the user
+        timestamp (str): Time the attempt was saved
+        responses (list): (question_id, selected_option, correct, latency_ms[, version]) per answered question
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    record = {
+        "attempt_id": attempt_id,
+        "username": username,
+        "timestamp": timestamp,
+        "question_ids": [r[0] for r in responses],
+        "selected": [r[1] for r in responses],
+        "correct": [1 if r[2] else 0 for r in responses],
+        "latency_ms": [int(r[3]) for r in responses],
+        "versions": [r[4] if len(r) > 4 else None for r in responses]
+    }
+    try:
+        os.makedirs(os.path.dirname(RESPONSES_FILE), exist_ok=True)
+        with open(RESPONSES_FILE, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        return True
+    except Exception as e:
+        print(f"Error writing to {RESPONSES_FILE}: {e}")
+        return False
+
+def read_response_log(offset=0):
+    """
+    Read attempt records from the response log
+    
+    Only complete lines are read, so a record being appended concurrently
+    is picked up on the next call.
+    
+    Args:
+        offset (int): Byte offset to start reading from
+        
+    Returns:
+        tuple: (list of attempt records, byte offset after the last complete line)
+    """
+    if not os.path.exists(RESPONSES_FILE):
+        return [], 0
+    
+    with open(RESPONSES_FILE, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records, offset + end
+
+def rewrite_response_log(keep):
+    """
+    Rewrite the response log keeping only the records that match a filter
+    
+    Args:
+        keep (callable): Returns True for attempt records to keep
+    """
+    records, _ = read_response_log()
+    temp_file = f"{RESPONSES_FILE}.tmp"
+    with open(temp_file, "w") as f:
+        for record in records:
+            if keep(record):
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    os.replace(temp_file, RESPONSES_FILE)
+    
+    # Aggregates were built from the old contents
+    with _performance_lock:
+        _performance_cache.update(offset=0, size=0, counters={})
+        _response_log_generation["value"] += 1
+
+def response_log_generation():
+    """
+    Get the number of response log rewrites in this process
+
+    Readers that keep an offset into the log start over when it changes.
+
+    Returns:
+        int: Rewrite generation
+    """
+    return _response_log_generation["value"]
+
+# Aggregated per-question counters, updated incrementally from new log lines
+_performance_lock = threading.Lock()
+_performance_cache = {"offset": 0, "size": 0, "counters": {}}
+_response_log_generation = {"value": 0}
+
+def get_question_performance():
+    """
+    Get aggregated outcomes per question from the response log
+    
+    Only lines appended since the previous call are parsed; the counters
+    are rebuilt if the log was truncated or rewritten.
+    
+    Returns:
+        dict: {question_id: {"attempts", "correct", "latency_ms", "options": {option: count}}}
+    """
+    with _performance_lock:
+        try:
+            size = os.path.getsize(RESPONSES_FILE)
+        except OSError:
+            size = 0
+        if size < _performance_cache["size"]:
+            _performance_cache.update(offset=0, size=0, counters={})
+        
+        records, offset = read_response_log(_performance_cache["offset"])
+        counters = _performance_cache["counters"]
+        for record in records:
+            for qid, selected, correct, latency in zip(
+                record["question_ids"], record["selected"], record["correct"], record["latency_ms"]
+            ):
+                counter = counters.setdefault(qid, {"attempts": 0, "correct": 0, "latency_ms": 0, "options": {}})
+                counter["attempts"] += 1
+                counter["correct"] += correct
+                counter["latency_ms"] += latency
+                counter["options"][selected] = counter["options"].get(selected, 0) + 1
+        
+        _performance_cache["offset"] = offset
+        _performance_cache["size"] = size
+        return {qid: dict(counter, options=dict(counter["options"])) for qid, counter in counters.items()}
+
+# Practice results
+# Kept apart from scores.json in one small JSON-lines file per user,
+# data/practice/<username>.jsonl, so practice retakes never rewrite the
+# certification scores and never show up in certification statistics.
+PRACTICE_RETENTION = 50  # Results kept per user
+
+def _practice_file(username):
+    """Return the practice results file of a user"""
+    return os.path.join(PRACTICE_DIR, f"{username}.jsonl")
+
+def save_practice_result(username, result):
+    """
+    Append a practice quiz result to the user's practice history
+    
+    Saving appends one line; the file is trimmed back to the newest
+    PRACTICE_RETENTION results only once it holds twice as many, so the
+    cost per save stays constant.
+    
+    Args:
+        username (str): Username of the user
+        result (dict): Result to store (score, percentage, course, ...)
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    path = _practice_file(username)
+    record = dict(result, timestamp=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    try:
+        os.makedirs(PRACTICE_DIR, exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        
+        with open(path) as f:
+            lines = f.readlines()
+        if len(lines) > 2 * PRACTICE_RETENTION:
+            temp_file = f"{path}.tmp"
+            with open(temp_file, "w") as f:
+                f.writelines(lines[-PRACTICE_RETENTION:])
+            os.replace(temp_file, path)
+        return True
+    except Exception as e:
+        print(f"Error writing to {path}: {e}")
+        return False
+
+def load_practice_results(username, limit=PRACTICE_RETENTION, course=None):
+    """
+    Load a user's practice history
+    
+    Args:
+        username (str): Username of the user
+        limit (int): Maximum number of results returned
+        course (str, optional): Only results of this course; all courses if None
+        
+    Returns:
+        list: Practice results, newest first
+    """
+    path = _practice_file(username)
+    if not os.path.exists(path):
+        return []
+    
+    results = []
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    if course is not None:
+        results = [r for r in results if r.get("course", DEFAULT_COURSE) == course]
+    return results[::-1][:limit]
+
+def clear_practice_results(username=None):
+    """Delete the practice history of one user, or of all users if username is None"""
+    if username:
+        paths = [_practice_file(username)]
+    elif os.path.isdir(PRACTICE_DIR):
+        paths = [os.path.join(PRACTICE_DIR, name) for name in os.listdir(PRACTICE_DIR) if name.endswith(".jsonl")]
+    else:
+        paths = []
+    
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+# Spaced-repetition review queues, two files per user (see review_queue.py):
+# data/review/<username>.json, a snapshot {course: {"items": {question_id: item}}}, and
+# data/review/<username>.jsonl, the item changes since the snapshot, one
+# {"course", "question_id", "item"} per line ("item" is null for a removed item)
+def review_snapshot_file(username):
+    """Return the review queue snapshot file of a user"""
+    return os.path.join(REVIEW_DIR, f"{username}.json")
+
+def review_log_file(username):
+    """Return the review queue change log of a user"""
+    return os.path.join(REVIEW_DIR, f"{username}.jsonl")
+
+def load_review_queues(username):
+    """
+    Load a user's review queues, keyed by course
+    
+    Returns:
+        tuple: ({course: {"items": {question_id: item}}}, number of change log lines replayed)
+    """
+    queues = read_json_file(review_snapshot_file(username), {})
+    for queue in queues.values():
+        queue.pop("heap", None)  # Stored by earlier versions; rebuilt from the items
+    
+    lines = 0
+    try:
+        with open(review_log_file(username), "r") as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partly written last line
+                items = queues.setdefault(change["course"], {"items": {}})["items"]
+                if change["item"] is None:
+                    items.pop(str(change["question_id"]), None)
+                else:
+                    items[str(change["question_id"])] = change["item"]
+                lines += 1
+    except FileNotFoundError:
+        pass
+    return queues, lines
+
+def append_review_changes(username, changes):
+    """
+    Append item changes to a user's review queue change log
+    
+    Args:
+        username (str): Username of the user
+        changes (list): (course, question_id, item or None) per changed item
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        os.makedirs(REVIEW_DIR, exist_ok=True)
+        with open(review_log_file(username), "a") as f:
+            f.write("".join(
+                json.dumps({"course": course, "question_id": question_id, "item": item}, separators=(",", ":")) + "\n"
+                for course, question_id, item in changes
+            ))
+        return True
+    except Exception as e:
+        print(f"Error writing to {review_log_file(username)}: {e}")
+        return False
+
+def save_review_queues(username, queues):
+    """Save a snapshot of a user's review queues and empty their change log"""
+    # Updated often, so skip the backup copy
+    snapshot = {course: {"items": queue["items"]} for course, queue in queues.items()}
+    saved = write_json_file(review_snapshot_file(username), snapshot, backup=False)
+    if saved:
+        open(review_log_file(username), "w").close()
+    return saved
+
+def clear_review_queues(username=None):
+    """Delete the review queues of one user, or of all users if username is None"""
+    if username:
+        paths = [review_snapshot_file(username), review_log_file(username)]
+    elif os.path.isdir(REVIEW_DIR):
+        paths = [
+            os.path.join(REVIEW_DIR, name) for name in os.listdir(REVIEW_DIR)
+            if name.endswith(".json") or name.endswith(".jsonl")
+        ]
+    else:
+        paths = []
+    
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def new_attempt_id(username):
+    """Generate a unique ID for a quiz attempt"""
+    return hashlib.md5(f"{username}_{datetime.datetime.now().isoformat()}".encode()).hexdigest()[:10]
+
 # Enhanced score functions
-def save_quiz_score(username, score, max_score, categories=None, time_taken=None):
+_scores_lock = threading.Lock()
+
+def save_quiz_score(username, score, max_score, categories=None, time_taken=None, percentage=None, details=None,
+                    attempt_id=None, responses=None, course=None):
     """
     Save quiz score with enhanced details
     
@@ -232,24 +1013,33 @@ def save_quiz_score(username, score, max_score, categories=None, time_taken=None
         max_score (int): Total number of questions
         categories (dict, optional): Category-wise performance
         time_taken (float, optional): Time taken to complete the quiz in seconds
+        percentage (float, optional): Reported score, e.g. the ability-based score of an
+            adaptive quiz; defaults to score / max_score
+        details (dict, optional): Extra fields to store with the attempt (e.g. quiz mode)
+        attempt_id (str, optional): ID of the quiz attempt; generated if not provided
+        responses (list, optional): (question_id, selected_option, correct, latency_ms[, version])
+            per answered question, appended to the response log together with the score
+        course (str, optional): Course the quiz belongs to; the default course if None
     """
-    scores = load_scores()
-    
     # Calculate percentage
-    percentage = (score / max_score) * 100 if max_score > 0 else 0
+    if percentage is None:
+        percentage = (score / max_score) * 100 if max_score > 0 else 0
+    
+    course = course or DEFAULT_COURSE
     
     # Generate a unique ID for the quiz attempt
-    quiz_id = hashlib.md5(f"{username}_{datetime.datetime.now().isoformat()}".encode()).hexdigest()[:10]
+    quiz_id = attempt_id or new_attempt_id(username)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Create score data with enhanced details
     score_data = {
         "id": quiz_id,
         "username": username,
+        "course": course,
         "score": score,
         "max_score": max_score,
         "percentage": percentage,
-        "passed": percentage >= load_settings().get("passing_score", 80),
-        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": timestamp,
         "time_taken": time_taken  # Time in seconds if timed quiz
     }
     
@@ -257,22 +1047,67 @@ def save_quiz_score(username, score, max_score, categories=None, time_taken=None
     if categories:
         score_data["categories"] = categories
     
-    scores.append(score_data)
-    return write_json_file(SCORES_FILE, scores)
+    if details:
+        score_data.update(details)
+    
+    # Sessions and the deadline scheduler save concurrently, so serialize the read-modify-write
+    with _scores_lock:
+        # Graded under the lock, so a re-evaluation either sees this score or
+        # ran before it with the passing score read here
+        score_data["passed"] = percentage >= get_course_settings(course).get("passing_score", 80)
+        score_data["pass_version"] = load_pass_evaluation()["version"]
+        scores = load_scores()
+        scores.append(score_data)
+        
+        # Per-question outcomes go to the compact side log, written in the same call
+        if responses:
+            append_response_log(quiz_id, username, timestamp, responses)
+        
+        saved = write_json_file(SCORES_FILE, scores)
+        
+        # A passing score becomes the user's current certification for the course
+        # (until the log exists it is built from the score history on first use)
+        if saved and score_data["passed"] and os.path.exists(CERTIFICATIONS_FILE):
+            append_certification(certification_record(
+                score_data, load_users().get(username, {}).get("name", username),
+                get_course_settings(course).get("certificate_validity_days", 365)
+            ))
+        return saved
+
+def score_course(score):
+    """Course of a saved score (scores saved before courses existed belong to the default course)"""
+    return score.get("course", DEFAULT_COURSE)
+
+def score_passed(score):
+    """
+    Whether a saved score passed
+    
+    The flag stored with the score is the one answer every page uses; it is
+    set when the score is saved and again by the pass/fail re-evaluation
+    after a passing score changes. Scores saved before the flag existed are
+    judged against their course's current passing score.
+    """
+    if "passed" in score:
+        return score["passed"]
+    return score.get("percentage", 0) >= get_course_settings(score_course(score)).get("passing_score", 80)
 
-def get_user_scores(username, limit=None):
+def get_user_scores(username, limit=None, course=None):
     """
     Get scores for a specific user
     
     Args:
         username (str): Username to get scores for
         limit (int, optional): Limit the number of scores returned
+        course (str, optional): Only scores of this course; all courses if None
         
     Returns:
         list: List of score objects for the user, sorted by timestamp
     """
     scores = load_scores()
-    user_scores = [s for s in scores if s["username"] == username]
+    user_scores = [
+        s for s in scores
+        if s["username"] == username and (course is None or score_course(s) == course)
+    ]
     
     # Sort by timestamp (newest first)
     user_scores.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
@@ -283,21 +1118,24 @@ def get_user_scores(username, limit=None):
         
     return user_scores
 
-def get_score_statistics(username=None):
+def get_score_statistics(username=None, course=None):
     """
     Get statistics on quiz scores
     
     Args:
         username (str, optional): If provided, get stats for this user only
+        course (str, optional): If provided, get stats for this course only
         
     Returns:
         dict: Dictionary with score statistics
     """
     scores = load_scores()
     
-    # Filter by username if provided
+    # Filter by username and course if provided
     if username:
         scores = [s for s in scores if s["username"] == username]
+    if course:
+        scores = [s for s in scores if score_course(s) == course]
     
     if not scores:
         return {
@@ -312,8 +1150,7 @@ def get_score_statistics(username=None):
     # Calculate statistics
     total_attempts = len(scores)
     avg_score = sum(s.get("percentage", 0) for s in scores) / total_attempts if total_attempts > 0 else 0
-    passing_score = load_settings().get("passing_score", 80)
-    passed_count = sum(1 for s in scores if s.get("percentage", 0) >= passing_score)
+    passed_count = sum(1 for s in scores if score_passed(s))
     pass_rate = (passed_count / total_attempts) * 100 if total_attempts > 0 else 0
     highest_score = max(s.get("percentage", 0) for s in scores) if scores else 0
     lowest_score = min(s.get("percentage", 0) for s in scores) if scores else 0
@@ -341,14 +1178,19 @@ def get_score_statistics(username=None):
         "recent_trend": recent_trend
     }
 
-def get_category_statistics():
+def get_category_statistics(course=None):
     """
     Get statistics on performance by category
     
+    Args:
+        course (str, optional): If provided, only scores of this course are counted
+    
     Returns:
         dict: Dictionary with category statistics
     """
     scores = load_scores()
+    if course:
+        scores = [s for s in scores if score_course(s) == course]
     categories = {}
     
     for score in scores:
@@ -378,7 +1220,7 @@ def generate_certificate_id(username, score, date):
     Args:
         username (str): Username
         score (float): Score percentage
-        date (str): Date of completion
+        date (str): Date of completion, or another value unique to the attempt such as its ID
         
     Returns:
         str: Unique certificate ID
@@ -388,7 +1230,10 @@ def generate_certificate_id(username, score, date):
 
 def verify_certificate(cert_id):
     """
-    Verify if a certificate ID is valid
+    Verify a certificate ID by looking it up in the score history
+    
+    Used for IDs issued before signed certificate codes; signed codes are
+    verified without the score history by certificate_codes.verify_certificate_code().
     
     Args:
         cert_id (str): Certificate ID to verify
@@ -410,13 +1255,343 @@ def verify_certificate(cert_id):
     
     return None
 
+# Revoked certificate IDs, kept in memory as a set and reloaded when the file changes
+_revocation_lock = threading.Lock()
+_revocation_cache = {"mtime": None, "ids": frozenset()}
+
+def load_revoked_certificates():
+    """
+    Load revoked certificates
+    
+    Returns:
+        dict: {cert_id: {"revoked_at", "revoked_by", "reason"}}
+    """
+    return read_json_file(REVOKED_CERTIFICATES_FILE, {})
+
+def revoked_certificate_ids():
+    """
+    Get the IDs of all revoked certificates
+    
+    The set is reloaded only when the revocation file changed, so checking
+    a certificate costs one stat and a set lookup.
+    
+    Returns:
+        frozenset: Revoked certificate IDs
+    """
+    try:
+        mtime = os.stat(REVOKED_CERTIFICATES_FILE).st_mtime_ns
+    except OSError:
+        mtime = None
+    with _revocation_lock:
+        if _revocation_cache["mtime"] != mtime:
+            ids = frozenset(load_revoked_certificates()) if mtime is not None else frozenset()
+            _revocation_cache.update(mtime=mtime, ids=ids)
+        return _revocation_cache["ids"]
+
+def revoke_certificate(cert_id, revoked_by, reason=""):
+    """
+    Revoke a certificate
+    
+    Args:
+        cert_id (str): Certificate ID as printed on the certificate
+        revoked_by (str): Username of the admin revoking it
+        reason (str): Reason for the revocation
+    
+    Returns:
+        bool: True if successful
+    """
+    with _revocation_lock:
+        revoked = load_revoked_certificates()
+        revoked[cert_id] = {
+            "revoked_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "revoked_by": revoked_by,
+            "reason": reason
+        }
+        return write_json_file(REVOKED_CERTIFICATES_FILE, revoked)
+
+def reinstate_certificate(cert_id):
+    """
+    Withdraw the revocation of a certificate
+    
+    Args:
+        cert_id (str): Certificate ID
+    
+    Returns:
+        bool: True if the certificate was revoked and is now reinstated
+    """
+    with _revocation_lock:
+        revoked = load_revoked_certificates()
+        if revoked.pop(cert_id, None) is None:
+            return False
+        return write_json_file(REVOKED_CERTIFICATES_FILE, revoked)
+
+def update_revoked_certificates(revoke_ids, reinstate_ids, revoked_by, reason=""):
+    """
+    Revoke and reinstate many certificates in one write
+    
+    Certificates that are already revoked keep their existing entry, and only
+    revocations made by revoked_by are withdrawn, so bulk jobs never undo an
+    admin's own revocations.
+    
+    Args:
+        revoke_ids (iterable): Certificate IDs to revoke
+        reinstate_ids (iterable): Certificate IDs to reinstate
+        revoked_by (str): Who revokes them, e.g. the name of the job
+        reason (str): Reason for the revocations
+    
+    Returns:
+        tuple: (number revoked, number reinstated)
+    """
+    with _revocation_lock:
+        revoked = load_revoked_certificates()
+        revoked_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        added = 0
+        for cert_id in revoke_ids:
+            if cert_id not in revoked:
+                revoked[cert_id] = {"revoked_at": revoked_at, "revoked_by": revoked_by, "reason": reason}
+                added += 1
+        removed = 0
+        for cert_id in reinstate_ids:
+            if revoked.get(cert_id, {}).get("revoked_by") == revoked_by:
+                del revoked[cert_id]
+                removed += 1
+        if added or removed:
+            write_json_file(REVOKED_CERTIFICATES_FILE, revoked)
+        return added, removed
+
+# Certification log: one line per change of a user's certification for a course,
+# {"username", "course", "cert_id", "name", "score", "issued", "expires", "attempt_id"};
+# the latest line per user and course is their current certification. The
+# certifications module keeps the state and an expiry index in memory.
+def certification_record(score, name, validity_days):
+    """
+    Build the certification record of a passing score
+    
+    Args:
+        score (dict): Saved score row
+        name (str): Holder's name; the name stored with the score takes precedence
+        validity_days (int): Days the certificate is valid
+    
+    Returns:
+        dict: Certification log record
+    """
+    issued = datetime.datetime.strptime(score["timestamp"], "%Y-%m-%d %H:%M:%S")
+    return {
+        "username": score["username"],
+        "course": score_course(score),
+        "cert_id": score.get("certificate_id") or score["id"],
+        "name": score.get("certificate_name") or name,
+        "score": score["percentage"],
+        "issued": score["timestamp"],
+        "expires": (issued + datetime.timedelta(days=validity_days)).strftime("%Y-%m-%d %H:%M:%S"),
+        "attempt_id": score["id"]
+    }
+
+def append_certification(record):
+    """
+    Append a certification record to the certification log
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        os.makedirs(os.path.dirname(CERTIFICATIONS_FILE), exist_ok=True)
+        with open(CERTIFICATIONS_FILE, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        return True
+    except Exception as e:
+        print(f"Error writing to {CERTIFICATIONS_FILE}: {e}")
+        return False
+
+def read_certification_log(offset=0):
+    """
+    Read records from the certification log
+    
+    Only complete lines are read, so a record being appended concurrently
+    is picked up on the next call.
+    
+    Args:
+        offset (int): Byte offset to start reading from
+        
+    Returns:
+        tuple: (list of certification records, byte offset after the last complete line)
+    """
+    if not os.path.exists(CERTIFICATIONS_FILE):
+        return [], 0
+    
+    with open(CERTIFICATIONS_FILE, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    
+    end = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:end].splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records, offset + end
+
+def _write_certification_log(records):
+    """Replace the certification log with the given records (atomically)"""
+    os.makedirs(os.path.dirname(CERTIFICATIONS_FILE), exist_ok=True)
+    temp_file = f"{CERTIFICATIONS_FILE}.tmp"
+    with open(temp_file, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    os.replace(temp_file, CERTIFICATIONS_FILE)
+
+def _latest_certifications(records):
+    """Latest record per user and course, in log order"""
+    latest = {}
+    for record in records:
+        key = (record["username"], record["course"])
+        latest.pop(key, None)
+        latest[key] = record
+    return list(latest.values())
+
+def _certifications_from_scores(scores, users):
+    """Certification records of the most recent passing score per user and course, oldest first"""
+    course_settings = {}
+    latest = {}
+    for score in scores:
+        if not score_passed(score):
+            continue
+        key = (score["username"], score_course(score))
+        if key not in latest or score["timestamp"] > latest[key]["timestamp"]:
+            latest[key] = score
+    records = []
+    for (username, course), score in latest.items():
+        if course not in course_settings:
+            course_settings[course] = get_course_settings(course)
+        records.append(certification_record(
+            score, users.get(username, {}).get("name", username),
+            course_settings[course].get("certificate_validity_days", 365)
+        ))
+    records.sort(key=lambda record: record["issued"])
+    return records
+
+def rebuild_certification_log():
+    """
+    Rebuild the certification log from the score history
+    
+    Each user's most recent passing score per course becomes their
+    certification. Used when the log does not exist yet.
+    """
+    users = load_users()
+    with _scores_lock:
+        _write_certification_log(_certifications_from_scores(load_scores(), users))
+
+def compact_certification_log():
+    """Drop superseded records from the certification log"""
+    with _scores_lock:
+        records, _ = read_certification_log()
+        _write_certification_log(_latest_certifications(records))
+
+# Pass/fail re-evaluation state, advanced by the pass_evaluation module:
+# {
+#     "version": re-evaluations requested so far, "target": passing scores of the latest request,
+#     "evaluated": latest version applied to all scores, "thresholds": passing scores it applied,
+#     "changed", "revoked", "reinstated", "issued": counts of that run, "completed_at"
+# }
+def load_pass_evaluation():
+    """
+    Load the pass/fail re-evaluation state
+    
+    Returns:
+        dict: Re-evaluation state (version 0 before the first request)
+    """
+    state = {"version": 0, "target": None, "evaluated": 0, "thresholds": None, "completed_at": None}
+    state.update(read_json_file(PASS_EVALUATION_FILE, {}))
+    return state
+
+def save_pass_evaluation(state):
+    """Save the pass/fail re-evaluation state"""
+    return write_json_file(PASS_EVALUATION_FILE, state, backup=False)
+
+def reevaluate_scores(thresholds, version, issue_code):
+    """
+    Judge every saved score against the given passing scores
+    
+    The comparison runs over all scores at once as arrays. Each score's
+    "passed" flag and "pass_version" are updated and the certification log
+    is rebuilt from the new flags while the scores are locked, so scores and
+    certifications always agree.
+    
+    Args:
+        thresholds (dict): {course: passing score}; other courses (e.g. removed ones)
+            use their current course settings
+        version (int): Re-evaluation version stored with each score
+        issue_code (callable): issue_code(score, name, validity_days) returning the
+            certificate ID of a score that passes now but did not before
+    
+    Returns:
+        dict: {"evaluated", "changed", "issued", "passing", "failing"}; "passing" and
+            "failing" are the certificate IDs of scores that now pass or that held a
+            certificate and now fail
+    """
+    users = load_users()
+    with _scores_lock:
+        scores = load_scores()
+        result = {"evaluated": len(scores), "changed": 0, "issued": 0, "passing": [], "failing": []}
+        if not scores:
+            _write_certification_log([])
+            return result
+        
+        # One threshold per score through the course index, then a single comparison
+        courses, course_index = np.unique([score_course(s) for s in scores], return_inverse=True)
+        limits = np.array([
+            thresholds[course] if course in thresholds else get_course_settings(course).get("passing_score", 80)
+            for course in courses
+        ], dtype=float)
+        percentages = np.fromiter((s.get("percentage", 0) for s in scores), dtype=float, count=len(scores))
+        passed = percentages >= limits[course_index]
+        before = np.fromiter((s.get("passed", False) for s in scores), dtype=bool, count=len(scores))
+        flipped = passed != before
+        result["changed"] = int(flipped.sum())
+        
+        course_settings = {}
+        for i in np.flatnonzero(flipped & passed):
+            score = scores[i]
+            if "certificate_id" in score:
+                continue
+            course = score_course(score)
+            if course not in course_settings:
+                course_settings[course] = get_course_settings(course)
+            name = users.get(score["username"], {}).get("name", score["username"])
+            score["certificate_name"] = name
+            score["certificate_id"] = issue_code(
+                score, name, course_settings[course].get("certificate_validity_days", 365)
+            )
+            result["issued"] += 1
+        
+        for score, is_passed, was_passed in zip(scores, passed.tolist(), before.tolist()):
+            score["passed"] = is_passed
+            score["pass_version"] = version
+            if is_passed:
+                result["passing"].append(score.get("certificate_id") or score["id"])
+            elif was_passed or "certificate_id" in score:
+                # Keep the ID the certificate was known by, so it is reinstated rather
+                # than issued anew if the score passes again
+                score.setdefault("certificate_id", score["id"])
+                result["failing"].append(score["certificate_id"])
+        
+        write_json_file(SCORES_FILE, scores)
+        _write_certification_log(_certifications_from_scores(scores, users))
+        return result
 
 def clear_all_scores():
     """
     Clear all quiz scores from the system
     """
     # Create an empty list and save it to the scores file
-    save_scores([])
+    with _scores_lock:
+        save_scores([])
+        if os.path.exists(RESPONSES_FILE):
+            rewrite_response_log(lambda record: False)
+        _write_certification_log([])
+    clear_practice_results()
+    clear_review_queues()
     return True
 
 def clear_user_scores(username):
@@ -429,11 +1604,21 @@ def clear_user_scores(username):
     Returns:
         bool: True if successful, False otherwise
     """
-    # Load current scores
-    scores = load_scores()
-    
-    # Filter out scores for the specified user
-    filtered_scores = [s for s in scores if s["username"] != username]
-    
-    # Save the filtered scores
-    return save_scores(filtered_scores)
+    with _scores_lock:
+        # Load current scores
+        scores = load_scores()
+        
+        # Filter out scores for the specified user
+        filtered_scores = [s for s in scores if s["username"] != username]
+        
+        # Drop the user's per-question responses, practice history and review queue as well
+        if os.path.exists(RESPONSES_FILE):
+            rewrite_response_log(lambda record: record.get("username") != username)
+        if os.path.exists(CERTIFICATIONS_FILE):
+            records, _ = read_certification_log()
+            _write_certification_log([record for record in records if record["username"] != username])
+        clear_practice_results(username)
+        clear_review_queues(username)
+        
+        # Save the filtered scores
+        return save_scores(filtered_scores)
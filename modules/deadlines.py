@@ -0,0 +1,158 @@
+import time
+import heapq
+import threading
+from .attempts import finalize_attempt, restore_attempt
+from .checkpoints import close_journal, list_journals
+
+# Process-wide registry of open timed attempts, shared by all sessions
+_open_attempts = {}  # {attempt_id: attempt}
+_deadline_heap = []  # (deadline, attempt_id), earliest first
+_condition = threading.Condition()
+_scheduler = None
+_recovered = False
+
+# How long a session waits for the scheduler to finish saving an expired attempt
+SUBMIT_WAIT = 10
+
+def _ensure_scheduler():
+    """Start the background scheduler thread on first use (call with _condition held)"""
+    global _scheduler
+    if _scheduler is None or not _scheduler.is_alive():
+        _scheduler = threading.Thread(target=_run_scheduler, name="quiz-deadline-scheduler", daemon=True)
+        _scheduler.start()
+
+def _claim(attempt):
+    """Take ownership of submitting an open attempt (call with _condition held)"""
+    if attempt["status"] != "open":
+        return False
+    attempt["status"] = "submitting"
+    _open_attempts.pop(attempt["attempt_id"], None)
+    return True
+
+def _finish(attempt):
+    """Finalize a claimed attempt and publish its result"""
+    try:
+        result = finalize_attempt(attempt)
+    except Exception as e:
+        print(f"Error submitting attempt {attempt['attempt_id']}: {e}")
+        result = None
+    with _condition:
+        attempt["result"] = result
+        attempt["status"] = "submitted"
+        _condition.notify_all()
+    return result
+
+def _run_scheduler():
+    """
+    Submit attempts as their deadlines pass
+
+    A single thread sleeps until the earliest deadline in the heap, so the
+    cost does not depend on the number of open attempts or sessions.
+    """
+    while True:
+        with _condition:
+            now = time.time()
+            while not _deadline_heap or _deadline_heap[0][0] > now:
+                _condition.wait(_deadline_heap[0][0] - now if _deadline_heap else None)
+                now = time.time()
+            _, attempt_id = heapq.heappop(_deadline_heap)
+            attempt = _open_attempts.get(attempt_id)
+            if attempt is None or not _claim(attempt):
+                # Submitted or discarded by its session in the meantime
+                continue
+        _finish(attempt)
+
+def register_deadline(attempt):
+    """
+    Register a timed attempt so it is submitted at its deadline
+
+    The attempt is submitted by the background scheduler even if its
+    session never reruns again (closed or abandoned tab).
+
+    Args:
+        attempt (dict): Attempt record from attempts.new_attempt() with a deadline
+    """
+    if attempt["deadline"] is None:
+        return
+
+    with _condition:
+        if attempt["attempt_id"] in _open_attempts:
+            return
+        _open_attempts[attempt["attempt_id"]] = attempt
+        heapq.heappush(_deadline_heap, (attempt["deadline"], attempt["attempt_id"]))
+        _ensure_scheduler()
+        # Wake the scheduler if this is now the earliest deadline
+        if _deadline_heap[0][1] == attempt["attempt_id"]:
+            _condition.notify_all()
+
+def submit_attempt(attempt):
+    """
+    Finalize an attempt from its session
+
+    Each attempt is saved exactly once: if the scheduler already submitted
+    it (or is doing so right now), its result is returned instead.
+
+    Args:
+        attempt (dict): Attempt record
+
+    Returns:
+        dict or None: Result from attempts.finalize_attempt(), None if saving failed
+    """
+    with _condition:
+        if not _claim(attempt):
+            _condition.wait_for(lambda: attempt["status"] == "submitted", SUBMIT_WAIT)
+            return attempt["result"]
+    return _finish(attempt)
+
+def discard_attempt(attempt):
+    """
+    Drop an open attempt and its journal without saving it
+
+    Args:
+        attempt (dict): Attempt record
+    """
+    with _condition:
+        if attempt["status"] != "open":
+            return
+        attempt["status"] = "discarded"
+        _open_attempts.pop(attempt["attempt_id"], None)
+    close_journal(attempt)
+
+def get_open_attempt(attempt_id):
+    """
+    Get the registered record of an open timed attempt
+
+    Sessions resuming an attempt must share this record with the
+    scheduler, so answers given after resuming are the ones it submits.
+
+    Args:
+        attempt_id (str): ID of the attempt
+
+    Returns:
+        dict or None: Attempt record, None if it is not registered
+    """
+    with _condition:
+        return _open_attempts.get(attempt_id)
+
+def recover_open_attempts():
+    """
+    Register the deadlines of timed attempts journaled by a previous server process
+
+    Runs once per process. Attempts whose deadline passed while the server
+    was down are submitted right away by the scheduler.
+    """
+    global _recovered
+    with _condition:
+        if _recovered:
+            return
+        _recovered = True
+
+    for path in list_journals():
+        restored = restore_attempt(path)
+        if restored is not None:
+            register_deadline(restored[0])
+
+def count_open_attempts():
+    """Number of timed attempts waiting for their deadline"""
+    with _condition:
+        return len(_open_attempts)
@@ -0,0 +1,124 @@
+import sys
+import time
+import pickle
+import threading
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Process-wide registry of per-session metrics, keyed by Streamlit session ID
+_session_metrics = {}
+_metrics_lock = threading.Lock()
+
+# Sessions not seen for this long are dropped from the registry
+SESSION_METRICS_TTL = 30 * 60
+
+# Session state is measured on a session's first full run and then at most this often (seconds)
+STATE_SIZE_INTERVAL = 60
+
+def estimate_size(value):
+    """
+    Estimate the memory footprint of a value in bytes
+
+    Args:
+        value: Any object stored in session state
+
+    Returns:
+        int: Pickled size of the value, or its shallow size if it cannot be pickled
+    """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+def get_session_id():
+    """Return the ID of the current Streamlit session, or None outside a script run"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def session_state_size():
+    """
+    Measure the size of every key in the current session state
+
+    Returns:
+        dict: {key: size in bytes}
+    """
+    return {key: estimate_size(st.session_state[key]) for key in list(st.session_state.keys())}
+
+def record_session_metrics(**metrics):
+    """
+    Record metrics for the current session in the process-wide registry
+
+    Args:
+        **metrics: Metric names and values to store for this session
+    """
+    session_id = get_session_id()
+    if session_id is None:
+        return
+
+    now = time.time()
+    with _metrics_lock:
+        entry = _session_metrics.setdefault(session_id, {})
+        entry.update(metrics)
+        entry["username"] = st.session_state.get("username")
+        entry["current_page"] = st.session_state.get("current_page")
+        entry["last_seen"] = now
+
+        # Drop sessions that have gone away
+        for sid in [sid for sid, data in _session_metrics.items() if now - data["last_seen"] > SESSION_METRICS_TTL]:
+            del _session_metrics[sid]
+
+def increment_session_metric(name, amount=1):
+    """
+    Add to a counter for the current session, e.g. the number of script runs
+
+    Args:
+        name (str): Metric name
+        amount (int): Amount to add
+    """
+    session_id = get_session_id()
+    if session_id is None:
+        return
+
+    with _metrics_lock:
+        entry = _session_metrics.setdefault(session_id, {"last_seen": time.time()})
+        entry[name] = entry.get(name, 0) + amount
+
+def record_session_state_size(force=False):
+    """
+    Record the total size of the current session state
+
+    Measuring pickles every key, so it is skipped while the last measurement
+    of the session is younger than STATE_SIZE_INTERVAL.
+
+    Args:
+        force (bool): Measure even if the last measurement is recent
+
+    Returns:
+        dict or None: {key: size in bytes} if measured
+    """
+    session_id = get_session_id()
+    if session_id is None:
+        return None
+
+    now = time.time()
+    if not force:
+        with _metrics_lock:
+            measured_at = _session_metrics.get(session_id, {}).get("state_measured_at")
+        if measured_at is not None and now - measured_at < STATE_SIZE_INTERVAL:
+            return None
+
+    sizes = session_state_size()
+    record_session_metrics(state_bytes=sum(sizes.values()), state_keys=len(sizes), state_measured_at=now)
+    return sizes
+
+def get_session_diagnostics():
+    """
+    Get a snapshot of the metrics recorded for all active sessions
+
+    Returns:
+        list: One dict per session, most recently seen first
+    """
+    with _metrics_lock:
+        rows = [dict(data, session_id=sid) for sid, data in _session_metrics.items()]
+    rows.sort(key=lambda r: r["last_seen"], reverse=True)
+    return rows
@@ -0,0 +1,144 @@
+import os
+import hashlib
+import datetime
+import itertools
+import threading
+import numpy as np
+from .data_manager import exam_forms_file, load_exam_forms, save_exam_forms
+from .quiz_assembly import assemble_quiz, category_mask
+from .irt import get_bank_parameters
+
+# Candidate draws per form; the one closest to the pool's mean difficulty is kept
+CANDIDATES_PER_FORM = 25
+
+# Stored forms cached per course, file version and question bank, shared by all sessions
+_forms_lock = threading.Lock()
+_forms_cache = {}  # {course: {"mtime", "bank", "forms"}}
+_handout = {}  # {course: round-robin counter}
+
+def make_form_id(number, question_ids):
+    """
+    Build a form ID from its number and the exact question list
+
+    The hash suffix changes whenever the questions change, so a score that
+    references a form ID identifies the questions that were asked.
+    """
+    digest = hashlib.sha1(",".join(str(qid) for qid in question_ids).encode()).hexdigest()[:8]
+    return f"F{number:02d}-{digest}"
+
+def generate_forms(bank, num_forms, num_questions, categories=None, blueprint=None, seed=None):
+    """
+    Assemble parallel exam forms with a seeded random generator
+
+    Every form follows the same blueprint allocation, so category and
+    difficulty coverage is identical across forms. For each form several
+    candidates are drawn and the one whose mean item difficulty (IRT b) is
+    closest to the pool mean is kept. Questions used by earlier forms are
+    down-weighted so forms overlap as little as the bank allows. The same
+    seed, bank, item parameters and settings give the same forms.
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+        num_forms (int): Number of forms to generate
+        num_questions (int): Questions per form
+        categories (list, optional): Categories to draw from; all if None
+        blueprint (dict, optional): Relative weight per category/difficulty cell
+        seed (int, optional): Random seed; a fresh one is drawn and recorded if None
+
+    Returns:
+        dict: Form set with the seed, settings and one entry per form
+            ({"form_id", "question_ids", "mean_difficulty"})
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2 ** 32)
+    rng = np.random.default_rng(int(seed))
+
+    index = bank["index"]
+    difficulty = get_bank_parameters(bank)["b"]
+    pool = category_mask(bank, categories) if categories is not None else np.ones(len(difficulty), dtype=bool)
+    target = float(difficulty[pool].mean()) if pool.any() else 0.0
+    usage = np.zeros(len(difficulty))
+
+    forms = []
+    for number in range(1, num_forms + 1):
+        best_ids, best_gap = None, np.inf
+        for _ in range(CANDIDATES_PER_FORM):
+            question_ids = assemble_quiz(bank, num_questions, categories, blueprint, exposure=usage, rng=rng)
+            if not question_ids:
+                break
+            gap = abs(float(difficulty[[index[qid] for qid in question_ids]].mean()) - target)
+            if gap < best_gap:
+                best_ids, best_gap = question_ids, gap
+        if best_ids is None:
+            break
+
+        positions = [index[qid] for qid in best_ids]
+        usage[positions] += 1
+        forms.append({
+            "form_id": make_form_id(number, best_ids),
+            "question_ids": best_ids,
+            "mean_difficulty": round(float(difficulty[positions].mean()), 3)
+        })
+
+    return {
+        "generated_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "seed": int(seed),
+        "num_questions": num_questions,
+        "categories": list(categories) if categories is not None else None,
+        "blueprint": blueprint or {},
+        "target_difficulty": round(target, 3),
+        "forms": forms
+    }
+
+def save_forms(form_set, course=None):
+    """Store a generated form set, replacing the previous one of the course"""
+    return save_exam_forms(form_set, course)
+
+def get_exam_forms(bank):
+    """
+    Get the stored forms that can be used with the current question bank
+
+    Forms that reference questions no longer in the bank are left out.
+    The result is cached until the forms file or the bank changes.
+
+    Args:
+        bank (Mapping): Question bank of the course from data_manager.get_question_bank()
+
+    Returns:
+        list: Usable forms, each with an immutable tuple of question IDs
+    """
+    course = bank["course"]
+    try:
+        mtime = os.stat(exam_forms_file(course)).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    with _forms_lock:
+        cached = _forms_cache.get(course)
+        if cached is not None and cached["mtime"] == mtime and cached["bank"] is bank:
+            return cached["forms"]
+
+        forms = [
+            dict(form, question_ids=tuple(form["question_ids"]))
+            for form in load_exam_forms(course).get("forms", [])
+            if all(qid in bank["index"] for qid in form["question_ids"])
+        ]
+        _forms_cache[course] = {"mtime": mtime, "bank": bank, "forms": forms}
+        return forms
+
+def next_exam_form(bank):
+    """
+    Hand out the next exam form in round-robin order
+
+    Args:
+        bank (Mapping): Question bank of the course from data_manager.get_question_bank()
+
+    Returns:
+        dict or None: Form, None if no usable forms are stored
+    """
+    forms = get_exam_forms(bank)
+    if not forms:
+        return None
+    with _forms_lock:
+        turn = next(_handout.setdefault(bank["course"], itertools.count()))
+    return forms[turn % len(forms)]
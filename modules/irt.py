@@ -0,0 +1,306 @@
+import os
+import datetime
+import threading
+import numpy as np
+from .data_manager import (
+    ITEM_PARAMS_FILE, read_response_log, load_item_parameters, save_item_parameters, get_question_bank
+)
+
+# Ability grid used for estimation (logit scale) and standard normal prior
+THETA_GRID = np.linspace(-4.0, 4.0, 161)
+_LOG_PRIOR = -0.5 * THETA_GRID ** 2
+
+# Starting difficulty for items without enough calibration data
+DEFAULT_DIFFICULTY = {"Basic": -1.0, "Intermediate": 0.0, "Advanced": 1.0}
+DEFAULT_DISCRIMINATION = 1.0
+
+# Minimum responses before an item gets calibrated parameters
+MIN_RESPONSES = 20
+
+# Adaptive test stopping rule
+MIN_ADAPTIVE_QUESTIONS = 5
+CONFIDENCE_Z = 1.96  # 95% credible interval around the ability estimate
+RANDOMESQUE_TOP = 3  # pick among the top-N most informative items to spread exposure
+
+# Parameter arrays cached per course, each valid for one question bank object
+_params_lock = threading.Lock()
+_params_cache = {}  # {course: {"bank", "mtime", "params"}}
+
+def probability(theta, a, b):
+    """
+    2PL probability of a correct answer
+
+    Args:
+        theta: Ability (scalar or array, broadcast against a and b)
+        a: Item discrimination
+        b: Item difficulty
+
+    Returns:
+        np.ndarray: Probability of a correct response
+    """
+    return 1.0 / (1.0 + np.exp(-a * (theta - b)))
+
+def information(theta, a, b):
+    """Fisher information of 2PL items at ability theta"""
+    p = probability(theta, a, b)
+    return a ** 2 * p * (1.0 - p)
+
+def estimate_ability(a, b, correct):
+    """
+    Expected a posteriori (EAP) ability estimate on a fixed grid
+
+    Args:
+        a (np.ndarray): Discrimination of the answered items
+        b (np.ndarray): Difficulty of the answered items
+        correct (np.ndarray): 1 for correct answers, 0 for incorrect
+
+    Returns:
+        tuple: (theta estimate, posterior standard deviation)
+    """
+    p = probability(THETA_GRID[:, None], np.asarray(a)[None, :], np.asarray(b)[None, :])
+    x = np.asarray(correct, dtype=float)[None, :]
+    log_post = _LOG_PRIOR + (x * np.log(p) + (1.0 - x) * np.log1p(-p)).sum(axis=1)
+    weights = np.exp(log_post - log_post.max())
+    weights /= weights.sum()
+
+    theta = float(weights @ THETA_GRID)
+    sd = float(np.sqrt(weights @ (THETA_GRID - theta) ** 2))
+    return theta, sd
+
+def cut_theta(a, b, passing_score):
+    """
+    Ability at which the expected percent correct on the given items equals the passing score
+
+    Args:
+        a (np.ndarray): Discrimination of the items in the pool
+        b (np.ndarray): Difficulty of the items in the pool
+        passing_score (float): Passing score in percent
+
+    Returns:
+        float: Cut point on the ability scale
+    """
+    expected = probability(THETA_GRID[:, None], a[None, :], b[None, :]).mean(axis=1)
+    return float(np.interp(passing_score / 100.0, expected, THETA_GRID))
+
+def expected_percentage(theta, a, b):
+    """Expected percent correct on the given items at ability theta"""
+    return float(probability(theta, a, b).mean() * 100)
+
+def get_bank_parameters(bank):
+    """
+    Get item parameter arrays aligned with the question bank order
+
+    Calibrated parameters are used where available; other items fall back
+    to defaults derived from their difficulty label.
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+
+    Returns:
+        dict: {"a": discrimination array, "b": difficulty array, "calibrated": bool array}
+    """
+    try:
+        mtime = os.stat(ITEM_PARAMS_FILE).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    with _params_lock:
+        cached = _params_cache.get(bank["course"])
+        if cached is not None and cached["bank"] is bank and cached["mtime"] == mtime:
+            return cached["params"]
+
+        items = load_item_parameters().get("items", {})
+        questions = bank["questions"]
+        a = np.full(len(questions), DEFAULT_DISCRIMINATION)
+        b = np.array([DEFAULT_DIFFICULTY.get(q.get("difficulty", "Intermediate"), 0.0) for q in questions])
+        calibrated = np.zeros(len(questions), dtype=bool)
+        for pos, q in enumerate(questions):
+            item = items.get(str(q["id"]))
+            if item:
+                a[pos], b[pos], calibrated[pos] = item["a"], item["b"], True
+
+        params = {"a": a, "b": b, "calibrated": calibrated}
+        for arr in params.values():
+            arr.setflags(write=False)
+
+        _params_cache[bank["course"]] = {"bank": bank, "mtime": mtime, "params": params}
+        return params
+
+def select_next_item(theta, a, b, eligible, rng=None):
+    """
+    Pick the next item by maximum Fisher information at the current ability
+
+    Args:
+        theta (float): Current ability estimate
+        a (np.ndarray): Discrimination for all bank items
+        b (np.ndarray): Difficulty for all bank items
+        eligible (np.ndarray): Boolean mask of items that may still be asked
+        rng (np.random.Generator, optional): Random generator for the randomesque pick
+
+    Returns:
+        int or None: Bank position of the chosen item, None if nothing is eligible
+    """
+    candidates = np.flatnonzero(eligible)
+    if candidates.size == 0:
+        return None
+
+    rng = rng if rng is not None else np.random.default_rng()
+    info = information(theta, a[candidates], b[candidates])
+    top = min(RANDOMESQUE_TOP, candidates.size)
+    best = np.argpartition(-info, top - 1)[:top]
+    return int(candidates[rng.choice(best)])
+
+def adaptive_decision(theta, sd, theta_cut, asked, max_questions):
+    """
+    Sequential pass/fail decision for an adaptive quiz
+
+    Args:
+        theta (float): Current ability estimate
+        sd (float): Posterior standard deviation of the estimate
+        theta_cut (float): Passing cut point on the ability scale
+        asked (int): Number of questions answered so far
+        max_questions (int): Maximum quiz length
+
+    Returns:
+        str or None: "pass" or "fail" once a decision is reached, otherwise None
+    """
+    confident = abs(theta - theta_cut) > CONFIDENCE_Z * sd
+    if (asked >= MIN_ADAPTIVE_QUESTIONS and confident) or asked >= max_questions:
+        return "pass" if theta >= theta_cut else "fail"
+    return None
+
+def load_responses(question_ids):
+    """
+    Load historical responses in long format from the response log
+
+    Args:
+        question_ids (list): Question IDs defining the item positions
+
+    Returns:
+        tuple: (attempt index, item position, correct) arrays and the number of attempts
+    """
+    column = {qid: pos for pos, qid in enumerate(question_ids)}
+    attempts, items, correct = [], [], []
+    records, _ = read_response_log()
+    for n, record in enumerate(records):
+        for qid, is_correct in zip(record["question_ids"], record["correct"]):
+            if qid in column:
+                attempts.append(n)
+                items.append(column[qid])
+                correct.append(float(is_correct))
+    return (
+        np.array(attempts, dtype=np.int64),
+        np.array(items, dtype=np.int64),
+        np.array(correct, dtype=float),
+        len(records)
+    )
+
+def calibrate_items(attempts, items, correct, n_attempts, a_init, b_init, iterations=30):
+    """
+    Calibrate 2PL item parameters by joint maximum a posteriori estimation
+
+    Abilities and item parameters are updated in alternation with damped
+    Fisher scoring steps. Responses are kept in long format and summed per
+    attempt and per item with np.bincount, so memory grows with the number
+    of responses rather than attempts x items. Weak priors keep sparse items
+    close to their starting values.
+
+    Args:
+        attempts (np.ndarray): Attempt index of each response
+        items (np.ndarray): Item position of each response
+        correct (np.ndarray): 1.0 for a correct response, 0.0 otherwise
+        n_attempts (int): Number of attempts
+        a_init (np.ndarray): Starting discrimination per item
+        b_init (np.ndarray): Starting difficulty per item
+        iterations (int): Number of alternating update rounds
+
+    Returns:
+        tuple: (a, b, theta) arrays
+    """
+    n_items = len(a_init)
+    a = a_init.astype(float).copy()
+    b = b_init.astype(float).copy()
+
+    def per_attempt(values):
+        return np.bincount(attempts, weights=values, minlength=n_attempts)
+
+    def per_item(values):
+        return np.bincount(items, weights=values, minlength=n_items)
+
+    # Start abilities from each attempt's proportion correct
+    prop = (per_attempt(correct) + 0.5) / (np.bincount(attempts, minlength=n_attempts) + 1.0)
+    theta = np.log(prop / (1.0 - prop))
+
+    for _ in range(iterations):
+        # Ability step, prior N(0, 1)
+        a_r = a[items]
+        p = probability(theta[attempts], a_r, b[items])
+        grad = per_attempt(a_r * (correct - p)) - theta
+        info = per_attempt(a_r ** 2 * p * (1.0 - p)) + 1.0
+        theta = np.clip(theta + np.clip(grad / info, -1.0, 1.0), -4.0, 4.0)
+
+        # Item steps, priors log(a) ~ N(0, 0.5^2) and b ~ N(0, 2^2)
+        p = probability(theta[attempts], a[items], b[items])
+        resid = correct - p
+        pq = p * (1.0 - p)
+        diff = theta[attempts] - b[items]
+
+        grad_b = -a * per_item(resid) - b / 4.0
+        info_b = a ** 2 * per_item(pq) + 1.0 / 4.0
+        b = np.clip(b + np.clip(grad_b / info_b, -0.5, 0.5), -4.0, 4.0)
+
+        grad_a = per_item(resid * diff) - np.log(a) / (0.25 * a)
+        info_a = per_item(pq * diff ** 2) + 1.0 / (0.25 * a ** 2)
+        a = np.clip(a + np.clip(grad_a / info_a, -0.25, 0.25), 0.2, 3.0)
+
+    return a, b, theta
+
+def run_calibration(course=None):
+    """
+    Calibrate item parameters of one course from historical responses and store them
+
+    Meant to be run offline (admin action or command line), never on the
+    quiz hot path. Items with fewer than MIN_RESPONSES responses keep their
+    default parameters. Parameters of other courses' items are kept.
+
+    Args:
+        course (str, optional): Course ID; the default course if None
+
+    Returns:
+        dict: Summary with the number of attempts used and items calibrated
+    """
+    bank = get_question_bank(course)
+    questions = bank["questions"]
+    question_ids = [q["id"] for q in questions]
+    attempts, items, correct, n_attempts = load_responses(question_ids)
+
+    a_init = np.full(len(questions), DEFAULT_DISCRIMINATION)
+    b_init = np.array([DEFAULT_DIFFICULTY.get(q.get("difficulty", "Intermediate"), 0.0) for q in questions])
+    counts = np.bincount(items, minlength=len(questions))
+
+    calibrated = {}
+    if n_attempts > 0:
+        a, b, _ = calibrate_items(attempts, items, correct, n_attempts, a_init, b_init)
+        calibrated = {
+            str(qid): {"a": round(float(a[pos]), 4), "b": round(float(b[pos]), 4), "n": int(counts[pos])}
+            for pos, qid in enumerate(question_ids)
+            if counts[pos] >= MIN_RESPONSES
+        }
+
+    # Question IDs are unique across courses, so only this course's entries are replaced
+    items = {
+        qid: params for qid, params in load_item_parameters().get("items", {}).items()
+        if int(qid) not in bank["index"]
+    }
+    items.update(calibrated)
+    save_item_parameters({
+        "calibrated_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "attempts": n_attempts,
+        "items": items
+    })
+    return {"attempts": n_attempts, "calibrated_items": len(calibrated)}
+
+if __name__ == "__main__":
+    # Offline calibration: python -m modules.irt
+    summary = run_calibration()
+    print(f"Calibrated {summary['calibrated_items']} items from {summary['attempts']} attempts")
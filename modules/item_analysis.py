@@ -0,0 +1,197 @@
+import os
+import threading
+from itertools import chain
+import numpy as np
+import pandas as pd
+from .data_manager import RESPONSES_FILE, read_response_log, response_log_generation
+
+# Share of attempts in the upper and lower groups for the discrimination index
+GROUP_FRACTION = 0.27
+
+# Thresholds for flagging questions for review
+MIN_RESPONSES = 30
+TOO_EASY = 0.95
+TOO_HARD = 0.20
+LOW_DISCRIMINATION = 0.20
+LOW_POINT_BISERIAL = 0.15
+
+# Parsed response arrays and the last computed statistics, shared by all sessions
+_analysis_lock = threading.Lock()
+_analysis_cache = {
+    "generation": 0, "offset": 0, "size": 0, "arrays": None, "n_attempts": 0, "stats": None, "stats_offset": None
+}
+
+def _records_to_arrays(records, first_attempt):
+    """Flatten attempt records into long-format response arrays"""
+    lengths = np.fromiter((len(r["question_ids"]) for r in records), dtype=np.int64, count=len(records))
+    total = int(lengths.sum())
+    return {
+        "attempt": np.repeat(np.arange(first_attempt, first_attempt + len(records)), lengths),
+        "question_id": np.fromiter(chain.from_iterable(r["question_ids"] for r in records), dtype=np.int64, count=total),
+        "selected": np.fromiter(chain.from_iterable(r["selected"] for r in records), dtype=np.int16, count=total),
+        "correct": np.fromiter(chain.from_iterable(r["correct"] for r in records), dtype=np.int8, count=total),
+        "latency_ms": np.fromiter(chain.from_iterable(r["latency_ms"] for r in records), dtype=np.int64, count=total),
+    }
+
+def load_response_arrays():
+    """
+    Get all logged responses as long-format NumPy arrays
+
+    Only lines appended to the response log since the previous call are
+    parsed and appended to the arrays kept in memory. Everything is parsed
+    again after the log is rewritten (scores cleared) or truncated.
+
+    Returns:
+        tuple: (dict of arrays with one entry per response, number of attempts, log offset)
+    """
+    with _analysis_lock:
+        generation = response_log_generation()
+        try:
+            size = os.path.getsize(RESPONSES_FILE)
+        except OSError:
+            size = 0
+        if generation != _analysis_cache["generation"] or size < _analysis_cache["size"] or \
+                (size == 0 and _analysis_cache["offset"]):
+            # Log was rewritten or truncated, start over
+            _analysis_cache.update(
+                generation=generation, offset=0, size=0, arrays=None, n_attempts=0, stats=None, stats_offset=None
+            )
+
+        records, offset = read_response_log(_analysis_cache["offset"])
+        if records or _analysis_cache["arrays"] is None:
+            new = _records_to_arrays(records, _analysis_cache["n_attempts"])
+            old = _analysis_cache["arrays"]
+            _analysis_cache["arrays"] = new if old is None else {key: np.concatenate([old[key], new[key]]) for key in new}
+            _analysis_cache["n_attempts"] += len(records)
+        _analysis_cache["offset"] = offset
+        _analysis_cache["size"] = size
+
+        return _analysis_cache["arrays"], _analysis_cache["n_attempts"], offset
+
+def compute_item_statistics(arrays, n_attempts):
+    """
+    Compute classical item statistics from long-format responses
+
+    All statistics are computed with grouped NumPy reductions (bincount),
+    so a million responses take well under a second.
+
+    Args:
+        arrays (dict): Response arrays from load_response_arrays()
+        n_attempts (int): Number of attempts in the arrays
+
+    Returns:
+        pd.DataFrame: One row per question ID with responses, p-value,
+            discrimination index, point-biserial correlation, mean answer
+            time and selection rate per option
+    """
+    columns = ["responses", "p_value", "discrimination", "point_biserial", "avg_seconds", "option_rates"]
+    if arrays["question_id"].size == 0:
+        return pd.DataFrame(columns=columns).rename_axis("question_id")
+
+    attempt = arrays["attempt"]
+    correct = arrays["correct"].astype(float)
+    qids, item = np.unique(arrays["question_id"], return_inverse=True)
+    n_items = qids.size
+
+    def per_item(values=None):
+        return np.bincount(item, weights=values, minlength=n_items)
+
+    # Attempt scores (proportion correct)
+    answered = np.bincount(attempt, minlength=n_attempts).astype(float)
+    right = np.bincount(attempt, weights=correct, minlength=n_attempts)
+    score = np.divide(right, answered, out=np.zeros(n_attempts), where=answered > 0)
+
+    # Difficulty (p-value)
+    n = per_item()
+    p_value = per_item(correct) / n
+
+    # Discrimination index: p(upper 27%) - p(lower 27%) by attempt score
+    ranks = np.argsort(np.argsort(score, kind="stable"), kind="stable")
+    group_size = max(1, int(round(n_attempts * GROUP_FRACTION)))
+    upper = (ranks >= n_attempts - group_size)[attempt]
+    lower = (ranks < group_size)[attempt]
+    n_upper, n_lower = per_item(upper.astype(float)), per_item(lower.astype(float))
+    p_upper = np.divide(per_item(correct * upper), n_upper, out=np.full(n_items, np.nan), where=n_upper > 0)
+    p_lower = np.divide(per_item(correct * lower), n_lower, out=np.full(n_items, np.nan), where=n_lower > 0)
+    discrimination = p_upper - p_lower
+
+    # Point-biserial against the rest score (attempt score without this item)
+    rest_n = answered[attempt] - 1.0
+    rest = np.divide(right[attempt] - correct, rest_n, out=np.zeros_like(correct), where=rest_n > 0)
+    mean_x, mean_r = p_value, per_item(rest) / n
+    cov = per_item(correct * rest) / n - mean_x * mean_r
+    var_x = mean_x * (1.0 - mean_x)
+    var_r = per_item(rest ** 2) / n - mean_r ** 2
+    denom = np.sqrt(var_x * var_r)
+    point_biserial = np.divide(cov, denom, out=np.full(n_items, np.nan), where=denom > 1e-12)
+
+    # Distractor analysis: selection rate per option
+    n_options = int(arrays["selected"].max()) + 1
+    option_counts = np.bincount(
+        item * n_options + arrays["selected"], minlength=n_items * n_options
+    ).reshape(n_items, n_options)
+    option_rates = option_counts / n[:, None]
+
+    avg_seconds = per_item(arrays["latency_ms"].astype(float)) / n / 1000
+
+    return pd.DataFrame({
+        "question_id": qids,
+        "responses": n.astype(int),
+        "p_value": p_value,
+        "discrimination": discrimination,
+        "point_biserial": point_biserial,
+        "avg_seconds": avg_seconds,
+        "option_rates": list(option_rates),
+    }).set_index("question_id")
+
+def get_item_statistics():
+    """
+    Get item statistics for all logged questions
+
+    Statistics are recomputed only when new attempts were logged since the
+    last call; new log lines are parsed incrementally.
+
+    Returns:
+        pd.DataFrame: See compute_item_statistics()
+    """
+    arrays, n_attempts, offset = load_response_arrays()
+    with _analysis_lock:
+        if _analysis_cache["stats"] is not None and _analysis_cache["stats_offset"] == offset:
+            return _analysis_cache["stats"]
+
+    stats = compute_item_statistics(arrays, n_attempts)
+    with _analysis_lock:
+        # Not if the log was rewritten while computing
+        if _analysis_cache["arrays"] is arrays:
+            _analysis_cache["stats"] = stats
+            _analysis_cache["stats_offset"] = offset
+    return stats
+
+def review_flags(row, answer=None):
+    """
+    List quality issues for one question's statistics
+
+    Args:
+        row (dict or pd.Series): Row from get_item_statistics()
+        answer (int, optional): Index of the correct option
+
+    Returns:
+        list: Short descriptions of the issues found
+    """
+    if row["responses"] < MIN_RESPONSES:
+        return []
+
+    flags = []
+    if row["p_value"] > TOO_EASY:
+        flags.append("Too easy")
+    elif row["p_value"] < TOO_HARD:
+        flags.append("Too hard")
+    if not np.isnan(row["discrimination"]) and row["discrimination"] < LOW_DISCRIMINATION:
+        flags.append("Low discrimination")
+    if not np.isnan(row["point_biserial"]) and row["point_biserial"] < LOW_POINT_BISERIAL:
+        flags.append("Low point-biserial")
+    if answer is not None and answer < len(row["option_rates"]):
+        rates = row["option_rates"]
+        if any(rate > rates[answer] for i, rate in enumerate(rates) if i != answer):
+            flags.append("Distractor chosen more than answer")
+    return flags
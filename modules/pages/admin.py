@@ -5,22 +5,31 @@ import pandas as pd
 import os
 import datetime
 import base64
-from ..ui import load_css, display_logo, apply_custom_css_class, show_notification
+from ..ui import display_logo, apply_custom_css_class, show_notification
 from ..data_manager import (
     load_questions, load_scores, load_users, load_settings,
-    save_questions, save_users, save_settings, LOGO_PATH,
+    save_questions, save_question, save_users, save_settings, save_logo, remove_logo, LOGO_PATH,
     get_category_statistics, get_score_statistics,
-    clear_all_scores, clear_user_scores
-   
+    clear_all_scores, clear_user_scores, get_question_bank, get_question_performance,
+    load_exam_forms, get_questions_by_ids, load_courses, save_courses, get_course, get_course_settings,
+    save_course_settings, next_question_id, score_course, loaded_courses, DEFAULT_COURSE,
+    load_revoked_certificates, revoke_certificate, reinstate_certificate, score_passed
 )
 from ..auth import hash_password
 from ..certificate import create_certificate  # Add this import
+from ..diagnostics import estimate_size, record_session_state_size, get_session_diagnostics
+from ..quiz_assembly import cell_key, get_cell_counts
+from ..irt import run_calibration, get_bank_parameters, MIN_RESPONSES
+from ..item_analysis import get_item_statistics, review_flags
+from ..deadlines import count_open_attempts
+from ..exam_forms import generate_forms, save_forms, get_exam_forms
+from ..certificate_export import export_certificates, export_certificates_pdf
+from ..certificate_codes import normalize_certificate_code
+from ..certifications import get_valid_certificates, renewal_worklist, worklist_csv, RENEWAL_WINDOW_DAYS
+from ..pass_evaluation import check_passing_scores, pass_evaluation_status
 
 def admin_page():
     """Main admin panel interface with tabs for different management functions"""
-    # Apply custom CSS
-    st.markdown(load_css(), unsafe_allow_html=True)
-    
     # Display logo
     display_logo()
     
@@ -35,29 +44,46 @@ def admin_page():
         </div>
     """, unsafe_allow_html=True)
     
+    # Course whose questions, blueprint and exam forms are managed in the tabs below
+    courses = load_courses()
+    course = st.selectbox(
+        "Course",
+        options=list(courses),
+        format_func=lambda c: courses[c].get("name", c),
+        key="admin_course"
+    )
+    
     # Create tabs with enhanced styling
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
         "📊 Dashboard", 
         "❓ Manage Questions", 
         "👤 User Management", 
+        "📜 Certificates",
         "🔧 System Settings",
-        "🎨 Branding"
+        "🎨 Branding",
+        "🩺 Diagnostics"
     ])
     
     with tab1:
         admin_dashboard()
     
     with tab2:
-        manage_questions()
+        manage_questions(course)
     
     with tab3:
         manage_users()
     
     with tab4:
-        system_settings()
-        
+        manage_certificates(course)
+    
     with tab5:
+        system_settings(course)
+        
+    with tab6:
         branding_settings()
+    
+    with tab7:
+        system_diagnostics()
 
 def admin_dashboard():
     """Dashboard with key metrics and charts"""
@@ -74,8 +100,14 @@ def admin_dashboard():
         st.markdown('</div>', unsafe_allow_html=True)
         return
     
-    # Convert to DataFrame for analysis
+    # Convert to DataFrame for analysis; pass/fail is the flag stored with each score
     df = pd.DataFrame(scores)
+    df["passed"] = [score_passed(s) for s in scores]
+    
+    # Stored flags lag behind a changed passing score until the re-evaluation finishes
+    evaluation = pass_evaluation_status()
+    if evaluation["running"]:
+        st.info("Passing scores changed: pass/fail results are being re-evaluated in the background.")
     
     # Key metrics in cards
     st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
@@ -92,8 +124,7 @@ def admin_dashboard():
         st.metric("Average Score", f"{avg_score:.1f}%")
     
     with col3:
-        passing_score = 80  # Could be from settings
-        passing_rate = (df["percentage"] >= passing_score).mean() * 100
+        passing_rate = df["passed"].mean() * 100
         st.metric("Pass Rate", f"{passing_rate:.1f}%")
     
     with col4:
@@ -104,6 +135,33 @@ def admin_dashboard():
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # Results per course, each judged against its own passing score
+    courses = load_courses()
+    df["course"] = [score_course(s) for s in scores]
+    if len(courses) > 1 or df["course"].nunique() > 1:
+        st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+        st.markdown("### Results by Course")
+        course_df = df.groupby("course").agg(
+            attempts=("percentage", "size"),
+            users=("username", "nunique"),
+            avg_score=("percentage", "mean"),
+            pass_rate=("passed", "mean")
+        ).reset_index()
+        course_df["course"] = course_df["course"].map(lambda c: courses.get(c, {}).get("name", c))
+        course_df["pass_rate"] = course_df["pass_rate"] * 100
+        st.dataframe(
+            course_df.rename(columns={
+                "course": "Course",
+                "attempts": "Attempts",
+                "users": "Users",
+                "avg_score": "Average Score (%)",
+                "pass_rate": "Pass Rate (%)"
+            }).round(1),
+            hide_index=True,
+            use_container_width=True
+        )
+        st.markdown('</div>', unsafe_allow_html=True)
+    
     # Second row - Recent activity & trending
     st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
     
@@ -210,70 +268,46 @@ def admin_dashboard():
     st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
     st.markdown("### Question Analysis")
     
-    # Modify the question difficulty analysis section
-    if "categories" in df.columns:
-        # Calculate most challenging questions
-        question_difficulty = {}
+    # Per-question outcomes aggregated from the response log
+    question_performance = get_question_performance()
+    
+    if question_performance:
+        q_diff_df = pd.DataFrame([
+            {
+                "question_id": q_id,
+                "attempts": data["attempts"],
+                "correct": data["correct"],
+                "avg_seconds": data["latency_ms"] / data["attempts"] / 1000
+            }
+            for q_id, data in question_performance.items()
+        ])
+        q_diff_df["difficulty"] = 100 - q_diff_df["correct"] / q_diff_df["attempts"] * 100
         
-        for _, row in df.iterrows():
-            if "question_performance" in row:
-                for q_id, result in row["question_performance"].items():
-                    if q_id not in question_difficulty:
-                        question_difficulty[q_id] = {"attempts": 0, "correct": 0}
-                    
-                    question_difficulty[q_id]["attempts"] += 1
-                    if result.get("correct", False):
-                        question_difficulty[q_id]["correct"] += 1
+        # Add question text
+        questions_dict = {q["id"]: q["question"] for q in questions}
+        q_diff_df["question"] = q_diff_df["question_id"].map(questions_dict).fillna("Unknown Question")
         
-        # Calculate difficulty percentage
-        for q_id in question_difficulty:
-            attempts = question_difficulty[q_id]["attempts"]
-            correct = question_difficulty[q_id]["correct"]
-            question_difficulty[q_id]["difficulty"] = 100 - ((correct / attempts) * 100 if attempts > 0 else 0)
+        # Limit question text length
+        q_diff_df["question"] = q_diff_df["question"].where(
+            q_diff_df["question"].str.len() <= 50, q_diff_df["question"].str[:50] + "..."
+        )
         
-        # Only proceed if we have question difficulty data
-        if question_difficulty:
-            # Convert to DataFrame
-            q_diff_df = pd.DataFrame([
-                {
-                    "question_id": q_id,  # Using "question_id" instead of "id" to be more explicit
-                    "difficulty": data["difficulty"],
-                    "attempts": data["attempts"]
-                }
-                for q_id, data in question_difficulty.items()
-            ])
-            
-            # Get question text
-            questions_dict = {q["id"]: q for q in questions}
-            
-            # Add question text column - make sure we're using the correct column name
-            if "question_id" in q_diff_df.columns:
-                q_diff_df["question"] = q_diff_df["question_id"].apply(
-                    lambda qid: questions_dict.get(qid, {}).get("question", "Unknown Question")
-                )
-                
-                # Limit question text length
-                q_diff_df["question"] = q_diff_df["question"].apply(lambda q: q[:50] + "..." if len(q) > 50 else q)
-                
-                # Sort by difficulty (hardest first)
-                q_diff_df = q_diff_df.sort_values("difficulty", ascending=False).head(10)
-                
-                # Show most difficult questions
-                st.subheader("Most Challenging Questions")
-                st.dataframe(
-                    q_diff_df[["question", "difficulty", "attempts"]].rename(columns={
-                        "question": "Question",
-                        "difficulty": "Difficulty Score",
-                        "attempts": "Times Attempted"
-                    }),
-                    use_container_width=True
-                )
-            else:
-                st.info("Detailed question analysis requires more quiz data.")
-        else:
-            st.info("Question difficulty analysis will be available after more quizzes are taken.")
+        # Sort by difficulty (hardest first)
+        q_diff_df = q_diff_df.sort_values("difficulty", ascending=False).head(10)
+        
+        # Show most difficult questions
+        st.subheader("Most Challenging Questions")
+        st.dataframe(
+            q_diff_df[["question", "difficulty", "attempts", "avg_seconds"]].rename(columns={
+                "question": "Question",
+                "difficulty": "Difficulty Score",
+                "attempts": "Times Attempted",
+                "avg_seconds": "Avg. Answer Time (s)"
+            }).round(1),
+            use_container_width=True
+        )
     else:
-        st.info("Detailed question analysis will be available after more quizzes are taken.")
+        st.info("Question difficulty analysis will be available after more quizzes are taken.")
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -308,12 +342,12 @@ def admin_dashboard():
                 mime="text/csv"
             )
 
-def manage_questions():
-    """Question management interface"""
-    st.subheader("Question Management")
+def manage_questions(course=None):
+    """Question management interface for one course"""
+    st.subheader(f"Question Management: {get_course(course)['name']}")
     
     # Load questions
-    questions = load_questions()
+    questions = load_questions(course)
     
     # Question import/export section
     col1, col2 = st.columns(2)
@@ -375,8 +409,8 @@ def manage_questions():
                             if replace_existing:
                                 questions = []
                             
-                            # Get highest existing ID
-                            next_id = max([q["id"] for q in questions], default=0) + 1
+                            # Question IDs are unique across all courses
+                            next_id = next_question_id()
                             
                             # Convert DataFrame rows to question dictionaries
                             new_questions_count = 0
@@ -395,7 +429,7 @@ def manage_questions():
                                 new_questions_count += 1
                             
                             # Save updated questions
-                            save_questions(questions)
+                            save_questions(questions, course)
                             st.success(f"Successfully imported {new_questions_count} questions!")
                             
             except Exception as e:
@@ -520,11 +554,8 @@ def manage_questions():
                 if not new_question or "" in new_options or not new_explanation:
                     st.error("All fields are required")
                 else:
-                    # Load questions again in case they were updated
-                    questions = load_questions()
-                    
-                    # Generate new ID
-                    new_id = max([q["id"] for q in questions], default=0) + 1
+                    # Generate new ID (unique across all courses)
+                    new_id = next_question_id()
                     
                     new_q = {
                         "id": new_id,
@@ -536,8 +567,7 @@ def manage_questions():
                         "difficulty": new_difficulty
                     }
                     
-                    questions.append(new_q)
-                    save_questions(questions)
+                    save_question(new_q, course)
                     st.success("New question added successfully!")
     
     with q_tab2:
@@ -579,6 +609,9 @@ def manage_questions():
                 
                 q_to_edit = filtered_questions[selected_q_idx]
                 
+                if q_to_edit.get("version"):
+                    st.caption(f"Current version: {q_to_edit['version']}")
+                
                 with st.form(key="edit_question_form"):
                     edited_question = st.text_area("Question", value=q_to_edit["question"])
                     
@@ -620,18 +653,16 @@ def manage_questions():
                     submit_edit = st.form_submit_button("Save Changes")
                     
                     if submit_edit:
-                        # Update the question in the original questions list
-                        for i, q in enumerate(questions):
-                            if q["id"] == q_to_edit["id"]:
-                                questions[i]["question"] = edited_question
-                                questions[i]["options"] = edited_options
-                                questions[i]["answer"] = edited_answer
-                                questions[i]["explanation"] = edited_explanation
-                                questions[i]["category"] = edited_category
-                                questions[i]["difficulty"] = edited_difficulty
-                                break
-                        
-                        save_questions(questions)
+                        # Store the edit as a new version; earlier attempts keep the version they were given
+                        save_question(dict(
+                            q_to_edit,
+                            question=edited_question,
+                            options=edited_options,
+                            answer=edited_answer,
+                            explanation=edited_explanation,
+                            category=edited_category,
+                            difficulty=edited_difficulty
+                        ), course)
                         st.success("Question updated successfully!")
         else:
             st.info("No questions available to edit. Add questions manually or import from CSV.")
@@ -686,13 +717,117 @@ def manage_questions():
                         # Remove questions with those IDs
                         questions = [q for q in questions if q["id"] not in ids_to_delete]
                         
-                        save_questions(questions)
+                        save_questions(questions, course)
                         st.success(f"Successfully deleted {len(delete_options)} questions!")
                         st.rerun()  # Refresh the page
         else:
             st.info("No questions available to delete.")
     
     st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Item analysis for question quality
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Item Analysis")
+    st.write(
+        "Question quality statistics from all recorded answers: p-value (share correct), "
+        "discrimination index (upper vs. lower 27% of attempts), point-biserial correlation "
+        "with the rest of the quiz, and how often each option was chosen."
+    )
+    
+    # Responses of all courses share one log; keep this course's questions
+    questions_by_id = {q["id"]: q for q in questions}
+    item_stats = get_item_statistics()
+    item_stats = item_stats[item_stats.index.isin(list(questions_by_id))]
+    if not item_stats.empty:
+        
+        analysis_df = item_stats.reset_index()
+        analysis_df["question"] = analysis_df["question_id"].map(
+            lambda qid: questions_by_id.get(qid, {}).get("question", "Deleted question")[:50]
+        )
+        analysis_df["option_rates"] = [
+            " | ".join(
+                f"{'✓' if i == questions_by_id.get(qid, {}).get('answer') else ''}{i + 1}: {rate:.0%}"
+                for i, rate in enumerate(rates)
+            )
+            for qid, rates in zip(analysis_df["question_id"], analysis_df["option_rates"])
+        ]
+        analysis_df["flags"] = [
+            ", ".join(review_flags(row, questions_by_id.get(row["question_id"], {}).get("answer")))
+            for row in item_stats.reset_index().to_dict("records")
+        ]
+        
+        flagged_count = int((analysis_df["flags"] != "").sum())
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Analyzed Questions", len(analysis_df))
+        with col2:
+            st.metric("Flagged for Review", flagged_count)
+        
+        if st.checkbox("Show flagged questions only", value=flagged_count > 0, key="item_analysis_flagged_only"):
+            analysis_df = analysis_df[analysis_df["flags"] != ""]
+        
+        st.dataframe(
+            analysis_df[[
+                "question_id", "question", "responses", "p_value", "discrimination",
+                "point_biserial", "avg_seconds", "option_rates", "flags"
+            ]].rename(columns={
+                "question_id": "ID",
+                "question": "Question",
+                "responses": "Responses",
+                "p_value": "p-value",
+                "discrimination": "Discrimination",
+                "point_biserial": "Point-Biserial",
+                "avg_seconds": "Avg. Time (s)",
+                "option_rates": "Option Selection (✓ = correct)",
+                "flags": "Review Flags"
+            }).round(2),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("Item statistics will be available once quizzes have been taken.")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Adaptive testing item parameters
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Adaptive Testing Calibration")
+    st.write(
+        "Adaptive quizzes use item parameters (difficulty and discrimination) estimated from past answers. "
+        f"Questions with fewer than {MIN_RESPONSES} recorded answers use defaults based on their difficulty level."
+    )
+    
+    bank = get_question_bank(course)
+    if bank["questions"]:
+        params = get_bank_parameters(bank)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Calibrated Questions", f"{int(params['calibrated'].sum())} / {len(bank['questions'])}")
+        with col2:
+            if st.button("Recalibrate Item Parameters", key="calibrate_items_btn"):
+                with st.spinner("Calibrating item parameters..."):
+                    summary = run_calibration(course)
+                st.success(
+                    f"Calibrated {summary['calibrated_items']} questions from {summary['attempts']} quiz attempts."
+                )
+                params = get_bank_parameters(bank)
+        
+        with st.expander("Item Parameters"):
+            st.dataframe(
+                pd.DataFrame({
+                    "ID": [q["id"] for q in bank["questions"]],
+                    "Question": [q["question"][:50] for q in bank["questions"]],
+                    "Difficulty (b)": params["b"].round(2),
+                    "Discrimination (a)": params["a"].round(2),
+                    "Calibrated": params["calibrated"]
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+    else:
+        st.info("Add questions to use adaptive testing.")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
 
 
 # modules/pages/admin/manage_users.py
@@ -995,10 +1130,146 @@ def manage_users():
         st.markdown('</div>', unsafe_allow_html=True)            
 
 
+# modules/pages/admin/certificates.py
+
+def manage_certificates(course=None):
+    """Valid certificates, bulk export for audits, renewal worklist and revocation"""
+    st.subheader("Certificates")
+    courses = load_courses()
+    
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Valid Certificates")
+    scope = st.radio(
+        "Courses",
+        options=["course", "all"],
+        format_func=lambda s: courses.get(course, {}).get("name", course) if s == "course" else "All Courses",
+        horizontal=True,
+        key="certificate_scope"
+    )
+    export_course = course if scope == "course" else None
+    certificates = get_valid_certificates(export_course)
+    
+    if not certificates:
+        st.info("No valid certificates found.")
+    else:
+        cert_df = pd.DataFrame([
+            {
+                "User": cert["username"],
+                "Name": cert["name"],
+                "Course": courses.get(cert["course"], {}).get("name", cert["course"]),
+                "Certificate ID": cert["cert_id"],
+                "Score": f"{cert['score']:.1f}%",
+                "Issued": cert["issued"].strftime("%Y-%m-%d"),
+                "Expires": cert["expires"].strftime("%Y-%m-%d")
+            }
+            for cert in certificates
+        ])
+        st.dataframe(cert_df, use_container_width=True, hide_index=True)
+        
+        # Bulk export; certificates unchanged since the last export are not rendered again
+        st.markdown("#### Export for Audit")
+        export_format = st.radio(
+            "Format",
+            options=["zip", "pdf"],
+            format_func=lambda f: "ZIP of HTML files with manifest" if f == "zip" else "Single printable PDF",
+            horizontal=True,
+            key="certificate_export_format"
+        )
+        st.write(f"Export all {len(certificates)} valid certificates.")
+        if st.button("Export Certificates", key="export_certificates_btn"):
+            progress_bar = st.progress(0.0, text="Preparing export...")
+            exporter = export_certificates_pdf if export_format == "pdf" else export_certificates
+            result = exporter(
+                export_course,
+                progress=lambda fraction, text: progress_bar.progress(min(fraction, 1.0), text=text)
+            )
+            st.success(
+                f"Exported {result['count']} certificates ({result['rendered']} rendered, "
+                f"{result['reused']} unchanged since the last export)."
+            )
+            with open(result["path"], "rb") as f:
+                st.download_button(
+                    f"Download {export_format.upper()}",
+                    data=f,
+                    file_name=f"valid_certificates_{datetime.datetime.now().strftime('%Y%m%d')}.{export_format}",
+                    mime="application/pdf" if export_format == "pdf" else "application/zip",
+                    key=f"download_certificates_{export_format}",
+                    on_click="ignore"
+                )
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Renewal worklist, a range query on the expiry index
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Renewal Worklist")
+    col1, col2 = st.columns(2)
+    with col1:
+        window_days = st.slider("Expiring within (days)", 1, 180, RENEWAL_WINDOW_DAYS, key="renewal_window_days")
+    with col2:
+        overdue_days = st.slider("Include expired within (days)", 0, 365, 0, key="renewal_overdue_days")
+    worklist = renewal_worklist(window_days, overdue_days, export_course)
+    
+    if not worklist:
+        st.info(f"No certifications expire within the next {window_days} days.")
+    else:
+        expiring = sum(1 for row in worklist if row["status"] == "expiring")
+        st.write(f"{expiring} certifications expire within {window_days} days; {len(worklist) - expiring} have expired or were revoked.")
+        st.dataframe(pd.DataFrame([
+            {
+                "User": row["username"],
+                "Name": row["name"],
+                "Course": courses.get(row["course"], {}).get("name", row["course"]),
+                "Certificate ID": row["cert_id"],
+                "Expires": row["expires"],
+                "Days Left": row["days_left"],
+                "Status": row["status"].title()
+            }
+            for row in worklist
+        ]), use_container_width=True, hide_index=True)
+        st.download_button(
+            "Download Worklist (CSV)",
+            data=worklist_csv(worklist),
+            file_name=f"renewal_worklist_{datetime.datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+            key="download_renewal_worklist",
+            on_click="ignore"
+        )
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Revocation; revoked certificates fail public verification and leave the valid list
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Revoked Certificates")
+    with st.form("revoke_certificate_form", clear_on_submit=True):
+        revoke_id = st.text_input("Certificate ID", placeholder="XXXX-XXXX-XXXX-XXXX-XXXX-XXXX")
+        revoke_reason = st.text_input("Reason")
+        if st.form_submit_button("Revoke Certificate"):
+            cert_id = normalize_certificate_code(revoke_id)
+            if not cert_id:
+                st.error("Please enter a certificate ID")
+            elif revoke_certificate(cert_id, st.session_state.username, revoke_reason.strip()):
+                st.success(f"Certificate {cert_id} has been revoked.")
+            else:
+                st.error("Failed to save the revocation")
+    
+    revoked = load_revoked_certificates()
+    if not revoked:
+        st.info("No certificates have been revoked.")
+    else:
+        st.dataframe(pd.DataFrame([
+            {"Certificate ID": cert_id, "Revoked": entry["revoked_at"], "By": entry["revoked_by"], "Reason": entry["reason"]}
+            for cert_id, entry in sorted(revoked.items(), key=lambda item: item[1]["revoked_at"], reverse=True)
+        ]), use_container_width=True, hide_index=True)
+        reinstate_id = st.selectbox("Certificate", options=sorted(revoked), key="reinstate_certificate_id")
+        if st.button("Reinstate Certificate", key="reinstate_certificate_btn"):
+            if reinstate_certificate(reinstate_id):
+                st.success(f"Certificate {reinstate_id} has been reinstated.")
+                st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+
 # modules/pages/admin/system_settings.py
 
-def system_settings():
-    """System settings interface"""
+def system_settings(course=None):
+    """System settings interface (blueprint and exam forms apply to the selected course)"""
     st.subheader("System Settings")
     
     # Load current settings
@@ -1107,8 +1378,8 @@ def system_settings():
         submit_settings = st.form_submit_button("Save Settings")
         
         if submit_settings:
-            # Update settings
-            settings = {
+            # Update settings, keeping keys managed elsewhere (e.g. the quiz blueprint)
+            settings.update({
                 "company_name": company_name,
                 "passing_score": passing_score,
                 "certificate_validity_days": certificate_validity,
@@ -1119,10 +1390,225 @@ def system_settings():
                 "require_reset_password": require_password_reset,
                 "password_expiry_days": password_expiry,
                 "last_updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
+            })
             
             save_settings(settings)
             st.success("Settings updated successfully!")
+            if check_passing_scores():
+                st.info("Passing score changed: all results and certifications are being re-evaluated in the background.")
+    
+    evaluation = pass_evaluation_status()
+    if evaluation["running"]:
+        st.caption("Re-evaluating pass/fail results against the changed passing scores...")
+    elif evaluation["completed_at"]:
+        st.caption(
+            f"Pass/fail last re-evaluated on {evaluation['completed_at']}: "
+            f"{evaluation.get('changed', 0)} results changed, {evaluation.get('issued', 0)} certificates issued, "
+            f"{evaluation.get('revoked', 0)} revoked, {evaluation.get('reinstated', 0)} reinstated."
+        )
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Settings of the selected course
+    course_settings = get_course_settings(course)
+    
+    # Quiz blueprint
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown(f"### Quiz Blueprint: {get_course(course)['name']}")
+    st.write(
+        "Set the relative share of each category and difficulty level in randomized quizzes. "
+        "Leave all weights at 0 to draw in proportion to the question bank."
+    )
+    
+    cell_counts = get_cell_counts(get_question_bank(course))
+    if cell_counts:
+        blueprint = course_settings.get("quiz_blueprint", {})
+        blueprint_df = pd.DataFrame([
+            {
+                "Category": category,
+                "Difficulty": difficulty,
+                "Available": count,
+                "Weight": float(blueprint.get(cell_key(category, difficulty), 0))
+            }
+            for (category, difficulty), count in cell_counts.items()
+        ])
+        
+        edited_blueprint = st.data_editor(
+            blueprint_df,
+            disabled=["Category", "Difficulty", "Available"],
+            column_config={"Weight": st.column_config.NumberColumn(min_value=0.0, step=1.0)},
+            hide_index=True,
+            use_container_width=True,
+            key="quiz_blueprint_editor"
+        )
+        
+        if st.button("Save Blueprint", key="save_blueprint_btn"):
+            course_settings["quiz_blueprint"] = {
+                cell_key(row["Category"], row["Difficulty"]): float(row["Weight"])
+                for _, row in edited_blueprint.iterrows()
+                if row["Weight"] > 0
+            }
+            save_course_settings(course, course_settings)
+            st.success("Quiz blueprint saved!")
+    else:
+        st.info("Add questions to configure the quiz blueprint.")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Exam forms
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown(f"### Exam Forms: {get_course(course)['name']}")
+    st.write(
+        "Pre-assemble parallel certification forms from the quiz blueprint. Forms are drawn "
+        "with a recorded seed, matched on average difficulty and handed out to users in turn."
+    )
+    
+    bank = get_question_bank(course)
+    form_set = load_exam_forms(course)
+    if bank["questions"]:
+        forms_col1, forms_col2, forms_col3 = st.columns(3)
+        with forms_col1:
+            num_forms = st.number_input("Number of Forms", min_value=1, max_value=50,
+                                        value=len(form_set.get("forms", [])) or 4, step=1)
+        with forms_col2:
+            form_questions = st.number_input("Questions per Form", min_value=1, max_value=len(bank["questions"]),
+                                             value=min(form_set.get("num_questions", course_settings.get("default_quiz_questions", 10)),
+                                                       len(bank["questions"])),
+                                             step=1)
+        with forms_col3:
+            form_seed = st.number_input("Seed (0 for random)", min_value=0, value=0, step=1)
+        
+        if st.button("Generate Forms", key="generate_forms_btn"):
+            with st.spinner("Assembling exam forms..."):
+                form_set = generate_forms(
+                    bank,
+                    int(num_forms),
+                    int(form_questions),
+                    blueprint=course_settings.get("quiz_blueprint"),
+                    seed=int(form_seed) or None
+                )
+            if save_forms(form_set, course):
+                st.success(f"Generated {len(form_set['forms'])} forms (seed {form_set['seed']}).")
+            else:
+                st.error("Failed to save exam forms.")
+    else:
+        st.info("Add questions to generate exam forms.")
+    
+    if form_set.get("forms"):
+        usable = {form["form_id"] for form in get_exam_forms(bank)}
+        st.caption(
+            f"Generated {form_set.get('generated_at', '')} with seed {form_set.get('seed')}; "
+            f"pool difficulty {form_set.get('target_difficulty', 0):.2f}"
+        )
+        forms_rows = []
+        for form in form_set["forms"]:
+            form_categories = {}
+            for question in get_questions_by_ids(form["question_ids"], course):
+                category = question.get("category", "General")
+                form_categories[category] = form_categories.get(category, 0) + 1
+            forms_rows.append({
+                "Form": form["form_id"],
+                "Questions": len(form["question_ids"]),
+                "Mean Difficulty": form.get("mean_difficulty"),
+                "Categories": ", ".join(f"{c}: {n}" for c, n in sorted(form_categories.items())),
+                "In Use": form["form_id"] in usable
+            })
+        st.dataframe(pd.DataFrame(forms_rows), hide_index=True, use_container_width=True)
+        
+        # Overlap between forms (share of questions in common)
+        if len(form_set["forms"]) > 1:
+            form_sets = [set(form["question_ids"]) for form in form_set["forms"]]
+            overlaps = [
+                len(a & b) / max(1, min(len(a), len(b)))
+                for i, a in enumerate(form_sets) for b in form_sets[i + 1:]
+            ]
+            st.caption(f"Average overlap between forms: {sum(overlaps) / len(overlaps):.0%}")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Courses
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Courses")
+    st.write(
+        "Each course has its own question bank, exam forms, passing score and certificate. "
+        "The default course uses the passing score and certificate validity from the settings above."
+    )
+    
+    courses = load_courses()
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Course ID": course_id,
+                "Name": record.get("name", course_id),
+                "Passing Score": get_course_settings(course_id).get("passing_score", 80),
+                "Certificate": get_course(course_id)["certificate"]["training"]
+            }
+            for course_id, record in courses.items()
+        ]),
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    # Edit the selected course (passing score and validity only for non-default courses)
+    selected = get_course(course)
+    with st.form(key="course_settings_form"):
+        st.markdown(f"#### Edit {selected['name']}")
+        course_name = st.text_input("Course Name", value=selected["name"])
+        if selected["id"] != DEFAULT_COURSE:
+            course_col1, course_col2 = st.columns(2)
+            with course_col1:
+                course_passing = st.slider("Passing Score (%)", min_value=50, max_value=100,
+                                           value=int(course_settings.get("passing_score", 80)), step=5)
+            with course_col2:
+                course_validity = st.number_input("Certificate Validity (days)", min_value=30, max_value=1095,
+                                                  value=int(course_settings.get("certificate_validity_days", 365)),
+                                                  step=30)
+        certificate_training = st.text_input("Certificate Training Name", value=selected["certificate"]["training"])
+        certificate_statement = st.text_area("Certificate Statement", value=selected["certificate"]["statement"])
+        
+        if st.form_submit_button("Save Course"):
+            record = dict(courses.get(selected["id"], {}))
+            record["name"] = course_name
+            record["certificate"] = dict(
+                record.get("certificate", {}),
+                training=certificate_training,
+                statement=certificate_statement
+            )
+            if selected["id"] != DEFAULT_COURSE:
+                record["settings"] = dict(
+                    record.get("settings", {}),
+                    passing_score=course_passing,
+                    certificate_validity_days=course_validity
+                )
+            courses[selected["id"]] = record
+            save_courses(courses)
+            st.success("Course saved!")
+            if check_passing_scores():
+                st.info("Passing score changed: all results and certifications are being re-evaluated in the background.")
+    
+    # Add a new course
+    with st.form(key="new_course_form"):
+        st.markdown("#### Add Course")
+        new_course_col1, new_course_col2 = st.columns(2)
+        with new_course_col1:
+            new_course_id = st.text_input("Course ID", help="Short identifier, e.g. reach_truck")
+        with new_course_col2:
+            new_course_name = st.text_input("Course Name", help="e.g. Reach Truck Operator Safety")
+        
+        if st.form_submit_button("Add Course"):
+            course_id = new_course_id.strip().lower().replace(" ", "_")
+            if not course_id or not course_id.replace("_", "").replace("-", "").isalnum():
+                st.error("Course ID may only contain letters, numbers, dashes and underscores.")
+            elif course_id in courses:
+                st.error(f"Course '{course_id}' already exists.")
+            else:
+                courses[course_id] = {
+                    "name": new_course_name or course_id,
+                    "settings": {"passing_score": settings.get("passing_score", 80)},
+                    "certificate": {"training": f"{new_course_name or course_id} Training"}
+                }
+                save_courses(courses)
+                st.success(f"Course '{course_id}' added. Select it above to add questions.")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1154,18 +1640,14 @@ def branding_settings():
         
         # Save button
         if st.button("Save Logo", key="save_logo_btn"):
-            # Ensure the assets directory exists
-            os.makedirs(os.path.dirname(LOGO_PATH), exist_ok=True)
-            
             # Save the uploaded logo
-            with open(LOGO_PATH, "wb") as f:
-                f.write(uploaded_logo.getbuffer())
+            save_logo(uploaded_logo.getbuffer())
             st.success("Logo uploaded successfully! It will appear throughout the app.")
     
     # Remove logo option
     if os.path.exists(LOGO_PATH):
         if st.button("Remove Logo", key="remove_logo_btn"):
-            os.remove(LOGO_PATH)
+            remove_logo()
             st.success("Logo removed successfully.")
             st.rerun()
     
@@ -1186,7 +1668,8 @@ def branding_settings():
         "Sample User",
         "92.5",
         datetime.datetime.now().strftime("%B %d, %Y"),
-        "SAMPLE123"
+        "SAMPLE123",
+        course=st.session_state.get("admin_course")
     )
     
     # Display certificate preview using base64 encoding
@@ -1194,4 +1677,78 @@ def branding_settings():
     iframe_html = f'<iframe src="data:text/html;base64,{b64_cert}" width="100%" height="500" style="border: 1px solid #ddd; border-radius: 5px;"></iframe>'
     st.markdown(iframe_html, unsafe_allow_html=True)
     
-    st.markdown('</div>', unsafe_allow_html=True)  
\ No newline at end of file
+    st.markdown('</div>', unsafe_allow_html=True)  
+
+
+# modules/pages/admin/system_diagnostics.py
+
+def system_diagnostics():
+    """Runtime diagnostics for shared caches and active sessions"""
+    st.subheader("System Diagnostics")
+    
+    # Shared question bank
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Shared Question Banks")
+    
+    # Only courses someone has used since the server started are loaded
+    banks = [get_question_bank(course) for course in loaded_courses()]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Loaded Courses", f"{len(banks)} / {len(load_courses())}")
+    with col2:
+        st.metric("Cached Questions", sum(len(bank["questions"]) for bank in banks))
+    with col3:
+        bank_kb = sum(estimate_size(dict(q)) for bank in banks for q in bank["questions"]) / 1024
+        st.metric("Bank Size", f"{bank_kb:.1f} KB", help="Shared by all sessions; quiz sessions only store question IDs")
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Per-session state size
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.markdown("### Active Sessions")
+    
+    # Other sessions are measured periodically; this one is measured now
+    sizes = record_session_state_size(force=True) or {}
+    sessions = get_session_diagnostics()
+    if sessions:
+        sessions_df = pd.DataFrame(sessions)
+        sessions_df["last_seen"] = pd.to_datetime(sessions_df["last_seen"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+        sessions_df["state_kb"] = (sessions_df["state_bytes"] / 1024).round(2)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Active Sessions", len(sessions_df))
+        with col2:
+            st.metric("Average State Size", f"{sessions_df['state_kb'].mean():.2f} KB")
+        with col3:
+            st.metric("Open Timed Attempts", count_open_attempts(), help="Submitted automatically at their deadline")
+        
+        st.dataframe(
+            sessions_df.reindex(columns=[
+                "username", "current_page", "state_kb", "state_keys", "full_runs", "fragment_runs",
+                "script_cpu_ms", "fragment_cpu_ms", "last_seen"
+            ]).rename(columns={
+                "username": "User",
+                "current_page": "Page",
+                "state_kb": "State Size (KB)",
+                "state_keys": "Keys",
+                "full_runs": "Full Runs",
+                "fragment_runs": "Question Card Runs",
+                "script_cpu_ms": "Full Run CPU (ms)",
+                "fragment_cpu_ms": "Question Card CPU (ms)",
+                "last_seen": "Last Seen"
+            }),
+            use_container_width=True
+        )
+    else:
+        st.info("No session metrics recorded yet.")
+    
+    # Breakdown for the current session
+    with st.expander("Current Session State Breakdown"):
+        breakdown_df = pd.DataFrame(
+            sorted(sizes.items(), key=lambda item: item[1], reverse=True),
+            columns=["Key", "Size (bytes)"]
+        )
+        st.dataframe(breakdown_df, use_container_width=True)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
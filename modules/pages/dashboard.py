@@ -1,17 +1,18 @@
 import streamlit as st
 import pandas as pd
 import datetime
-from modules.ui import load_css, display_logo, apply_custom_css_class, navigate_to
-from modules.data_manager import get_user_scores, get_score_statistics, load_questions, load_settings
+from modules.ui import display_logo, apply_custom_css_class, navigate_to
+from modules.certifications import get_certification
+from modules.data_manager import (
+    get_user_scores, get_score_statistics, load_questions, load_courses, get_course_settings, DEFAULT_COURSE,
+    revoked_certificate_ids, score_passed
+)
 
 def dashboard_page():
     """
     Modern dashboard interface for users showing their performance metrics,
     upcoming certifications, and quick access to key functions
     """
-    # Apply custom CSS
-    st.markdown(load_css(), unsafe_allow_html=True)
-    
     # Display logo
     display_logo()
     
@@ -26,12 +27,23 @@ def dashboard_page():
         </div>
     """, unsafe_allow_html=True)
     
+    # Course shown on the dashboard (scores, certification and question bank are per course)
+    courses = load_courses()
+    course = DEFAULT_COURSE
+    if len(courses) > 1:
+        course = st.selectbox(
+            "Course",
+            options=list(courses),
+            format_func=lambda c: courses[c].get("name", c),
+            key="dashboard_course"
+        )
+    
     # Get user data
     username = st.session_state.username
-    user_scores = get_user_scores(username)
-    user_stats = get_score_statistics(username)
-    questions = load_questions()
-    settings = load_settings()
+    user_scores = get_user_scores(username, course=course)
+    user_stats = get_score_statistics(username, course=course)
+    questions = load_questions(course)
+    settings = get_course_settings(course)
     
     # Quick actions buttons in a grid
     st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
@@ -40,24 +52,18 @@ def dashboard_page():
     
     with col1:
         st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-        if st.button("🚀 Start New Quiz", key="start_quiz_btn", use_container_width=True):
-            navigate_to("quiz")
-            st.rerun()
+        st.button("🚀 Start New Quiz", key="start_quiz_btn", use_container_width=True, on_click=navigate_to, args=("quiz",))
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<div class="ghost-btn">', unsafe_allow_html=True)
-        if st.button("📊 View All Scores", key="view_scores_btn", use_container_width=True):
-            navigate_to("scores")
-            st.rerun()
+        st.button("📊 View All Scores", key="view_scores_btn", use_container_width=True, on_click=navigate_to, args=("scores",))
         st.markdown('</div>', unsafe_allow_html=True)
     
     if st.session_state.role == "admin":
         with col3:
             st.markdown('<div class="ghost-btn">', unsafe_allow_html=True)
-            if st.button("⚙️ Admin Panel", key="admin_panel_btn", use_container_width=True):
-                navigate_to("admin")
-                st.rerun()
+            st.button("⚙️ Admin Panel", key="admin_panel_btn", use_container_width=True, on_click=navigate_to, args=("admin",))
             st.markdown('</div>', unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
@@ -121,9 +127,9 @@ def dashboard_page():
             latest_date = datetime.datetime.strptime(latest["timestamp"], "%Y-%m-%d %H:%M:%S")
             formatted_date = latest_date.strftime("%B %d, %Y at %I:%M %p")
             
-            # Calculate pass/fail status
+            # Pass/fail as stored with the score (kept current when the passing score changes)
             passing_score = settings.get("passing_score", 80)
-            passed = latest["percentage"] >= passing_score
+            passed = score_passed(latest)
             
             # Display with appropriate colors based on pass/fail
             if passed:
@@ -204,18 +210,37 @@ def dashboard_page():
         has_valid_cert = False
         if user_scores:
             passing_score = settings.get("passing_score", 80)
-            validity_days = settings.get("certificate_validity_days", 365)
             
-            # Find the most recent passing score
-            passing_scores = [s for s in user_scores if s["percentage"] >= passing_score]
-            if passing_scores:
-                last_pass = passing_scores[0]  # Already sorted by date
-                cert_date = datetime.datetime.strptime(last_pass["timestamp"], "%Y-%m-%d %H:%M:%S")
-                expiry_date = cert_date + datetime.timedelta(days=validity_days)
+            # Current certification (most recent passing score) from the certification index
+            certification = get_certification(username, course)
+            if certification:
+                cert_date = datetime.datetime.fromisoformat(certification["issued"])
+                expiry_date = datetime.datetime.fromisoformat(certification["expires"])
                 
                 # Check if certificate is still valid
                 now = datetime.datetime.now()
-                if now < expiry_date:
+                cert_id = certification["cert_id"]
+                if cert_id in revoked_certificate_ids():
+                    # Revoked certificate
+                    st.markdown(f"""
+                        <div style="text-align: center; margin-bottom: 15px;">
+                            <div style="font-size: 64px; color: #F44336; margin-bottom: 10px;">
+                                <i>✗</i>
+                            </div>
+                            <p style="font-weight: 600; font-size: 18px; color: #F44336; margin-bottom: 5px;">
+                                Certification Revoked
+                            </p>
+                            <p style="color: #666; margin-bottom: 15px;">
+                                Certificate {cert_id} was revoked by an administrator
+                            </p>
+                            <div style="background-color: #ffebee; padding: 8px; border-radius: 10px;">
+                                <p style="margin: 0; color: #C62828;">
+                                    Please contact your training administrator
+                                </p>
+                            </div>
+                        </div>
+                    """, unsafe_allow_html=True)
+                elif now < expiry_date:
                     has_valid_cert = True
                     
                     # Calculate days remaining
@@ -241,20 +266,35 @@ def dashboard_page():
                         </div>
                     """, unsafe_allow_html=True)
                     
-                    # Download certificate button
-                    from modules.certificate import create_certificate
+                    # Download certificate button; the file is rendered once per certificate
+                    # and served by link, so reruns do not resend it
+                    from modules.certificate import get_certificate_file
                     
-                    cert_html = create_certificate(
-                        st.session_state.name, 
-                        f"{last_pass['percentage']:.1f}", 
-                        cert_date.strftime("%B %d, %Y"),
-                        last_pass.get("id", "")
+                    cert_args = (
+                        cert_id,
+                        certification["name"],
+                        f"{certification['score']:.1f}",
+                        cert_date.strftime("%B %d, %Y")
                     )
-                    
-                    import base64
-                    b64 = base64.b64encode(cert_html.encode()).decode()
-                    download_button = f'<a href="data:text/html;base64,{b64}" download="forklift_certificate.html" class="certificate-button">Download Certificate</a>'
-                    st.markdown(download_button, unsafe_allow_html=True)
+                    cert_col1, cert_col2 = st.columns(2)
+                    with cert_col1:
+                        st.download_button(
+                            "Download Certificate",
+                            data=get_certificate_file(*cert_args, course=course),
+                            file_name="forklift_certificate.html",
+                            mime="text/html",
+                            key="dashboard_certificate_download",
+                            on_click="ignore"
+                        )
+                    with cert_col2:
+                        st.download_button(
+                            "Download PDF",
+                            data=get_certificate_file(*cert_args, course=course, file_format="pdf"),
+                            file_name="forklift_certificate.pdf",
+                            mime="application/pdf",
+                            key="dashboard_certificate_pdf_download",
+                            on_click="ignore"
+                        )
                 else:
                     # Expired certificate
                     st.markdown(f"""
@@ -1,19 +1,16 @@
 # modules/pages/documentation.py
 
 import streamlit as st
-from ..ui import load_css, display_logo
+from ..ui import display_logo, navigate_to
 
 def documentation_page():
     """Display the application documentation for administrators"""
     # Security check - only allow admins to view documentation
     if st.session_state.role != "admin":
         st.error("You do not have permission to access this page.")
-        st.button("Return to Quiz", on_click=lambda: navigate_to("quiz"))
+        st.button("Return to Quiz", on_click=navigate_to, args=("quiz",))
         return
 
-    # Apply custom CSS
-    st.markdown(load_css(), unsafe_allow_html=True)
-    
     # Display logo
     display_logo()
     
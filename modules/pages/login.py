@@ -1,11 +1,8 @@
 import streamlit as st
-from ..ui import load_css, display_logo, navigate_to
+from ..ui import display_logo, navigate_to
 from ..auth import authenticate, add_user
 
 def login_page():
-    # Apply custom CSS
-    st.markdown(load_css(), unsafe_allow_html=True)
-    
     # Display logo
     display_logo()
     
@@ -55,4 +52,7 @@ def login_page():
                     else:
                         st.error(message)
         
-        st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Certificate verification is open to anyone, e.g. employers checking a certificate
+    st.button("🔎 Verify a Certificate", key="verify_certificate_link", on_click=navigate_to, args=("verify",))
\ No newline at end of file
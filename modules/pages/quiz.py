@@ -1,24 +1,170 @@
 import streamlit as st
-import random
-import base64
+import os
 import datetime
 import time
-from modules.ui import load_css, display_logo, navigate_to, apply_custom_css_class
-from modules.data_manager import load_questions, save_quiz_score, load_user_settings, save_user_settings
-from modules.certificate import create_certificate
+import threading
+from array import array
+from collections import OrderedDict
+from types import MappingProxyType
+import numpy as np
+from modules.ui import display_logo, navigate_to, apply_custom_css_class
+from modules.data_manager import (
+    get_question_bank, get_questions_by_ids, get_questions_by_versions, new_attempt_id, load_user_settings,
+    save_user_settings, load_courses, get_course, get_course_settings, DEFAULT_COURSE
+)
+from modules.quiz_assembly import assemble_quiz, category_mask, get_exposure_counts, record_exposure
+from modules.irt import get_bank_parameters, estimate_ability, select_next_item, adaptive_decision, cut_theta
+from modules.attempts import new_attempt, restore_attempt, is_expired, random_option_code, option_order
+from modules.deadlines import register_deadline, submit_attempt, discard_attempt, get_open_attempt
+from modules.checkpoints import start_journal, journal_answer, journal_question, list_journals
+from modules.countdown import countdown_timer
+from modules.exam_forms import get_exam_forms, next_exam_form
+from modules.diagnostics import record_session_metrics, increment_session_metric
+from modules.certificate import get_certificate_file
+from modules.review_queue import has_due_questions, take_due_questions
+
+# Results views of finished attempts, built once and shared by every rerun
+RESULT_SUMMARY_CACHE_SIZE = 128
+_summary_lock = threading.Lock()
+_summaries = OrderedDict()  # {attempt_id: summary}, least recently used first
+
+def _category_color(percentage):
+    """Bar color for a category score"""
+    if percentage >= 80:
+        return "#4CAF50"  # Green
+    if percentage >= 70:
+        return "#FF9800"  # Orange
+    return "#F44336"  # Red
+
+def build_attempt_summary(attempt, result, questions, name):
+    """
+    Build the immutable results summary of a finished attempt
+
+    Everything the results view shows is rendered here once: the category
+    bars, the review of incorrect answers and the certificate with the ID
+    that was saved with the score.
+
+    Args:
+        attempt (dict): Finished attempt record
+        result (dict): Result from attempts.finalize_attempt()
+        questions (list): Questions of the attempt, in order
+        name (str): Name printed on the certificate
+
+    Returns:
+        MappingProxyType: Read-only summary
+    """
+    bars = []
+    for category, data in result["categories"].items():
+        correct, total = data["correct"], data["total"]
+        cat_percentage = (correct / total) * 100 if total > 0 else 0
+        bars.append(f"""
+            <div style="margin-bottom: 10px;">
+                <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
+                    <span><strong>{category}</strong></span>
+                    <span>{correct}/{total} ({cat_percentage:.1f}%)</span>
+                </div>
+                <div style="width: 100%; background-color: #f0f0f0; border-radius: 10px; height: 10px;">
+                    <div style="width: {cat_percentage}%; background-color: {_category_color(cat_percentage)}; height: 10px; border-radius: 10px;"></div>
+                </div>
+            </div>
+        """)
+
+    # Questions whose version could not be read are missing, so pair answers by quiz position
+    selected_answers = attempt["selected"]
+    quiz_position = {qid: idx for idx, qid in enumerate(attempt["question_ids"])}
+    answers = ((question, selected_answers[quiz_position[question["id"]]]) for question in questions)
+    incorrect = [
+        (question, selected) for question, selected in answers
+        if selected >= 0 and selected != question["answer"]
+    ]
+    review = "".join(f"""
+        <div style="margin-bottom: 20px; padding: 15px; border-left: 3px solid #F44336; background-color: rgba(244, 67, 54, 0.05);">
+            <p style="font-weight: 600; margin-bottom: 10px;">{question["question"]}</p>
+            <p style="color: #F44336; margin-bottom: 5px;">
+                <span style="font-weight: 600;">Your answer:</span> {question["options"][selected]}
+            </p>
+            <p style="color: #4CAF50; margin-bottom: 10px;">
+                <span style="font-weight: 600;">Correct answer:</span> {question["options"][question["answer"]]}
+            </p>
+            <p style="font-style: italic; color: #555;">
+                <span style="font-weight: 600;">Explanation:</span> {question["explanation"]}
+            </p>
+        </div>
+    """ for question, selected in incorrect)
+
+    # Certificate with the ID stored with the score (passing, non-practice attempts only);
+    # only its fields are kept, the file is rendered for the download button
+    certificate_id = result["details"].get("certificate_id")
+    certificate = None
+    if certificate_id:
+        certificate = MappingProxyType({
+            "cert_id": certificate_id,
+            "name": result["details"].get("certificate_name", name),
+            "score": f"{result['percentage']:.1f}",
+            "date": datetime.datetime.fromtimestamp(result["completed_at"]).strftime("%B %d, %Y"),
+            "course": attempt.get("course"),
+        })
+
+    return MappingProxyType({
+        "attempt_id": attempt["attempt_id"],
+        "mode": attempt["mode"],
+        "score": result["score"],
+        "max_score": result["max_score"],
+        "percentage": result["percentage"],
+        "passed": result["passed"],
+        "passing_score": result["passing_score"],
+        "time_taken": result["time_taken"],
+        "timed_out": result["timed_out"],
+        "category_html": "".join(bars),
+        "incorrect_count": len(incorrect),
+        "review_html": review,
+        "certificate": certificate,
+    })
+
+def get_attempt_summary(attempt, result, questions, name):
+    """
+    Get the results summary of a finished attempt, building it on first use
+
+    Args:
+        attempt (dict): Finished attempt record
+        result (dict): Result from attempts.finalize_attempt()
+        questions (list): Questions of the attempt, in order
+        name (str): Name printed on the certificate
+
+    Returns:
+        MappingProxyType: Read-only summary, cached by attempt ID
+    """
+    attempt_id = attempt["attempt_id"]
+    with _summary_lock:
+        summary = _summaries.get(attempt_id)
+        if summary is not None:
+            _summaries.move_to_end(attempt_id)
+            return summary
+
+    summary = build_attempt_summary(attempt, result, questions, name)
+    with _summary_lock:
+        _summaries[attempt_id] = summary
+        while len(_summaries) > RESULT_SUMMARY_CACHE_SIZE:
+            _summaries.popitem(last=False)
+    return summary
 
 def quiz_page():
     """Main function for the quiz page with enhanced features"""
-    # Apply custom CSS
-    st.markdown(load_css(), unsafe_allow_html=True)
-    
     # Display logo
     display_logo()
     
+    # Course of the current attempt, otherwise the one picked in the quiz settings
+    current_attempt = st.session_state.get("quiz_attempt")
+    if current_attempt is not None and (st.session_state.get("quiz_in_progress") or st.session_state.get("quiz_complete")):
+        course = current_attempt.get("course", DEFAULT_COURSE)
+    else:
+        course = st.session_state.get("quiz_course", DEFAULT_COURSE)
+    course_info = get_course(course)
+    
     # Quiz title with badge
-    st.markdown("""
+    st.markdown(f"""
         <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-            <h1 style="margin: 0; margin-right: 15px;">Forklift Operator Safety Quiz</h1>
+            <h1 style="margin: 0; margin-right: 15px;">{course_info["name"]} Quiz</h1>
             <span style="background-color: #e3f2fd; color: #1E88E5; padding: 5px 10px; 
                    border-radius: 20px; font-size: 0.8rem; font-weight: 500;">
                 OSHA Compliant
@@ -27,54 +173,96 @@ def quiz_page():
     """, unsafe_allow_html=True)
     
     # Define helper functions first before using them
-    def get_category_scores(questions):
-        """Calculate scores by category"""
-        category_scores = {}
-        for idx, question in enumerate(questions):
-            category = question.get("category", "General")
-            if category not in category_scores:
-                category_scores[category] = {"correct": 0, "total": 0}
-            
-            category_scores[category]["total"] += 1
-            if idx in st.session_state.correct_answers:
-                category_scores[category]["correct"] += 1
-        
-        return category_scores
-
     def check_answer(selected_option, question_idx):
         """Handle answer submission"""
-        question = st.session_state.quiz_questions[question_idx]
+        question = quiz_questions[question_idx]
         correct_answer = question["answer"]
         
-        # Store the user's selection
+        # Store the user's selection and how long it took
         st.session_state.selected_answers[question_idx] = selected_option
+        shown_idx, shown_at = st.session_state.quiz_shown_at
+        if shown_idx == question_idx:
+            st.session_state.quiz_answer_latency[question_idx] = int((time.time() - shown_at) * 1000)
+        journal_answer(st.session_state.quiz_attempt, question_idx)
         
-        if selected_option == correct_answer:
+        is_correct = selected_option == correct_answer
+        if is_correct:
             st.session_state.score += 1
             st.session_state.correct_answers.append(question_idx)
-            return True
         else:
             st.session_state.incorrect_answers.append(question_idx)
+        
+        if st.session_state.quiz_mode == "adaptive":
+            update_ability()
+        
+        return is_correct
+
+    def update_ability():
+        """Re-estimate ability from all answers so far and check for a pass/fail decision"""
+        params = get_bank_parameters(bank)
+        answered = [
+            i for i, sel in enumerate(st.session_state.selected_answers)
+            if sel >= 0 and st.session_state.quiz_question_ids[i] in bank["index"]
+        ]
+        positions = [bank["index"][st.session_state.quiz_question_ids[i]] for i in answered]
+        correct = np.array([i in st.session_state.correct_answers for i in answered], dtype=float)
+        
+        theta, sd = estimate_ability(params["a"][positions], params["b"][positions], correct)
+        st.session_state.quiz_adaptive_ability = (theta, sd)
+        st.session_state.quiz_adaptive_decision = adaptive_decision(
+            theta, sd, st.session_state.quiz_adaptive_cut, len(answered), st.session_state.quiz_adaptive_max
+        )
+
+    def add_adaptive_question():
+        """Append the most informative remaining question; returns False if none is left"""
+        params = get_bank_parameters(bank)
+        eligible = category_mask(bank, st.session_state.quiz_adaptive_categories)
+        eligible[[bank["index"][qid] for qid in st.session_state.quiz_question_ids]] = False
+        
+        theta, _ = st.session_state.quiz_adaptive_ability
+        position = select_next_item(theta, params["a"], params["b"], eligible)
+        if position is None:
             return False
+        
+        question = bank["questions"][position]
+        option_code = random_option_code(len(question["options"])) if st.session_state.quiz_shuffle_options else 0
+        st.session_state.quiz_question_ids.append(question["id"])
+        st.session_state.quiz_attempt["question_versions"].append(question["version"])
+        st.session_state.quiz_attempt["option_codes"].append(option_code)
+        st.session_state.selected_answers.append(-1)
+        st.session_state.quiz_answer_latency.append(0)
+        journal_question(st.session_state.quiz_attempt, question["id"], question["version"], option_code)
+        return True
+
+    def is_last_question():
+        """Whether the current question ends the quiz"""
+        if st.session_state.current_question < len(quiz_questions) - 1:
+            return False
+        if st.session_state.quiz_mode == "adaptive":
+            return st.session_state.quiz_adaptive_decision is not None
+        return True
 
     def next_question():
         """Go to next question or complete quiz"""
-        if st.session_state.current_question < len(st.session_state.quiz_questions) - 1:
+        if not is_last_question() and (
+            st.session_state.current_question < len(quiz_questions) - 1 or add_adaptive_question()
+        ):
             st.session_state.current_question += 1
             st.session_state.answered = False
         else:
-            st.session_state.quiz_complete = True
-            st.session_state.quiz_in_progress = False
-            
-            # Save the score when quiz is complete
-            score = st.session_state.score
-            max_score = len(st.session_state.quiz_questions)
-            save_quiz_score(
-                st.session_state.username, 
-                score, 
-                max_score,
-                categories=get_category_scores(st.session_state.quiz_questions)
+            finish_quiz()
+
+    def finish_quiz():
+        """Submit the attempt and switch to the results view"""
+        # Saved exactly once, whether here or by the deadline scheduler
+        st.session_state.quiz_result = submit_attempt(st.session_state.quiz_attempt)
+        if st.session_state.quiz_result is not None:
+            # Render the results once; later reruns reuse the cached summary
+            get_attempt_summary(
+                st.session_state.quiz_attempt, st.session_state.quiz_result, quiz_questions, st.session_state.name
             )
+        st.session_state.quiz_complete = True
+        st.session_state.quiz_in_progress = False
 
     def prev_question():
         """Go to previous question"""
@@ -82,11 +270,171 @@ def quiz_page():
             st.session_state.current_question -= 1
             st.session_state.answered = True  # Allow reviewing previous answers
 
+    def submit_answer(question_idx):
+        """Grade the selected option (Submit Answer button callback)"""
+        # Answers after the deadline are not accepted; the card submits the quiz instead
+        if is_expired(st.session_state.quiz_attempt):
+            return
+        check_answer(st.session_state[f"q{question_idx}"], question_idx)
+        st.session_state.answered = True
+
+    def start_quiz(num_questions, selected_categories, timer_enabled, timer_minutes, mode, randomize, shuffle_options):
+        """Set up a new quiz attempt from the quiz settings (Start Quiz button callback)"""
+        extra = {"timer_minutes": timer_minutes if timer_enabled else 0, "shuffle_options": shuffle_options}
+        adaptive = mode == "adaptive"
+        form = next_exam_form(bank) if mode == "form" else None
+        if adaptive:
+            # Start at average ability with the most informative question;
+            # exposure is recorded when the quiz finishes
+            params = get_bank_parameters(bank)
+            pool = category_mask(bank, selected_categories)
+            passing_score = get_course_settings(course).get("passing_score", 80)
+            extra["adaptive_max"] = num_questions
+            extra["adaptive_cut"] = cut_theta(params["a"][pool], params["b"][pool], passing_score)
+            first = select_next_item(0.0, params["a"], params["b"], pool)
+            question_ids = [bank["questions"][first]["id"]]
+        elif form is not None:
+            # Pre-generated certification form, handed out round-robin; its
+            # question list is shared as is, not copied
+            question_ids = form["question_ids"]
+            selected_categories = sorted(set(
+                bank["questions"][bank["index"][qid]].get("category", "General") for qid in question_ids
+            ))
+        elif mode == "review":
+            # Questions due in the user's spaced-repetition queue, earliest due first
+            question_ids = take_due_questions(st.session_state.username, course, num_questions, bank["index"])
+            if not question_ids:
+                return
+            selected_categories = sorted(set(
+                bank["questions"][bank["index"][qid]].get("category", "General") for qid in question_ids
+            ))
+        elif randomize:
+            # Stratified selection following the quiz blueprint, with exposure control
+            question_ids = assemble_quiz(
+                bank,
+                num_questions,
+                categories=selected_categories,
+                blueprint=get_course_settings(course).get("quiz_blueprint"),
+                exposure=get_exposure_counts(bank)
+            )
+        else:
+            # Take first N questions
+            question_ids = [
+                q["id"] for q in bank["questions"] if q.get("category", "General") in selected_categories
+            ][:num_questions]
+        # Practice and review quizzes leave the exposure counts of certification quizzes alone
+        if not adaptive and mode not in ("practice", "review"):
+            record_exposure(bank, question_ids)
+        
+        # Option order per question, kept as one small integer instead of a reordered copy
+        rng = np.random.default_rng()
+        option_codes = array('I', [
+            random_option_code(len(bank["questions"][bank["index"][qid]]["options"]), rng) if shuffle_options else 0
+            for qid in question_ids
+        ])
+        
+        # Shared attempt record; timed attempts are submitted at their
+        # deadline by the scheduler even if this session goes away
+        attempt = new_attempt(
+            new_attempt_id(st.session_state.username),
+            st.session_state.username,
+            mode if mode in ("adaptive", "practice", "review") else "standard",
+            question_ids,
+            array('b', [-1] * len(question_ids)),
+            array('I', [0] * len(question_ids)),
+            selected_categories,
+            duration=timer_minutes * 60 if timer_enabled else None,
+            question_versions=[bank["questions"][bank["index"][qid]]["version"] for qid in question_ids],
+            form_id=form["form_id"] if form is not None else None,
+            option_codes=option_codes,
+            course=course
+        )
+        register_deadline(attempt)
+        
+        # Checkpoint journal, so the attempt survives a lost connection or server restart
+        start_journal(attempt, extra)
+        use_attempt(attempt, extra)
+
+    def attempt_questions(attempt):
+        """Questions of an attempt as they were handed out (current bank versions for older attempts)"""
+        if attempt is not None and len(attempt.get("question_versions") or []) == len(attempt["question_ids"]):
+            return get_questions_by_versions(attempt["question_ids"], attempt["question_versions"])
+        if attempt is None:
+            return get_questions_by_ids(st.session_state.quiz_question_ids, course)
+        return get_questions_by_ids(attempt["question_ids"], attempt.get("course", DEFAULT_COURSE))
+
+    def use_attempt(attempt, extra):
+        """Point the quiz session state at a new or resumed attempt"""
+        st.session_state.quiz_attempt = attempt
+        st.session_state.quiz_attempt_id = attempt["attempt_id"]
+        st.session_state.quiz_mode = attempt["mode"]
+        st.session_state.quiz_question_ids = attempt["question_ids"]
+        st.session_state.selected_answers = attempt["selected"]
+        st.session_state.quiz_answer_latency = attempt["latency_ms"]
+        st.session_state.quiz_shown_at = (-1, 0.0)
+        st.session_state.pop("quiz_result", None)
+        
+        # Score and position from the answers given so far (none for a new attempt)
+        answer_key = {q["id"]: q["answer"] for q in attempt_questions(attempt)}
+        answered = [i for i, sel in enumerate(attempt["selected"]) if sel >= 0]
+        st.session_state.correct_answers = [
+            i for i in answered
+            if answer_key.get(attempt["question_ids"][i]) == attempt["selected"][i]
+        ]
+        st.session_state.incorrect_answers = [i for i in answered if i not in st.session_state.correct_answers]
+        st.session_state.score = len(st.session_state.correct_answers)
+        unanswered = [i for i, sel in enumerate(attempt["selected"]) if sel < 0]
+        st.session_state.current_question = unanswered[0] if unanswered else len(attempt["question_ids"]) - 1
+        st.session_state.answered = not unanswered
+        st.session_state.quiz_complete = False
+        st.session_state.quiz_in_progress = True
+        
+        # Set timer if enabled
+        st.session_state.quiz_timer_enabled = attempt["deadline"] is not None
+        st.session_state.quiz_timer_duration = extra.get("timer_minutes", 0)
+        st.session_state.quiz_shuffle_options = extra.get("shuffle_options", False)
+        
+        if attempt["mode"] == "adaptive":
+            st.session_state.quiz_adaptive_categories = attempt["categories"]
+            st.session_state.quiz_adaptive_max = extra["adaptive_max"]
+            st.session_state.quiz_adaptive_cut = extra["adaptive_cut"]
+            st.session_state.quiz_adaptive_ability = (0.0, 1.0)
+            st.session_state.quiz_adaptive_decision = None
+            if answered:
+                update_ability()
+
+    def resume_quiz(path):
+        """Continue an unfinished attempt from its journal (Resume attempt button callback)"""
+        restored = restore_attempt(path)
+        if restored is None:
+            return
+        attempt, extra = restored
+        
+        # A timed attempt may already be registered with the scheduler; share its record
+        attempt = get_open_attempt(attempt["attempt_id"]) or attempt
+        register_deadline(attempt)
+        use_attempt(attempt, extra)
+
+    def discard_saved_attempt(path):
+        """Drop an unfinished attempt without saving it (Discard button callback)"""
+        restored = restore_attempt(path)
+        if restored is None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return
+        discard_attempt(get_open_attempt(restored[0]["attempt_id"]) or restored[0])
+
+    def select_course():
+        """Remember the picked course (Course selectbox callback)"""
+        st.session_state.quiz_course = st.session_state.quiz_course_select
+
     def restart_quiz():
         """Reset quiz state to start over"""
         # Clear all quiz-related session state
-        if 'quiz_questions' in st.session_state:
-            del st.session_state.quiz_questions
+        if 'quiz_question_ids' in st.session_state:
+            del st.session_state.quiz_question_ids
         if 'current_question' in st.session_state:
             del st.session_state.current_question
         if 'score' in st.session_state:
@@ -103,14 +451,33 @@ def quiz_page():
             del st.session_state.incorrect_answers
         if 'selected_answers' in st.session_state:
             del st.session_state.selected_answers
-        if 'quiz_timer_start' in st.session_state:
-            del st.session_state.quiz_timer_start
-        if 'quiz_timer_remaining' in st.session_state:
-            del st.session_state.quiz_timer_remaining
+        if 'quiz_attempt' in st.session_state:
+            del st.session_state.quiz_attempt
+        if 'quiz_result' in st.session_state:
+            del st.session_state.quiz_result
+        if 'quiz_mode' in st.session_state:
+            del st.session_state.quiz_mode
+        if 'quiz_attempt_id' in st.session_state:
+            del st.session_state.quiz_attempt_id
+        if 'quiz_answer_latency' in st.session_state:
+            del st.session_state.quiz_answer_latency
+        if 'quiz_shown_at' in st.session_state:
+            del st.session_state.quiz_shown_at
+        if 'quiz_shuffle_options' in st.session_state:
+            del st.session_state.quiz_shuffle_options
+        for key in [k for k in st.session_state.keys() if k.startswith("quiz_adaptive_")]:
+            del st.session_state[key]
+
+    def abandon_quiz():
+        """Drop the open attempt and start over (Abandon Quiz button callback)"""
+        if 'quiz_attempt' in st.session_state:
+            discard_attempt(st.session_state.quiz_attempt)
+        restart_quiz()
     
     # Initialize all quiz-related session state variables if they don't exist
-    if 'quiz_questions' not in st.session_state:
-        st.session_state.quiz_questions = []
+    # Only question IDs live in session state; the text is shared via the question bank cache
+    if 'quiz_question_ids' not in st.session_state:
+        st.session_state.quiz_question_ids = []
     
     if 'current_question' not in st.session_state:
         st.session_state.current_question = 0
@@ -124,6 +491,9 @@ def quiz_page():
     if 'quiz_complete' not in st.session_state:
         st.session_state.quiz_complete = False
     
+    if 'quiz_mode' not in st.session_state:
+        st.session_state.quiz_mode = "standard"
+    
     if 'quiz_in_progress' not in st.session_state:
         st.session_state.quiz_in_progress = False
     
@@ -134,7 +504,8 @@ def quiz_page():
         st.session_state.incorrect_answers = []
     
     if 'selected_answers' not in st.session_state:
-        st.session_state.selected_answers = {}
+        # Selected option per question, -1 while unanswered
+        st.session_state.selected_answers = array('b')
     
     # Initialize timer if it's enabled
     if 'quiz_timer_enabled' not in st.session_state:
@@ -142,12 +513,39 @@ def quiz_page():
         st.session_state.quiz_timer_enabled = False
         st.session_state.quiz_timer_duration = 0
     
-    if 'quiz_timer_start' not in st.session_state and st.session_state.quiz_timer_enabled:
-        st.session_state.quiz_timer_start = time.time()
-        st.session_state.quiz_timer_remaining = st.session_state.quiz_timer_duration * 60
+    # Load all questions from the shared question bank
+    bank = get_question_bank(course)
+    all_questions = bank["questions"]
+    
+    # Resolve the current quiz's questions in the versions it was given
+    quiz_questions = attempt_questions(st.session_state.get("quiz_attempt"))
+    if st.session_state.quiz_in_progress and len(quiz_questions) != len(st.session_state.quiz_question_ids):
+        # Some questions could not be read. The attempt is never dropped: a timed
+        # one is submitted with the answers given so far (grading skips the missing
+        # questions), any other one is kept until its questions can be read again
+        attempt = st.session_state.get("quiz_attempt")
+        if attempt is not None and attempt["status"] == "open" and attempt["deadline"] is not None:
+            st.error("Some questions of your quiz could not be loaded, so it was submitted with the answers given so far.")
+            finish_quiz()
+        elif attempt is None or attempt["status"] == "open":
+            st.error(
+                "Some questions of your quiz could not be loaded. Your answers are saved; "
+                "please try again later or contact your administrator."
+            )
+            st.button("Abandon Quiz", key="abandon_quiz_btn", on_click=abandon_quiz)
+            return
     
-    # Load all questions
-    all_questions = load_questions()
+    # Course picker, between quizzes and only when there is more than one course
+    courses = load_courses()
+    if len(courses) > 1 and not st.session_state.quiz_in_progress and not st.session_state.quiz_complete:
+        st.selectbox(
+            "Course",
+            options=list(courses),
+            index=list(courses).index(course) if course in courses else 0,
+            format_func=lambda c: courses[c].get("name", c),
+            key="quiz_course_select",
+            on_change=select_course
+        )
     
     # Check if there are any questions to show
     if not all_questions:
@@ -156,182 +554,69 @@ def quiz_page():
         st.markdown('</div>', unsafe_allow_html=True)
         return
     
-    # MAIN FLOW: Handle different quiz states
-    # 1. Quiz completed state
-    if st.session_state.quiz_complete and len(st.session_state.quiz_questions) > 0:
-        score = st.session_state.score
-        max_score = len(st.session_state.quiz_questions)
-        percentage = (score / max_score) * 100
-        
-        # Calculate category-wise performance
-        category_performance = get_category_scores(st.session_state.quiz_questions)
-        
-        st.markdown('<div class="quiz-card result-card">', unsafe_allow_html=True)
-        
-        # Display confetti for good scores
-        if percentage >= 80:
-            st.balloons()
-        
-        # Show different messages based on score
-        if percentage >= 90:
-            st.success("🏆 Excellent! You've demonstrated exceptional knowledge of forklift safety!")
-        elif percentage >= 80:
-            st.success("✅ Great job! You have a solid understanding of forklift safety.")
-        elif percentage >= 70:
-            st.warning("📝 Good effort! Review the areas where you made mistakes before operating equipment.")
+    # The deadline is enforced on the server: an attempt submitted by the
+    # scheduler, or past its deadline, goes straight to the results
+    if st.session_state.quiz_in_progress and 'quiz_attempt' in st.session_state:
+        attempt = st.session_state.quiz_attempt
+        if attempt["status"] != "open" or is_expired(attempt):
+            finish_quiz()
+    
+    # Read once per full run; the fragment reruns reuse it
+    passing_score = get_course_settings(course).get("passing_score", 80)
+    
+    @st.fragment
+    def question_card():
+        """
+        In-progress quiz view
+        
+        Runs as a fragment, so submitting an answer or moving between
+        questions re-executes only this card instead of the whole app.
+        """
+        nonlocal bank, quiz_questions
+        cpu_start = time.thread_time()
+        increment_session_metric("fragment_runs")
+        
+        # Finished from the Next button callback, only the results view needs the full page
+        if not st.session_state.quiz_in_progress:
+            st.rerun()
+        
+        # Fragment reruns reuse this closure, so refresh what may have changed
+        # since the last full run (adaptive quizzes add questions as they go)
+        bank = get_question_bank(course)
+        quiz_questions = attempt_questions(st.session_state.get("quiz_attempt"))
+        if len(quiz_questions) != len(st.session_state.quiz_question_ids):
+            # Question bank changed, let the full page handle it
+            st.rerun()
+        
+        # Deadline reached (countdown callback) or submitted by the scheduler
+        attempt = st.session_state.quiz_attempt
+        if attempt["status"] != "open" or is_expired(attempt):
+            finish_quiz()
+            st.rerun()
+        
+        current_q = quiz_questions[st.session_state.current_question]
+        
+        # Calculate progress percentage (adaptive quizzes count against their maximum length)
+        if st.session_state.quiz_mode == "adaptive":
+            total_label = f"up to {st.session_state.quiz_adaptive_max}"
+            progress_pct = st.session_state.current_question / st.session_state.quiz_adaptive_max
         else:
-            st.error("❌ Please review the forklift safety manual and try again. Additional training is recommended.")
+            total_label = str(len(quiz_questions))
+            progress_pct = (st.session_state.current_question) / len(quiz_questions)
         
-        # Display score with progress bar
-        st.markdown(f"### Your Score: {score}/{max_score} ({percentage:.1f}%)")
-        st.progress(percentage/100)
-        
-        # Show completion time if timer was enabled
+        # Countdown runs in the browser; it only calls back once the deadline passes,
+        # and the deadline itself is checked on the server at the top of the page
         if st.session_state.quiz_timer_enabled:
-            elapsed_time = time.time() - st.session_state.quiz_timer_start
-            minutes = int(elapsed_time // 60)
-            seconds = int(elapsed_time % 60)
-            st.info(f"⏱️ Completion Time: {minutes} minutes, {seconds} seconds")
-        
-        # Display category-wise performance
-        st.markdown("### Performance by Category")
-        
-        for category, data in category_performance.items():
-            correct = data["correct"]
-            total = data["total"]
-            cat_percentage = (correct / total) * 100 if total > 0 else 0
-            
-            # Choose color based on performance
-            if cat_percentage >= 80:
-                color = "#4CAF50"  # Green
-            elif cat_percentage >= 70:
-                color = "#FF9800"  # Orange
-            else:
-                color = "#F44336"  # Red
-            
-            st.markdown(f"""
-                <div style="margin-bottom: 10px;">
-                    <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
-                        <span><strong>{category}</strong></span>
-                        <span>{correct}/{total} ({cat_percentage:.1f}%)</span>
-                    </div>
-                    <div style="width: 100%; background-color: #f0f0f0; border-radius: 10px; height: 10px;">
-                        <div style="width: {cat_percentage}%; background-color: {color}; height: 10px; border-radius: 10px;"></div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-        
-        # Generate certificate for passing score
-        if percentage >= 80:
-            st.markdown("### Certificate of Completion")
-            st.markdown('<div class="certificate-container">', unsafe_allow_html=True)
-            
-            # Generate a unique certificate ID
-            import hashlib
-            cert_id = hashlib.md5(f"{st.session_state.name}_{percentage}_{datetime.datetime.now()}".encode()).hexdigest()[:8].upper()
-            
-            cert_html = create_certificate(
-                st.session_state.name, 
-                f"{percentage:.1f}", 
-                datetime.datetime.now().strftime("%B %d, %Y"),
-                cert_id
-            )
-            
-            b64 = base64.b64encode(cert_html.encode()).decode()
-            download_button = f'<a href="data:text/html;base64,{b64}" download="forklift_safety_certificate.html" class="certificate-button">Download Certificate</a>'
-            st.markdown(download_button, unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Review incorrect answers
-        if st.session_state.incorrect_answers:
-            with st.expander("Review Incorrect Answers"):
-                for q_idx in st.session_state.incorrect_answers:
-                    question = st.session_state.quiz_questions[q_idx]
-                    selected = st.session_state.selected_answers.get(q_idx)
-                    
-                    st.markdown(f"""
-                        <div style="margin-bottom: 20px; padding: 15px; border-left: 3px solid #F44336; background-color: rgba(244, 67, 54, 0.05);">
-                            <p style="font-weight: 600; margin-bottom: 10px;">{question["question"]}</p>
-                            <p style="color: #F44336; margin-bottom: 5px;">
-                                <span style="font-weight: 600;">Your answer:</span> {question["options"][selected]}
-                            </p>
-                            <p style="color: #4CAF50; margin-bottom: 10px;">
-                                <span style="font-weight: 600;">Correct answer:</span> {question["options"][question["answer"]]}
-                            </p>
-                            <p style="font-style: italic; color: #555;">
-                                <span style="font-weight: 600;">Explanation:</span> {question["explanation"]}
-                            </p>
-                        </div>
-                    """, unsafe_allow_html=True)
-        
-        # Navigation buttons
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown('<div class="ghost-btn">', unsafe_allow_html=True)
-            if st.button("View My Scores", key="view_scores_btn", use_container_width=True):
-                navigate_to("scores")
-                st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
+            countdown_timer(st.session_state.quiz_attempt["deadline"], key=f"countdown_{st.session_state.quiz_attempt_id}")
         
-        with col2:
-            st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-            if st.button("Take Quiz Again", key="restart_quiz_btn", use_container_width=True):
-                restart_quiz()
-                st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
-                
-        st.markdown('</div>', unsafe_allow_html=True)
-
-    # 2. Quiz in progress state
-    elif st.session_state.quiz_in_progress and len(st.session_state.quiz_questions) > 0:
-        current_q = st.session_state.quiz_questions[st.session_state.current_question]
-        
-        # Calculate progress percentage
-        progress_pct = (st.session_state.current_question) / len(st.session_state.quiz_questions)
-        
-        # Display timer if enabled
-        if st.session_state.quiz_timer_enabled:
-            elapsed = time.time() - st.session_state.quiz_timer_start
-            remaining = max(0, st.session_state.quiz_timer_duration * 60 - elapsed)
-            
-            minutes = int(remaining // 60)
-            seconds = int(remaining % 60)
-            
-            # Display timer with different colors based on remaining time
-            if remaining <= 60:  # Last minute
-                st.markdown(f"""
-                    <div style="text-align: right; color: #F44336; font-weight: 600; margin-bottom: 10px;">
-                        ⏱️ Time Remaining: {minutes}:{seconds:02d}
-                    </div>
-                """, unsafe_allow_html=True)
-            elif remaining <= 300:  # Last 5 minutes
-                st.markdown(f"""
-                    <div style="text-align: right; color: #FF9800; font-weight: 600; margin-bottom: 10px;">
-                        ⏱️ Time Remaining: {minutes}:{seconds:02d}
-                    </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                    <div style="text-align: right; color: #1E88E5; font-weight: 600; margin-bottom: 10px;">
-                        ⏱️ Time Remaining: {minutes}:{seconds:02d}
-                    </div>
-                """, unsafe_allow_html=True)
-            
-            # Auto-submit quiz if time runs out
-            if remaining <= 0 and not st.session_state.quiz_complete:
-                st.session_state.quiz_complete = True
-                st.session_state.quiz_in_progress = False
-                
-                # Save the score when quiz is complete
-                score = st.session_state.score
-                max_score = len(st.session_state.quiz_questions)
-                save_quiz_score(st.session_state.username, score, max_score)
-                st.rerun()
+        # Note when the current question was first shown, for answer latency
+        if not st.session_state.answered and st.session_state.quiz_shown_at[0] != st.session_state.current_question:
+            st.session_state.quiz_shown_at = (st.session_state.current_question, time.time())
         
         # Show progress
         st.markdown(f"""
             <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
-                <span style="font-weight: 500;">Question {st.session_state.current_question + 1} of {len(st.session_state.quiz_questions)}</span>
+                <span style="font-weight: 500;">Question {st.session_state.current_question + 1} of {total_label}</span>
                 <span style="color: #1E88E5; font-weight: 600;">Score: {st.session_state.score}/{st.session_state.current_question if st.session_state.answered else st.session_state.current_question+1}</span>
             </div>
         """, unsafe_allow_html=True)
@@ -355,10 +640,14 @@ def quiz_page():
         # Display the question
         st.subheader(current_q["question"])
         
-        # Use radio buttons for options
-        selected_option = st.radio(
+        # Use radio buttons for options, in this attempt's order; the values are the
+        # stored option indices, so grading and review need no mapping
+        st.radio(
             "Select your answer:",
-            options=range(len(current_q["options"])),
+            options=option_order(
+                st.session_state.quiz_attempt["option_codes"][st.session_state.current_question],
+                len(current_q["options"])
+            ),
             format_func=lambda x: current_q["options"][x],
             key=f"q{st.session_state.current_question}"
         )
@@ -366,20 +655,24 @@ def quiz_page():
         # Submit button
         if not st.session_state.answered:
             st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-            if st.button("Submit Answer", key=f"submit_btn_{st.session_state.current_question}", use_container_width=True):
-                is_correct = check_answer(selected_option, st.session_state.current_question)
-                st.session_state.answered = True
-                
-                if is_correct:
-                    st.success("✅ Correct!")
-                else:
-                    correct_answer_text = current_q["options"][current_q["answer"]]
-                    st.error(f"❌ Incorrect! The correct answer is: {correct_answer_text}")
-                
-                # Show explanation
-                st.info(f"Explanation: {current_q['explanation']}")
+            st.button(
+                "Submit Answer", key=f"submit_btn_{st.session_state.current_question}", use_container_width=True,
+                on_click=submit_answer, args=(st.session_state.current_question,)
+            )
             st.markdown('</div>', unsafe_allow_html=True)
         
+        # Feedback for the answered question
+        selected = st.session_state.selected_answers[st.session_state.current_question]
+        if st.session_state.answered and selected >= 0:
+            if selected == current_q["answer"]:
+                st.success("✅ Correct!")
+            else:
+                correct_answer_text = current_q["options"][current_q["answer"]]
+                st.error(f"❌ Incorrect! The correct answer is: {correct_answer_text}")
+            
+            # Show explanation
+            st.info(f"Explanation: {current_q['explanation']}")
+        
         # Navigation buttons (only show after answering)
         if st.session_state.answered:
             col1, col2, col3 = st.columns([1, 1, 2])
@@ -388,33 +681,181 @@ def quiz_page():
             with col1:
                 if st.session_state.current_question > 0:
                     st.markdown('<div class="ghost-btn">', unsafe_allow_html=True)
-                    if st.button("← Previous", key=f"prev_btn_{st.session_state.current_question}", use_container_width=True):
-                        prev_question()
-                        st.rerun()
+                    st.button("← Previous", key=f"prev_btn_{st.session_state.current_question}", use_container_width=True,
+                              on_click=prev_question)
                     st.markdown('</div>', unsafe_allow_html=True)
             
             # Next button
             with col3:
                 # Different text if it's the last question
-                button_text = "Finish Quiz" if st.session_state.current_question == len(st.session_state.quiz_questions) - 1 else "Next Question →"
+                button_text = "Finish Quiz" if is_last_question() else "Next Question →"
                 
                 st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-                if st.button(button_text, key=f"next_btn_{st.session_state.current_question}", use_container_width=True):
-                    next_question()
-                    st.rerun()
+                st.button(button_text, key=f"next_btn_{st.session_state.current_question}", use_container_width=True,
+                          on_click=next_question)
                 st.markdown('</div>', unsafe_allow_html=True)
                 
         st.markdown('</div>', unsafe_allow_html=True)
 
         # Display quiz progress at the bottom
-        st.markdown("""
+        st.markdown(f"""
             <div style="margin-top: 20px; text-align: center; color: #757575; font-size: 0.9rem;">
-                Answer all questions to complete the quiz. A score of 80% or higher is required to pass.
+                Answer all questions to complete the quiz. A score of {passing_score}% or higher is required to pass.
             </div>
         """, unsafe_allow_html=True)
+        
+        record_session_metrics(fragment_cpu_ms=round((time.thread_time() - cpu_start) * 1000, 2))
+    
+    # MAIN FLOW: Handle different quiz states
+    # 1. Quiz completed state
+    if st.session_state.quiz_complete and 'quiz_attempt' in st.session_state:
+        result = st.session_state.get("quiz_result")
+        if result is None:
+            st.error("Your quiz could not be saved. Please try again or contact your administrator.")
+            st.button("Take Quiz Again", key="restart_failed_quiz_btn", on_click=restart_quiz)
+            return
+        
+        # Rendered from the summary built when the quiz finished
+        summary = get_attempt_summary(st.session_state.quiz_attempt, result, quiz_questions, st.session_state.name)
+        score = summary["score"]
+        max_score = summary["max_score"]
+        percentage = summary["percentage"]
+        
+        st.markdown('<div class="quiz-card result-card">', unsafe_allow_html=True)
+        
+        if summary["timed_out"]:
+            st.warning("⏱️ Time ran out. Your quiz was submitted automatically with the answers given so far.")
+        
+        practice = summary["mode"] in ("practice", "review")
+        if practice:
+            st.info(
+                f"📝 {'Review' if summary['mode'] == 'review' else 'Practice'} quiz: this result is kept in your "
+                f"practice history and does not count toward certification."
+            )
+        
+        # Display confetti for passing scores (judged against the course's passing score when saved)
+        if summary["passed"] and not practice:
+            st.balloons()
+        
+        # Show different messages based on score
+        if summary["passed"] and percentage >= 90:
+            st.success("🏆 Excellent! You've demonstrated exceptional knowledge of forklift safety!")
+        elif summary["passed"]:
+            st.success("✅ Great job! You have a solid understanding of forklift safety.")
+        elif percentage >= summary["passing_score"] - 10:
+            st.warning("📝 Good effort! Review the areas where you made mistakes before operating equipment.")
+        else:
+            st.error("❌ Please review the forklift safety manual and try again. Additional training is recommended.")
+        
+        # Display score with progress bar
+        if summary["mode"] == "adaptive":
+            st.markdown(f"### Estimated Proficiency: {percentage:.1f}%")
+            st.caption(f"Adaptive quiz: {score} of {max_score} questions answered correctly before a decision was reached.")
+        else:
+            st.markdown(f"### Your Score: {score}/{max_score} ({percentage:.1f}%)")
+        st.progress(percentage/100)
+        
+        # Show completion time if timer was enabled
+        if st.session_state.quiz_timer_enabled:
+            elapsed_time = summary["time_taken"]
+            minutes = int(elapsed_time // 60)
+            seconds = int(elapsed_time % 60)
+            st.info(f"⏱️ Completion Time: {minutes} minutes, {seconds} seconds")
+        
+        # Display category-wise performance
+        st.markdown("### Performance by Category")
+        st.markdown(summary["category_html"], unsafe_allow_html=True)
+        
+        # Certificate for a passing score, with the ID saved with the score. The file is
+        # served through the download button, so reruns carry a link instead of its contents
+        certificate = summary["certificate"]
+        if certificate:
+            st.markdown("### Certificate of Completion")
+            st.markdown('<div class="certificate-container">', unsafe_allow_html=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "Download Certificate",
+                    data=get_certificate_file(**certificate),
+                    file_name="forklift_safety_certificate.html",
+                    mime="text/html",
+                    key="download_certificate_btn",
+                    on_click="ignore"
+                )
+            with col2:
+                st.download_button(
+                    "Download PDF",
+                    data=get_certificate_file(**certificate, file_format="pdf"),
+                    file_name="forklift_safety_certificate.pdf",
+                    mime="application/pdf",
+                    key="download_certificate_pdf_btn",
+                    on_click="ignore"
+                )
+            st.caption(f"Certificate ID: {certificate['cert_id']}")
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Review incorrect answers
+        if summary["incorrect_count"]:
+            with st.expander("Review Incorrect Answers"):
+                st.markdown(summary["review_html"], unsafe_allow_html=True)
+        
+        # Navigation buttons
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown('<div class="ghost-btn">', unsafe_allow_html=True)
+            st.button("View My Scores", key="view_scores_btn", use_container_width=True,
+                      on_click=navigate_to, args=("scores",))
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
+            st.button("Take Quiz Again", key="restart_quiz_btn", use_container_width=True, on_click=restart_quiz)
+            st.markdown('</div>', unsafe_allow_html=True)
+                
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    # 2. Quiz in progress state
+    elif st.session_state.quiz_in_progress and len(quiz_questions) > 0:
+        question_card()
 
     # 3. Quiz setup/start state
     else:
+        # Offer to resume an unfinished attempt (lost connection, closed tab or server restart)
+        journals = list_journals(st.session_state.username)
+        if journals:
+            restored = restore_attempt(journals[0])
+            st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+            st.markdown("### Unfinished Quiz")
+            if restored is not None:
+                saved_attempt, _ = restored
+                answered_count = sum(1 for sel in saved_attempt["selected"] if sel >= 0)
+                started = datetime.datetime.fromtimestamp(saved_attempt["started_at"]).strftime("%Y-%m-%d %H:%M")
+                message = (
+                    f"You have a {get_course(saved_attempt.get('course')).get('name')} quiz started on {started} with {answered_count} of "
+                    f"{len(saved_attempt['question_ids'])} questions answered."
+                )
+                if saved_attempt["deadline"] is not None:
+                    remaining = max(0, saved_attempt["deadline"] - time.time())
+                    message += f" Time remaining: {int(remaining // 60)}:{int(remaining % 60):02d}."
+                st.info(message)
+            else:
+                st.warning("An unfinished quiz could not be read.")
+            
+            resume_col, discard_col = st.columns(2)
+            with resume_col:
+                st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
+                st.button("Resume Attempt", key="resume_attempt_btn", use_container_width=True,
+                          disabled=restored is None, on_click=resume_quiz, args=(journals[0],))
+                st.markdown('</div>', unsafe_allow_html=True)
+            # Timed attempts cannot be discarded; they are submitted at their deadline
+            if restored is None or restored[0]["deadline"] is None:
+                with discard_col:
+                    st.markdown('<div class="ghost-btn">', unsafe_allow_html=True)
+                    st.button("Discard", key="discard_attempt_btn", use_container_width=True,
+                              on_click=discard_saved_attempt, args=(journals[0],))
+                    st.markdown('</div>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
+        
         # Quiz Settings
         st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
         
@@ -464,8 +905,44 @@ def quiz_page():
                 disabled=not timer_enabled
             )
             
+            # Quiz mode (certification forms only once an administrator has generated them,
+            # review only while questions are due)
+            exam_forms = get_exam_forms(bank)
+            review_due = has_due_questions(st.session_state.username, course)
+            mode = st.radio(
+                "Quiz Mode",
+                options=(
+                    ["standard", "adaptive", "practice"] + (["form"] if exam_forms else [])
+                    + (["review"] if review_due else [])
+                ),
+                format_func=lambda m: {
+                    "standard": "Standard", "adaptive": "Adaptive", "practice": "Practice",
+                    "form": "Certification Form", "review": "Review Due Questions"
+                }[m],
+                horizontal=True,
+                help="Adaptive quizzes pick each question based on your answers so far and stop "
+                     "as soon as a confident pass/fail decision is reached. The number of questions "
+                     "becomes the maximum. Certification forms are fixed, pre-assembled question sets "
+                     "that ignore the question count and category filter. Practice quizzes are kept "
+                     "in a separate practice history and never count toward certification. Review "
+                     "quizzes ask the questions you answered incorrectly that are due again, up to "
+                     "the number of questions."
+            )
+            
             # Randomize questions
-            randomize = st.checkbox("Randomize Questions", value=True)
+            randomize = st.checkbox(
+                "Randomize Questions", 
+                value=True,
+                disabled=mode not in ("standard", "practice"),
+                help="Draw a balanced set of questions across categories and difficulty levels"
+            )
+            
+            # Shuffle answer options
+            shuffle_options = st.checkbox(
+                "Shuffle Answer Options",
+                value=True,
+                help="Show the answer options of each question in a random order for this attempt"
+            )
         
         # Filter questions based on user selections
         filtered_questions = [
@@ -473,42 +950,24 @@ def quiz_page():
             if q.get("category", "General") in selected_categories
         ]
         
+        if mode == "review":
+            st.info("Questions you answered incorrectly come back at growing intervals until you know them.")
+        if mode == "form":
+            st.info(
+                f"You will be given one of {len(exam_forms)} certification forms "
+                f"with {len(exam_forms[0]['question_ids'])} questions each."
+            )
+        
         # Make sure we have questions after filtering
-        if not filtered_questions:
+        if not filtered_questions and mode not in ("form", "review"):
             st.warning("No questions match your selected categories. Please select different categories.")
         else:
-            # Limit to selected number of questions
-            if len(filtered_questions) > num_questions:
-                if randomize:
-                    # Random selection
-                    selected_questions = random.sample(filtered_questions, num_questions)
-                else:
-                    # Take first N questions
-                    selected_questions = filtered_questions[:num_questions]
-            else:
-                selected_questions = filtered_questions
-            
             # Start quiz button
             start_col1, start_col2, start_col3 = st.columns([1, 2, 1])
             with start_col2:
-                if st.button("Start Quiz", key="start_quiz_btn", use_container_width=True):
-                    st.session_state.quiz_questions = selected_questions
-                    st.session_state.current_question = 0
-                    st.session_state.score = 0
-                    st.session_state.answered = False
-                    st.session_state.quiz_complete = False
-                    st.session_state.quiz_in_progress = True
-                    st.session_state.correct_answers = []
-                    st.session_state.incorrect_answers = []
-                    st.session_state.selected_answers = {}
-                    
-                    # Set timer if enabled
-                    st.session_state.quiz_timer_enabled = timer_enabled
-                    st.session_state.quiz_timer_duration = timer_minutes
-                    if timer_enabled:
-                        st.session_state.quiz_timer_start = time.time()
-                        st.session_state.quiz_timer_remaining = timer_minutes * 60
-                    
-                    st.rerun()
+                st.button(
+                    "Start Quiz", key="start_quiz_btn", use_container_width=True, on_click=start_quiz,
+                    args=(num_questions, selected_categories, timer_enabled, timer_minutes, mode, randomize, shuffle_options)
+                )
         
         st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -1,13 +1,10 @@
 import streamlit as st
 import pandas as pd
-from ..ui import load_css, display_logo, navigate_to
-from ..data_manager import get_user_scores, SCORES_FILE
+from ..ui import display_logo, navigate_to
+from ..data_manager import get_user_scores, SCORES_FILE, load_courses, score_course, load_practice_results
 import json
 
 def scores_page():
-    # Apply custom CSS
-    st.markdown(load_css(), unsafe_allow_html=True)
-    
     # Display logo
     display_logo()
     
@@ -19,17 +16,29 @@ def scores_page():
     
     user_scores = [s for s in all_scores if s["username"] == st.session_state.username]
     
+    # Filter by course when the user has taken quizzes in more than one
+    courses = load_courses()
+    user_courses = sorted(set(map(score_course, user_scores)))
+    if len(user_courses) > 1:
+        selected_course = st.selectbox(
+            "Course",
+            options=["all"] + user_courses,
+            format_func=lambda c: "All Courses" if c == "all" else courses.get(c, {}).get("name", c),
+            key="scores_course"
+        )
+        if selected_course != "all":
+            user_scores = [s for s in user_scores if score_course(s) == selected_course]
+    
     if not user_scores:
         st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
         st.info("You haven't taken any quizzes yet. Take a quiz to see your scores here!")
         
-        if st.button("Take a Quiz", key="take_quiz_from_scores"):
-            navigate_to("quiz")
-            st.rerun()
+        st.button("Take a Quiz", key="take_quiz_from_scores", on_click=navigate_to, args=("quiz",))
         st.markdown('</div>', unsafe_allow_html=True)
     else:
         # Convert to DataFrame for easy display
         df = pd.DataFrame(user_scores)
+        df["course"] = [courses.get(score_course(s), {}).get("name", score_course(s)) for s in user_scores]
         
         # Make sure we're sorting correctly by timestamp
         df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -75,12 +84,25 @@ def scores_page():
         st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
         st.markdown("### All Your Attempts")
         st.dataframe(
-            df[["timestamp", "score", "max_score", "percentage"]].reset_index(drop=True),
+            df[["timestamp", "course", "score", "max_score", "percentage"]].reset_index(drop=True),
             use_container_width=True
         )
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Take quiz again button
-        if st.button("Take Quiz Again", key="take_quiz_again_from_scores"):
-            navigate_to("quiz")
-            st.rerun()
\ No newline at end of file
+        st.button("Take Quiz Again", key="take_quiz_again_from_scores", on_click=navigate_to, args=("quiz",))
+    
+    # Practice quizzes are kept apart and never count toward the scores above
+    practice_results = load_practice_results(st.session_state.username)
+    if practice_results:
+        st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+        st.markdown("### Practice History")
+        st.caption("Practice and review quizzes do not count toward certification. Only your most recent ones are kept.")
+        practice_df = pd.DataFrame(practice_results)
+        practice_df["course"] = [courses.get(r.get("course"), {}).get("name", r.get("course")) for r in practice_results]
+        practice_df["mode"] = [r.get("mode", "practice").title() for r in practice_results]
+        st.dataframe(
+            practice_df[["timestamp", "course", "mode", "score", "max_score", "percentage"]],
+            use_container_width=True
+        )
+        st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,55 @@
+import streamlit as st
+from ..ui import display_logo, navigate_to
+from ..data_manager import load_courses
+from ..certificate_codes import verify_certificate_code, decode_certificate_code
+
+def verify_page():
+    """
+    Public certificate verification page
+
+    Works without logging in. Signed certificate codes are checked with the
+    server key and the revocation list only; the score history is not read.
+    """
+    # Display logo
+    display_logo()
+
+    st.title("Verify a Certificate")
+
+    st.markdown('<div class="quiz-card">', unsafe_allow_html=True)
+    st.write("Enter the certificate ID and the name exactly as they are printed on the certificate.")
+
+    code = st.text_input("Certificate ID", key="verify_code", placeholder="XXXX-XXXX-XXXX-XXXX-XXXX-XXXX")
+    name = st.text_input("Name on the certificate", key="verify_name")
+
+    if st.button("Verify", key="verify_button"):
+        if not code.strip() or not name.strip():
+            st.error("Please enter both the certificate ID and the name")
+        elif decode_certificate_code(code) is None:
+            st.warning(
+                "This is not a signed certificate ID. Certificates issued before signed IDs "
+                "were introduced can be verified by your training administrator."
+            )
+        else:
+            result = verify_certificate_code(code, name)
+            if result["status"] == "invalid":
+                st.error("No certificate matches this ID and name. Please check both against the certificate.")
+            else:
+                course_name = load_courses().get(result["course"], {}).get("name", result["course"])
+                issued = result["issued"].strftime("%B %d, %Y")
+                expires = result["expires"].strftime("%B %d, %Y")
+                if result["status"] == "valid":
+                    holder = " ".join(name.split())
+                    st.success(
+                        f"Valid certificate: {course_name}, issued to {holder} on {issued}, "
+                        f"expires on {expires}."
+                    )
+                elif result["status"] == "expired":
+                    st.warning(f"This {course_name} certificate is authentic but expired on {expires}.")
+                else:
+                    st.error(f"This {course_name} certificate was revoked and is no longer valid.")
+                st.caption(f"Certificate ID: {result['code']} · Attempt reference: {result['attempt_ref']}")
+
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    back_page = "dashboard" if st.session_state.authenticated else "login"
+    st.button("← Back", key="verify_back_button", on_click=navigate_to, args=(back_page,))
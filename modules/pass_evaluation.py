@@ -0,0 +1,136 @@
+import datetime
+import os
+import threading
+from .data_manager import (
+    PASS_EVALUATION_FILE, load_courses, load_scores, get_course_settings, load_pass_evaluation, save_pass_evaluation,
+    reevaluate_scores, update_revoked_certificates
+)
+from .certificate_codes import issue_certificate_code
+
+# Versioned pass/fail re-evaluation. Every change of a passing score bumps the
+# version; a single background thread applies the latest requested passing
+# scores to all saved scores and certifications, and runs again if another
+# change arrives while it works. Pages read the stored "passed" flags only.
+
+REEVALUATION_REVOKER = "pass re-evaluation"
+
+_job_lock = threading.Lock()
+_job = None
+_checked = False
+
+def current_passing_scores():
+    """
+    Get the passing score of every course
+
+    Returns:
+        dict: {course: passing score}
+    """
+    return {course: get_course_settings(course).get("passing_score", 80) for course in load_courses()}
+
+def _issue_code(score, name, validity_days):
+    """Certificate ID of a score that passes after a re-evaluation, dated like the score"""
+    issued = datetime.datetime.strptime(score["timestamp"], "%Y-%m-%d %H:%M:%S").date()
+    return issue_certificate_code(name, score.get("course"), score["id"], issued, validity_days)
+
+def _ensure_job():
+    """Start the background re-evaluation thread unless it runs (call with _job_lock held)"""
+    global _job
+    if _job is None:
+        _job = threading.Thread(target=_run_job, name="pass-reevaluation", daemon=True)
+        _job.start()
+
+def _run_job():
+    """Apply requested re-evaluations until the latest version is evaluated"""
+    global _job
+    while True:
+        with _job_lock:
+            state = load_pass_evaluation()
+            if state["evaluated"] >= state["version"]:
+                # Cleared under the lock, so a request arriving now starts a new thread
+                _job = None
+                return
+            version, thresholds = state["version"], state["target"]
+
+        try:
+            result = reevaluate_scores(thresholds, version, _issue_code)
+            # Certificates of scores that no longer pass are revoked; those revoked by
+            # an earlier re-evaluation come back when their score passes again
+            revoked, reinstated = update_revoked_certificates(
+                result["failing"], result["passing"], REEVALUATION_REVOKER,
+                "Score below the changed passing score"
+            )
+        except Exception as e:
+            print(f"Error re-evaluating scores for version {version}: {e}")
+            with _job_lock:
+                _job = None
+            return
+
+        with _job_lock:
+            state = load_pass_evaluation()
+            state.update({
+                "evaluated": version,
+                "thresholds": thresholds,
+                "changed": result["changed"],
+                "issued": result["issued"],
+                "revoked": revoked,
+                "reinstated": reinstated,
+                "completed_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+            save_pass_evaluation(state)
+
+def check_passing_scores():
+    """
+    Re-evaluate all scores in the background if a passing score changed
+
+    Call after saving settings or courses. Compares the current passing
+    scores with the latest requested ones, so repeated calls without a
+    change do nothing. The first call without a stored state only records
+    the current passing scores, unless saved scores predate the stored
+    pass/fail flags and need them filled in.
+
+    Returns:
+        bool: True if a re-evaluation is requested or still running
+    """
+    thresholds = current_passing_scores()
+    with _job_lock:
+        state = load_pass_evaluation()
+        if not os.path.exists(PASS_EVALUATION_FILE):
+            # Scores saved since the flags exist were graded with these passing scores
+            if any("passed" not in score for score in load_scores()):
+                state["version"] += 1
+            state.update(target=thresholds, thresholds=thresholds)
+            save_pass_evaluation(state)
+        elif thresholds != state["target"]:
+            state["version"] += 1
+            state["target"] = thresholds
+            save_pass_evaluation(state)
+        if state["evaluated"] >= state["version"]:
+            return False
+        _ensure_job()
+        return True
+
+def resume_pass_evaluation():
+    """
+    Check the passing scores once per process
+
+    Picks up passing scores changed while the server was down and
+    re-evaluations interrupted by a restart.
+    """
+    global _checked
+    with _job_lock:
+        if _checked:
+            return
+        _checked = True
+    check_passing_scores()
+
+def pass_evaluation_status():
+    """
+    Get the state of the pass/fail re-evaluation
+
+    Returns:
+        dict: The stored state plus "running" (bool)
+    """
+    with _job_lock:
+        state = load_pass_evaluation()
+        state["running"] = state["evaluated"] < state["version"]
+        return state
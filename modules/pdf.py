@@ -0,0 +1,510 @@
+import os
+import zlib
+import struct
+import hashlib
+import threading
+from PIL import Image
+
+# Minimal PDF writer for generated documents. Objects are written to the
+# output stream as soon as they are complete; only their byte offsets are
+# kept for the cross-reference table. Objects that depend on the whole
+# document (subsetted fonts, the page tree) reserve their number up front
+# and are written last.
+
+# Document: {"stream", "position", "offsets": {object_id: offset}, "next_id"}
+def new_document(stream):
+    """
+    Start a PDF document on a binary output stream
+
+    Args:
+        stream (file-like): Binary stream to write to (file, BytesIO, ...)
+
+    Returns:
+        dict: Document state for the other functions in this module
+    """
+    doc = {"stream": stream, "position": 0, "offsets": {}, "next_id": 1}
+    _write(doc, b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    return doc
+
+def _write(doc, data):
+    doc["stream"].write(data)
+    doc["position"] += len(data)
+
+def reserve_object(doc):
+    """Reserve an object number to be written later"""
+    object_id = doc["next_id"]
+    doc["next_id"] += 1
+    return object_id
+
+def write_object(doc, object_id, body):
+    """
+    Write an indirect object
+
+    Args:
+        doc (dict): Document from new_document()
+        object_id (int): Number from reserve_object(), or None to allocate one
+        body (str or bytes): Object contents, e.g. "<< /Type /Page ... >>"
+
+    Returns:
+        int: Object number
+    """
+    if object_id is None:
+        object_id = reserve_object(doc)
+    doc["offsets"][object_id] = doc["position"]
+    if isinstance(body, str):
+        body = body.encode("latin-1")
+    _write(doc, b"%d 0 obj\n%s\nendobj\n" % (object_id, body))
+    return object_id
+
+def write_stream(doc, object_id, data, entries="", compress=True):
+    """
+    Write a stream object
+
+    Args:
+        doc (dict): Document from new_document()
+        object_id (int): Number from reserve_object(), or None to allocate one
+        data (bytes): Stream contents
+        entries (str): Extra dictionary entries, e.g. "/Type /XObject"
+        compress (bool): Compress the data with FlateDecode
+
+    Returns:
+        int: Object number
+    """
+    if object_id is None:
+        object_id = reserve_object(doc)
+    if compress:
+        data = zlib.compress(data)
+        entries = f"{entries} /Filter /FlateDecode"
+    doc["offsets"][object_id] = doc["position"]
+    _write(doc, b"%d 0 obj\n<< %s /Length %d >>\nstream\n" % (object_id, entries.strip().encode("latin-1"), len(data)))
+    _write(doc, data)
+    _write(doc, b"\nendstream\nendobj\n")
+    return object_id
+
+def finish_document(doc, root_id, info_id=None):
+    """Write the cross-reference table and trailer"""
+    xref_offset = doc["position"]
+    count = doc["next_id"]
+    lines = [b"xref\n0 %d\n" % count, b"0000000000 65535 f \n"]
+    for object_id in range(1, count):
+        offset = doc["offsets"].get(object_id)
+        lines.append(b"%010d 00000 n \n" % offset if offset is not None else b"0000000000 65535 f \n")
+    _write(doc, b"".join(lines))
+    info = f" /Info {info_id} 0 R" if info_id else ""
+    _write(doc, f"trailer\n<< /Size {count} /Root {root_id} 0 R{info} >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1"))
+
+def pdf_text_string(text):
+    """Encode text as a PDF literal string for document metadata"""
+    data = text.encode("latin-1", errors="replace")
+    return "(" + data.decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+# Images
+def write_image(doc, path):
+    """
+    Write an image file as an image XObject, with its transparency as a soft mask
+
+    Args:
+        doc (dict): Document from new_document()
+        path (str): Image file
+
+    Returns:
+        tuple: (object number, width, height)
+    """
+    with Image.open(path) as image:
+        image.load()
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        rgba = image.convert("RGBA") if has_alpha else None
+        rgb = (rgba or image).convert("RGB")
+        width, height = rgb.size
+
+        smask = ""
+        if rgba is not None:
+            mask_id = write_stream(
+                doc, None, rgba.getchannel("A").tobytes(),
+                f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 8"
+            )
+            smask = f" /SMask {mask_id} 0 R"
+        image_id = write_stream(
+            doc, None, rgb.tobytes(),
+            f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace /DeviceRGB /BitsPerComponent 8{smask}"
+        )
+    return image_id, width, height
+
+# Fonts
+# A font is a dict shared by all documents:
+#   TrueType: {"type": "truetype", "name", "data", "tables", "cmap", "advances", "units_per_em", ...}
+#   Standard: {"type": "standard", "name", "widths"} for the PDF base fonts, which
+#   every reader has built in and which need no embedding
+# Each document tracks its use of a font in a dict:
+#   {"font", "resource" (e.g. "F1"), "object_id", "glyphs": {glyph_id: character}}
+
+# Widths of ASCII 32-126 in the PDF base fonts (1/1000 em)
+STANDARD_FONT_WIDTHS = {
+    "Helvetica": (
+        "278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 556 556 "
+        "278 278 584 584 584 556 1015 667 667 722 722 667 611 778 722 278 500 667 556 833 722 778 667 778 722 667 "
+        "611 722 667 944 667 667 611 278 278 278 469 556 333 556 556 500 556 556 278 556 556 222 222 500 222 833 "
+        "556 556 556 556 333 500 278 556 500 722 500 500 500 334 260 334 584"
+    ),
+    "Helvetica-Bold": (
+        "278 333 474 556 556 889 722 238 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 556 556 "
+        "333 333 584 584 584 611 975 722 722 722 722 667 611 778 722 278 556 722 611 833 722 778 667 778 722 667 "
+        "611 722 667 944 667 667 611 333 278 333 584 556 333 556 611 556 611 556 333 611 611 278 278 556 278 889 "
+        "611 611 611 611 389 556 333 611 556 778 556 556 500 389 280 389 584"
+    ),
+    "Times-Bold": (
+        "250 333 555 500 500 1000 833 278 333 333 500 570 250 333 250 278 500 500 500 500 500 500 500 500 500 500 "
+        "333 333 570 570 570 500 930 722 667 722 722 667 611 778 778 389 500 778 667 944 722 778 611 778 722 556 "
+        "667 722 722 1000 722 722 667 333 278 333 581 500 333 500 556 444 556 444 333 500 556 278 333 556 278 833 "
+        "556 500 556 556 444 389 333 556 500 722 500 500 444 394 220 394 520"
+    ),
+}
+
+_font_lock = threading.Lock()
+_font_cache = {}  # {path: (mtime, font)}
+
+def standard_font(name):
+    """Get one of the PDF base fonts (Helvetica, Helvetica-Bold, Times-Bold)"""
+    widths = [int(w) for w in STANDARD_FONT_WIDTHS[name].split()]
+    return {"type": "standard", "name": name, "widths": widths, "default_width": widths[ord("n") - 32]}
+
+def load_truetype(path):
+    """
+    Load a TrueType font file for embedding
+
+    Parsed fonts are cached until the file changes.
+
+    Args:
+        path (str): .ttf file
+
+    Returns:
+        dict or None: Font, None if the file is missing or not a usable TrueType font
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _font_lock:
+        cached = _font_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    try:
+        with open(path, "rb") as f:
+            font = _parse_truetype(f.read(), os.path.splitext(os.path.basename(path))[0])
+    except (OSError, KeyError, struct.error, ValueError) as e:
+        print(f"Error loading font {path}: {e}")
+        font = None
+    with _font_lock:
+        _font_cache[path] = (mtime, font)
+    return font
+
+def _parse_truetype(data, fallback_name):
+    """Read the tables and metrics needed to embed a TrueType font"""
+    if data[:4] not in (b"\x00\x01\x00\x00", b"true"):
+        raise ValueError("not a TrueType font")
+    num_tables = struct.unpack(">H", data[4:6])[0]
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = struct.unpack(">4sIII", data[12 + 16 * i:28 + 16 * i])
+        tables[tag.decode("latin-1")] = (offset, length)
+
+    def table(tag):
+        offset, length = tables[tag]
+        return data[offset:offset + length]
+
+    head, hhea, maxp = table("head"), table("hhea"), table("maxp")
+    units_per_em = struct.unpack(">H", head[18:20])[0]
+    bbox = struct.unpack(">hhhh", head[36:44])
+    loca_long = struct.unpack(">h", head[50:52])[0] == 1
+    ascent, descent = struct.unpack(">hh", hhea[4:8])
+    num_metrics = struct.unpack(">H", hhea[34:36])[0]
+    num_glyphs = struct.unpack(">H", maxp[4:6])[0]
+
+    hmtx = table("hmtx")
+    advances = [struct.unpack(">H", hmtx[4 * i:4 * i + 2])[0] for i in range(num_metrics)]
+    advances += [advances[-1]] * (num_glyphs - num_metrics)
+
+    loca = table("loca")
+    if loca_long:
+        offsets = list(struct.unpack(f">{num_glyphs + 1}I", loca[:4 * (num_glyphs + 1)]))
+    else:
+        offsets = [2 * o for o in struct.unpack(f">{num_glyphs + 1}H", loca[:2 * (num_glyphs + 1)])]
+
+    cap_height = int(ascent * 0.7)
+    if "OS/2" in tables:
+        os2 = table("OS/2")
+        if struct.unpack(">H", os2[0:2])[0] >= 2 and len(os2) >= 90:
+            cap_height = struct.unpack(">h", os2[88:90])[0]
+    italic_angle = struct.unpack(">i", table("post")[4:8])[0] / 65536 if "post" in tables else 0
+
+    return {
+        "type": "truetype",
+        "name": (_postscript_name(table("name")) if "name" in tables else None) or fallback_name,
+        "data": data,
+        "tables": tables,
+        "cmap": _parse_cmap(table("cmap")),
+        "advances": advances,
+        "glyph_offsets": offsets,
+        "units_per_em": units_per_em,
+        "bbox": bbox,
+        "ascent": ascent,
+        "descent": descent,
+        "cap_height": cap_height,
+        "italic_angle": italic_angle,
+    }
+
+def _postscript_name(name_table):
+    """PostScript name (name ID 6) of a font, without characters PDF names cannot hold"""
+    count, string_offset = struct.unpack(">HH", name_table[2:6])
+    for i in range(count):
+        platform, encoding, _, name_id, length, offset = struct.unpack(">6H", name_table[6 + 12 * i:18 + 12 * i])
+        if name_id != 6:
+            continue
+        raw = name_table[string_offset + offset:string_offset + offset + length]
+        name = raw.decode("utf-16-be" if platform in (0, 3) else "latin-1", errors="ignore")
+        name = "".join(ch for ch in name if ch.isalnum() or ch in "-_")
+        if name:
+            return name
+    return None
+
+def _parse_cmap(cmap):
+    """Map code points to glyph IDs from the best Unicode subtable (format 12 or 4)"""
+    count = struct.unpack(">H", cmap[2:4])[0]
+    subtables = {}
+    for i in range(count):
+        platform, encoding, offset = struct.unpack(">HHI", cmap[4 + 8 * i:12 + 8 * i])
+        subtables[(platform, encoding)] = offset
+
+    for key in ((3, 10), (0, 4), (3, 1), (0, 3), (0, 1), (0, 0)):
+        if key not in subtables:
+            continue
+        offset = subtables[key]
+        subtable_format = struct.unpack(">H", cmap[offset:offset + 2])[0]
+        if subtable_format == 12:
+            groups = struct.unpack(">I", cmap[offset + 12:offset + 16])[0]
+            mapping = {}
+            for g in range(groups):
+                start, end, glyph = struct.unpack(">III", cmap[offset + 16 + 12 * g:offset + 28 + 12 * g])
+                for code in range(start, end + 1):
+                    mapping[code] = glyph + code - start
+            return mapping
+        if subtable_format == 4:
+            seg_count = struct.unpack(">H", cmap[offset + 6:offset + 8])[0] // 2
+            ends_at = offset + 14
+            starts_at = ends_at + 2 * seg_count + 2
+            deltas_at = starts_at + 2 * seg_count
+            ranges_at = deltas_at + 2 * seg_count
+            mapping = {}
+            for s in range(seg_count):
+                end = struct.unpack(">H", cmap[ends_at + 2 * s:ends_at + 2 * s + 2])[0]
+                start = struct.unpack(">H", cmap[starts_at + 2 * s:starts_at + 2 * s + 2])[0]
+                delta = struct.unpack(">h", cmap[deltas_at + 2 * s:deltas_at + 2 * s + 2])[0]
+                range_offset = struct.unpack(">H", cmap[ranges_at + 2 * s:ranges_at + 2 * s + 2])[0]
+                for code in range(start, end + 1):
+                    if code == 0xFFFF:
+                        continue
+                    if range_offset == 0:
+                        glyph = (code + delta) & 0xFFFF
+                    else:
+                        at = ranges_at + 2 * s + range_offset + 2 * (code - start)
+                        glyph = struct.unpack(">H", cmap[at:at + 2])[0]
+                        glyph = (glyph + delta) & 0xFFFF if glyph else 0
+                    if glyph:
+                        mapping[code] = glyph
+            return mapping
+    raise ValueError("no Unicode cmap")
+
+def _glyph_bytes(font, glyph_id):
+    offsets = font["glyph_offsets"]
+    start = font["tables"]["glyf"][0]
+    return font["data"][start + offsets[glyph_id]:start + offsets[glyph_id + 1]]
+
+def _add_components(font, glyph_ids):
+    """Add the glyphs that composite glyphs are built from"""
+    pending = list(glyph_ids)
+    while pending:
+        glyph = _glyph_bytes(font, pending.pop())
+        if len(glyph) < 10 or struct.unpack(">h", glyph[:2])[0] >= 0:
+            continue
+        at = 10
+        while True:
+            flags, component = struct.unpack(">HH", glyph[at:at + 4])
+            if component not in glyph_ids:
+                glyph_ids.add(component)
+                pending.append(component)
+            at += 4 + (4 if flags & 0x0001 else 2)
+            at += 2 if flags & 0x0008 else 4 if flags & 0x0040 else 8 if flags & 0x0080 else 0
+            if not flags & 0x0020:
+                break
+    return glyph_ids
+
+def _checksum(data):
+    data += b"\0" * (-len(data) % 4)
+    return sum(struct.unpack(f">{len(data) // 4}I", data)) & 0xFFFFFFFF
+
+def subset_truetype(font, glyph_ids):
+    """
+    Build a TrueType font file that only contains the given glyphs
+
+    Glyph IDs are kept, so text can be written as glyph IDs before the
+    subset is known; the outlines of all other glyphs are left out.
+
+    Args:
+        font (dict): Font from load_truetype()
+        glyph_ids (iterable): Glyphs used in the document
+
+    Returns:
+        bytes: Font file for embedding (FontFile2)
+    """
+    keep = _add_components(font, set(glyph_ids) | {0})
+    glyf, loca = [], [0]
+    size = 0
+    for glyph_id in range(len(font["glyph_offsets"]) - 1):
+        if glyph_id in keep:
+            glyph = _glyph_bytes(font, glyph_id)
+            glyph += b"\0" * (-len(glyph) % 4)
+            glyf.append(glyph)
+            size += len(glyph)
+        loca.append(size)
+
+    data, tables = font["data"], font["tables"]
+    head = bytearray(data[tables["head"][0]:tables["head"][0] + tables["head"][1]])
+    head[8:12] = b"\0\0\0\0"
+    head[50:52] = struct.pack(">h", 1)  # Long loca offsets
+    out_tables = {
+        "head": bytes(head),
+        "loca": struct.pack(f">{len(loca)}I", *loca),
+        "glyf": b"".join(glyf),
+    }
+    for tag in ("hhea", "hmtx", "maxp", "cvt ", "fpgm", "prep"):
+        if tag in tables:
+            offset, length = tables[tag]
+            out_tables[tag] = data[offset:offset + length]
+
+    # Table directory followed by the 4-byte aligned tables
+    tags = sorted(out_tables)
+    entry_selector = max(len(tags).bit_length() - 1, 0)
+    search_range = 16 * (1 << entry_selector)
+    header = struct.pack(">IHHHH", 0x00010000, len(tags), search_range, entry_selector, 16 * len(tags) - search_range)
+    directory, body = [], []
+    offset = 12 + 16 * len(tags)
+    for tag in tags:
+        table = out_tables[tag]
+        directory.append(struct.pack(">4sIII", tag.encode("latin-1"), _checksum(table), offset, len(table)))
+        table += b"\0" * (-len(table) % 4)
+        body.append(table)
+        offset += len(table)
+    font_file = bytearray(header + b"".join(directory) + b"".join(body))
+
+    head_at = 12 + 16 * len(tags) + sum(len(t) for t in body[:tags.index("head")])
+    font_file[head_at + 8:head_at + 12] = struct.pack(">I", (0xB1B0AFBA - _checksum(bytes(font_file))) & 0xFFFFFFFF)
+    return bytes(font_file)
+
+def use_font(doc, font, resource):
+    """
+    Start using a font in a document
+
+    Args:
+        doc (dict): Document from new_document()
+        font (dict): Font from load_truetype() or standard_font()
+        resource (str): Resource name in page content, e.g. "F1"
+
+    Returns:
+        dict: Font use, for text_width(), encode_text() and write_font()
+    """
+    return {"font": font, "resource": resource, "object_id": reserve_object(doc), "glyphs": {}}
+
+def text_width(font_use, text, size):
+    """Width of a text in points"""
+    font = font_use["font"]
+    if font["type"] == "standard":
+        widths = font["widths"]
+        units = sum(widths[ord(ch) - 32] if 32 <= ord(ch) <= 126 else font["default_width"] for ch in text)
+        return units * size / 1000
+    cmap, advances = font["cmap"], font["advances"]
+    units = sum(advances[cmap.get(ord(ch), 0)] for ch in text)
+    return units * size / font["units_per_em"]
+
+def encode_text(font_use, text):
+    """
+    Encode text for a Tj operator in page content
+
+    TrueType text is written as glyph IDs and the glyphs are recorded for
+    the subset; base fonts use WinAnsi encoding.
+
+    Returns:
+        str: PDF string operand
+    """
+    font = font_use["font"]
+    if font["type"] == "standard":
+        data = text.encode("cp1252", errors="replace").decode("latin-1")
+        return "(" + data.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+    cmap, glyphs = font["cmap"], font_use["glyphs"]
+    codes = []
+    for ch in text:
+        glyph_id = cmap.get(ord(ch), 0)
+        glyphs.setdefault(glyph_id, ch)
+        codes.append(f"{glyph_id:04X}")
+    return "<" + "".join(codes) + ">"
+
+def write_font(doc, font_use):
+    """
+    Write a font at the end of a document, subsetted to the glyphs it used
+
+    Returns:
+        int: Object number of the font, as reserved by use_font()
+    """
+    font = font_use["font"]
+    if font["type"] == "standard":
+        return write_object(
+            doc, font_use["object_id"],
+            f"<< /Type /Font /Subtype /Type1 /BaseFont /{font['name']} /Encoding /WinAnsiEncoding >>"
+        )
+
+    glyphs = font_use["glyphs"]
+    font_file = subset_truetype(font, glyphs)
+    tag = "".join(chr(65 + b % 26) for b in hashlib.sha1(repr(sorted(glyphs)).encode()).digest()[:6])
+    base_font = f"{tag}+{font['name']}"
+    scale = 1000 / font["units_per_em"]
+
+    file_id = write_stream(doc, None, font_file, f"/Length1 {len(font_file)}")
+    bbox = " ".join(str(round(v * scale)) for v in font["bbox"])
+    descriptor_id = write_object(
+        doc, None,
+        f"<< /Type /FontDescriptor /FontName /{base_font} /Flags 32 /FontBBox [{bbox}] "
+        f"/ItalicAngle {font['italic_angle']:g} /Ascent {round(font['ascent'] * scale)} "
+        f"/Descent {round(font['descent'] * scale)} /CapHeight {round(font['cap_height'] * scale)} "
+        f"/StemV 80 /FontFile2 {file_id} 0 R >>"
+    )
+    widths = " ".join(f"{g} [{round(font['advances'][g] * scale)}]" for g in sorted(glyphs))
+    cid_font_id = write_object(
+        doc, None,
+        f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{base_font} "
+        f"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+        f"/FontDescriptor {descriptor_id} 0 R /CIDToGIDMap /Identity /W [{widths}] >>"
+    )
+
+    # Glyph to Unicode map, so text can be searched and copied
+    mappings = [f"<{g:04X}> <{ch.encode('utf-16-be').hex().upper()}>" for g, ch in sorted(glyphs.items())]
+    chunks = [
+        f"{len(chunk)} beginbfchar\n" + "\n".join(chunk) + "\nendbfchar"
+        for chunk in (mappings[i:i + 100] for i in range(0, len(mappings), 100))
+    ]
+    to_unicode = (
+        "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+        + "\n".join(chunks)
+        + "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend"
+    )
+    to_unicode_id = write_stream(doc, None, to_unicode.encode("latin-1"))
+
+    return write_object(
+        doc, font_use["object_id"],
+        f"<< /Type /Font /Subtype /Type0 /BaseFont /{base_font} /Encoding /Identity-H "
+        f"/DescendantFonts [{cid_font_id} 0 R] /ToUnicode {to_unicode_id} 0 R >>"
+    )
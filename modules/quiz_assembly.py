@@ -0,0 +1,244 @@
+import threading
+import numpy as np
+from .data_manager import load_item_exposure, record_item_exposure
+
+# Difficulty levels in display order; unknown levels are appended after these
+DIFFICULTY_LEVELS = ["Basic", "Intermediate", "Advanced"]
+
+# Strength of exposure control: an item shown twice as often as average gets
+# roughly 1 / (1 + 2 * EXPOSURE_PENALTY) of the base selection weight
+EXPOSURE_PENALTY = 1.0
+
+# Index arrays and exposure counts cached per course, each valid for one question bank object
+_index_lock = threading.Lock()
+_index_cache = {}  # {course: {"bank", "index"}}
+_exposure_cache = {}  # {course: {"bank", "counts"}}
+
+def cell_key(category, difficulty):
+    """Return the blueprint key for a category/difficulty cell"""
+    return f"{category}|{difficulty}"
+
+def get_bank_index(bank):
+    """
+    Get NumPy index arrays for a question bank
+
+    The arrays are built once per question bank object and shared by all
+    sessions until the bank is reloaded. Each course keeps its own entry, so
+    sessions on different courses do not evict each other.
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+
+    Returns:
+        dict: Question IDs, category/difficulty labels, cell code per question
+            and the bank positions belonging to each cell
+    """
+    with _index_lock:
+        cached = _index_cache.get(bank["course"])
+        if cached is not None and cached["bank"] is bank:
+            return cached["index"]
+
+        questions = bank["questions"]
+        categories = sorted(set(q.get("category", "General") for q in questions))
+        difficulties = DIFFICULTY_LEVELS + sorted(
+            set(q.get("difficulty", "Intermediate") for q in questions) - set(DIFFICULTY_LEVELS)
+        )
+        category_pos = {c: i for i, c in enumerate(categories)}
+        difficulty_pos = {d: i for i, d in enumerate(difficulties)}
+
+        cell_codes = np.fromiter(
+            (category_pos[q.get("category", "General")] * len(difficulties) + difficulty_pos[q.get("difficulty", "Intermediate")]
+             for q in questions),
+            dtype=np.int64, count=len(questions)
+        )
+        n_cells = len(categories) * len(difficulties)
+        order = np.argsort(cell_codes, kind="stable")
+        bounds = np.searchsorted(cell_codes[order], np.arange(n_cells + 1))
+
+        index = {
+            "ids": np.fromiter((q["id"] for q in questions), dtype=np.int64, count=len(questions)),
+            "categories": categories,
+            "difficulties": difficulties,
+            "cell_codes": cell_codes,
+            "cell_sizes": np.diff(bounds),
+            "cell_members": [order[bounds[c]:bounds[c + 1]] for c in range(n_cells)],
+        }
+        for arr in [index["ids"], cell_codes, index["cell_sizes"]] + index["cell_members"]:
+            arr.setflags(write=False)
+
+        _index_cache[bank["course"]] = {"bank": bank, "index": index}
+        return index
+
+def get_cell_counts(bank):
+    """
+    Count available questions per category/difficulty cell
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+
+    Returns:
+        dict: {(category, difficulty): number of questions}
+    """
+    index = get_bank_index(bank)
+    n_diff = len(index["difficulties"])
+    return {
+        (index["categories"][cell // n_diff], index["difficulties"][cell % n_diff]): int(count)
+        for cell, count in enumerate(index["cell_sizes"]) if count > 0
+    }
+
+def category_mask(bank, categories):
+    """
+    Mark the bank questions that belong to the given categories
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+        categories (list): Category names
+
+    Returns:
+        np.ndarray: Boolean mask aligned with the question bank order
+    """
+    index = get_bank_index(bank)
+    selected = set(categories)
+    wanted = [pos for pos, category in enumerate(index["categories"]) if category in selected]
+    return np.isin(index["cell_codes"] // len(index["difficulties"]), wanted)
+
+def get_exposure_counts(bank):
+    """
+    Get exposure counts aligned with the question bank order
+
+    Counts are loaded from disk once per bank (per course) and then kept
+    current in memory by record_exposure().
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+
+    Returns:
+        np.ndarray: Times each question has been handed out
+    """
+    index = get_bank_index(bank)
+    with _index_lock:
+        cached = _exposure_cache.get(bank["course"])
+        if cached is None or cached["bank"] is not bank:
+            exposure = load_item_exposure()
+            cached = _exposure_cache[bank["course"]] = {
+                "bank": bank,
+                "counts": np.fromiter(
+                    (exposure.get(str(qid), 0) for qid in index["ids"].tolist()), dtype=np.float64, count=len(index["ids"])
+                )
+            }
+        return cached["counts"]
+
+def record_exposure(bank, question_ids):
+    """
+    Record that questions were handed out in a quiz
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+        question_ids (list): IDs of the questions in the quiz
+    """
+    counts = get_exposure_counts(bank)
+    positions = [bank["index"][qid] for qid in question_ids if qid in bank["index"]]
+    with _index_lock:
+        counts[positions] += 1
+    record_item_exposure(question_ids)
+
+def allocate_counts(weights, available, total):
+    """
+    Split a question total across blueprint cells by largest remainder
+
+    Args:
+        weights (np.ndarray): Relative target weight per cell
+        available (np.ndarray): Number of eligible questions per cell
+        total (int): Number of questions to allocate
+
+    Returns:
+        np.ndarray: Questions to draw per cell, never above availability
+    """
+    available = available.astype(np.int64)
+    total = int(min(total, available.sum()))
+    weights = np.where(available > 0, weights, 0.0)
+    if weights.sum() <= 0:
+        # No usable blueprint weight, fall back to proportional coverage
+        weights = available.astype(float)
+
+    raw = weights / weights.sum() * total
+    counts = np.minimum(np.floor(raw).astype(np.int64), available)
+
+    # Hand out the remainder to cells with spare questions, largest fraction first
+    remaining = total - counts.sum()
+    while remaining > 0:
+        spare = available - counts
+        fractions = np.where(spare > 0, raw - counts, -np.inf)
+        take = np.argsort(-fractions, kind="stable")[:min(remaining, int((spare > 0).sum()))]
+        counts[take] += 1
+        remaining = total - counts.sum()
+
+    return counts
+
+def assemble_quiz(bank, num_questions, categories=None, blueprint=None, exposure=None, rng=None):
+    """
+    Assemble a stratified quiz from the question bank
+
+    Questions are allocated to category/difficulty cells according to the
+    blueprint, then drawn within each cell by weighted sampling without
+    replacement, with frequently exposed questions down-weighted.
+
+    Args:
+        bank (Mapping): Question bank from data_manager.get_question_bank()
+        num_questions (int): Number of questions in the quiz
+        categories (list, optional): Categories to draw from; all if None
+        blueprint (dict, optional): Relative weight per cell_key(category, difficulty);
+            proportional to availability if None or empty
+        exposure (np.ndarray, optional): Exposure count per question, from get_exposure_counts()
+        rng (np.random.Generator, optional): Random generator, e.g. seeded for reproducible forms
+
+    Returns:
+        list: Question IDs in quiz order
+    """
+    index = get_bank_index(bank)
+    rng = rng if rng is not None else np.random.default_rng()
+    categories_all = index["categories"]
+    difficulties = index["difficulties"]
+    n_diff = len(difficulties)
+
+    # Eligible cells (categories are whole rows of the cell grid)
+    available = index["cell_sizes"].copy()
+    if categories is not None:
+        selected = set(categories)
+        for pos, category in enumerate(categories_all):
+            if category not in selected:
+                available[pos * n_diff:(pos + 1) * n_diff] = 0
+    if available.sum() == 0 or num_questions <= 0:
+        return []
+
+    # Target count per cell
+    cell_weights = np.zeros(len(available))
+    if blueprint:
+        for cell in np.flatnonzero(available):
+            key = cell_key(categories_all[cell // n_diff], difficulties[cell % n_diff])
+            cell_weights[cell] = max(float(blueprint.get(key, 0)), 0.0)
+    counts = allocate_counts(cell_weights, available, num_questions)
+
+    # Exposure-controlled item weights
+    item_weights = None
+    if exposure is not None:
+        mean_seen = exposure[available[index["cell_codes"]] > 0].mean()
+        if mean_seen > 0:
+            item_weights = 1.0 / (1.0 + EXPOSURE_PENALTY * exposure / mean_seen)
+
+    # Weighted sampling without replacement within each cell, using
+    # Efraimidis-Spirakis keys (log u / w) and keeping the largest keys
+    chosen = []
+    for cell in np.flatnonzero(counts):
+        members = index["cell_members"][cell]
+        k = counts[cell]
+        if k >= members.size:
+            chosen.append(members)
+            continue
+        keys = np.log(rng.random(members.size))
+        if item_weights is not None:
+            keys /= item_weights[members]
+        chosen.append(members[np.argpartition(-keys, k - 1)[:k]])
+
+    positions = rng.permutation(np.concatenate(chosen))
+    return index["ids"][positions].tolist()
@@ -0,0 +1,241 @@
+import os
+import time
+import heapq
+import threading
+from .data_manager import (
+    DEFAULT_COURSE, load_review_queues, save_review_queues, append_review_changes, review_log_file,
+    review_snapshot_file
+)
+
+# Spaced repetition of questions a user answered incorrectly (SM-2 intervals).
+# Each user has one queue per course:
+# {
+#     "heap": [[due, question_id], ...] (min-heap on the due time),
+#     "items": {question_id: {"due", "interval" (days), "ease", "reps", "lapses"}}
+# }
+# Rescheduling pushes a new heap entry and leaves the old one behind; entries
+# whose due time no longer matches their item are skipped when popped.
+#
+# Queues are kept in memory once loaded. Each operation appends only the items
+# it changed to the user's change log; the log is folded into the snapshot
+# once it outgrows the queues. The heap itself is never stored.
+
+DAY = 86400
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+
+# SM-2 grades given for a correct and an incorrect answer (0-5 scale)
+CORRECT_GRADE = 4
+INCORRECT_GRADE = 1
+
+# Items answered correctly at an interval longer than this (days) leave the queue
+RETIRE_INTERVAL = 180
+
+# Handed-out items stay out of the queue this long (seconds) while their review
+# quiz runs; grading reschedules them, an abandoned quiz lets them come back
+REVIEW_LEASE = 3600
+
+# Stale heap entries allowed before the heap is rebuilt from the items
+STALE_ENTRY_LIMIT = 64
+
+# Queues are updated by sessions and the deadline scheduler
+_review_lock = threading.Lock()
+_users = {}  # {username: {"queues", "files": identity of the stored files, "log_lines"}}
+
+def _file_identity(username):
+    """Identity of a user's snapshot and change log files (None for a missing file)"""
+    identity = []
+    for path in (review_snapshot_file(username), review_log_file(username)):
+        try:
+            stat = os.stat(path)
+            identity.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            identity.append(None)
+    return tuple(identity)
+
+def _user_queues(username):
+    """
+    A user's queues from memory (call with _review_lock held)
+
+    They are loaded again when the stored files were changed by someone
+    else, e.g. removed when the user's scores were cleared.
+    """
+    files = _file_identity(username)
+    user = _users.get(username)
+    if user is None or user["files"] != files:
+        queues, log_lines = load_review_queues(username)
+        for queue in queues.values():
+            queue["heap"] = [[item["due"], int(qid)] for qid, item in queue["items"].items()]
+            heapq.heapify(queue["heap"])
+        user = _users[username] = {"queues": queues, "files": files, "log_lines": log_lines}
+    return user
+
+def _persist(username, user, changes):
+    """Store changed items: append them to the log, or fold the log into a new snapshot"""
+    user["log_lines"] += len(changes)
+    items = sum(len(queue["items"]) for queue in user["queues"].values())
+    if user["log_lines"] > 2 * items + STALE_ENTRY_LIMIT:
+        save_review_queues(username, user["queues"])
+        user["log_lines"] = 0
+    else:
+        append_review_changes(username, changes)
+    user["files"] = _file_identity(username)
+
+def _course_queue(queues, course):
+    """Get a course queue from a user's queues, creating it if needed"""
+    return queues.setdefault(course or DEFAULT_COURSE, {"heap": [], "items": {}})
+
+def _schedule(queue, question_id, due):
+    """Set the due time of a queued item and push it onto the heap"""
+    queue["items"][str(question_id)]["due"] = due
+    heapq.heappush(queue["heap"], [due, question_id])
+
+    # Drop stale entries once they outnumber the live ones by a margin
+    if len(queue["heap"]) > 2 * len(queue["items"]) + STALE_ENTRY_LIMIT:
+        queue["heap"] = [[item["due"], int(qid)] for qid, item in queue["items"].items()]
+        heapq.heapify(queue["heap"])
+
+def _is_live(queue, entry):
+    """Whether a heap entry is the current schedule of its item"""
+    item = queue["items"].get(str(entry[1]))
+    return item is not None and item["due"] == entry[0]
+
+def update_item(item, correct):
+    """
+    Apply one review outcome to an item (SM-2)
+
+    A wrong answer resets the repetition count, so the item is due again
+    right away and then after 1 and 6 days; each further correct answer
+    multiplies the interval by the item's ease factor.
+
+    Args:
+        item (dict): Queue item, updated in place
+        correct (bool): Whether the question was answered correctly
+
+    Returns:
+        dict: The updated item
+    """
+    grade = CORRECT_GRADE if correct else INCORRECT_GRADE
+    item["ease"] = max(MIN_EASE, item["ease"] + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    if not correct:
+        item["reps"] = 0
+        item["lapses"] += 1
+        item["interval"] = 0
+    else:
+        item["reps"] += 1
+        if item["reps"] == 1:
+            item["interval"] = 1
+        elif item["reps"] == 2:
+            item["interval"] = 6
+        else:
+            item["interval"] = round(item["interval"] * item["ease"])
+    return item
+
+def record_review_outcomes(username, course, outcomes, now=None):
+    """
+    Feed graded answers into a user's review queue
+
+    Incorrect answers add the question to the queue (or reset it); correct
+    answers to queued questions push them further out. Correct answers to
+    questions that are not queued are ignored.
+
+    Args:
+        username (str): Username of the user
+        course (str): Course of the quiz
+        outcomes (iterable): (question_id, correct) per answered question
+        now (float, optional): Current time in epoch seconds
+    """
+    now = time.time() if now is None else now
+    course = course or DEFAULT_COURSE
+    with _review_lock:
+        user = _user_queues(username)
+        queue = _course_queue(user["queues"], course)
+        changes = []
+        for question_id, correct in outcomes:
+            key = str(question_id)
+            item = queue["items"].get(key)
+            if item is None:
+                if correct:
+                    continue
+                item = queue["items"][key] = {"due": now, "interval": 0, "ease": INITIAL_EASE, "reps": 0, "lapses": 0}
+            update_item(item, correct)
+            if correct and item["interval"] > RETIRE_INTERVAL:
+                del queue["items"][key]
+                changes.append((course, int(question_id), None))
+                continue
+            _schedule(queue, int(question_id), now + item["interval"] * DAY)
+            changes.append((course, int(question_id), item))
+        if changes:
+            _persist(username, user, changes)
+
+def has_due_questions(username, course, now=None):
+    """
+    Whether a user has questions due for review in a course
+
+    Only the top of the heap is inspected (stale entries on top are skipped).
+
+    Args:
+        username (str): Username of the user
+        course (str): Course to check
+        now (float, optional): Current time in epoch seconds
+
+    Returns:
+        bool: True if at least one question is due
+    """
+    now = time.time() if now is None else now
+    with _review_lock:
+        queue = _user_queues(username)["queues"].get(course or DEFAULT_COURSE)
+        if not queue:
+            return False
+        heap = queue["heap"]
+        while heap and heap[0][0] <= now:
+            if _is_live(queue, heap[0]):
+                return True
+            heapq.heappop(heap)
+        return False
+
+def take_due_questions(username, course, limit, available=None, now=None):
+    """
+    Pop up to limit due questions off a user's review queue, earliest due first
+
+    Each pop is O(log n). Handed-out questions are leased for REVIEW_LEASE
+    seconds, so they are not handed out twice but come back if the review
+    quiz is never finished. Questions no longer in the bank are dropped.
+
+    Args:
+        username (str): Username of the user
+        course (str): Course of the review quiz
+        limit (int): Maximum number of questions
+        available (container, optional): IDs of the questions in the current bank
+        now (float, optional): Current time in epoch seconds
+
+    Returns:
+        list: Question IDs in due order
+    """
+    now = time.time() if now is None else now
+    course = course or DEFAULT_COURSE
+    with _review_lock:
+        user = _user_queues(username)
+        queue = user["queues"].get(course)
+        if not queue:
+            return []
+
+        heap = queue["heap"]
+        question_ids, changes = [], []
+        while heap and heap[0][0] <= now and len(question_ids) < limit:
+            entry = heapq.heappop(heap)
+            question_id = entry[1]
+            if not _is_live(queue, entry):
+                continue
+            if available is not None and question_id not in available:
+                del queue["items"][str(question_id)]
+                changes.append((course, question_id, None))
+                continue
+            question_ids.append(question_id)
+
+        for question_id in question_ids:
+            _schedule(queue, question_id, now + REVIEW_LEASE)
+            changes.append((course, question_id, queue["items"][str(question_id)]))
+        if changes:
+            _persist(username, user, changes)
+        return question_ids
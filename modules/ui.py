@@ -1,15 +1,13 @@
 import streamlit as st
 import base64
 import os
+import re
+import hashlib
 from .data_manager import LOGO_PATH, load_settings
 
-def load_css():
-    """
-    Load custom CSS for modern look and feel
-    Returns CSS as a string to be displayed as markdown
-    """
+def _stylesheet_source():
+    """Custom CSS for a modern look and feel, as written"""
     return """
-    <style>
     /* Main theme colors */
     :root {
         --primary-color: #1E88E5;
@@ -344,9 +342,36 @@ def load_css():
         margin-top: 20px;
         border-top: 1px solid #eaeaea;
     }
-    </style>
     """
 
+def _minify_css(css):
+    """Drop comments and insignificant whitespace from CSS"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+# The stylesheet is built and fingerprinted once per process. It is injected from
+# one place at the top of every full run, so its message is identical between
+# reruns and Streamlit sends it to a browser once, then refers to it by hash
+# (global.minCachedMessageSize in .streamlit/config.toml).
+STYLESHEET = _minify_css(_stylesheet_source())
+STYLESHEET_FINGERPRINT = hashlib.sha1(STYLESHEET.encode()).hexdigest()[:10]
+_STYLE_BLOCK = f'<style data-stylesheet="{STYLESHEET_FINGERPRINT}">{STYLESHEET}</style>'
+
+def load_css():
+    """
+    Get the app stylesheet as a <style> block for st.markdown
+    
+    Built once per process. initialize_app injects it once per full run;
+    styles apply to the whole page, so pages and the sidebar do not add it again.
+    
+    Returns:
+        str: The <style> block
+    """
+    return _STYLE_BLOCK
+
 
 
 # Helper function to encode images to base64
@@ -443,12 +468,22 @@ def navigate_to(page):
             ]:
                 del st.session_state[key]
 
+def logout():
+    """Clear the session and return to the login page"""
+    # Clear session state
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    
+    # Reset basic state
+    initialize_session_state()
+
+def _apply_display_setting(setting, widget_key):
+    """Copy a display setting from its sidebar widget into session state"""
+    st.session_state[setting] = st.session_state[widget_key]
+
 def show_sidebar():
     """Display a more compact and modern navigation sidebar"""
     with st.sidebar:
-        # Apply custom CSS
-        st.markdown(load_css(), unsafe_allow_html=True)
-        
         # Display logo
         display_logo()
         
@@ -463,34 +498,38 @@ def show_sidebar():
         # Navigation header
         st.markdown('<p style="font-size: 0.85rem; font-weight: 600; text-transform: uppercase; color: #666; margin: 15px 0 8px 0; letter-spacing: 0.5px;">NAVIGATION</p>', unsafe_allow_html=True)
         
+        # Navigation buttons switch pages in their on_click callback, which runs
+        # before the next script run, so a click costs a single rerun
+        
         # Dashboard button - Plain buttons without HTML in the label
         current_page = st.session_state.current_page
         if current_page == "dashboard":
             st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-        if st.button("📊 Dashboard", use_container_width=True):
-            navigate_to("dashboard")
-            st.rerun()
+        st.button("📊 Dashboard", use_container_width=True, on_click=navigate_to, args=("dashboard",))
         if current_page == "dashboard":
             st.markdown('</div>', unsafe_allow_html=True)
         
         # Quiz button
         if current_page == "quiz":
             st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-        if st.button("📝 Take Quiz", use_container_width=True):
-            navigate_to("quiz")
-            st.rerun()
+        st.button("📝 Take Quiz", use_container_width=True, on_click=navigate_to, args=("quiz",))
         if current_page == "quiz":
             st.markdown('</div>', unsafe_allow_html=True)
         
         # Scores button
         if current_page == "scores":
             st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-        if st.button("📈 View Scores", use_container_width=True):
-            navigate_to("scores")
-            st.rerun()
+        st.button("📈 View Scores", use_container_width=True, on_click=navigate_to, args=("scores",))
         if current_page == "scores":
             st.markdown('</div>', unsafe_allow_html=True)
         
+        # Certificate verification button
+        if current_page == "verify":
+            st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
+        st.button("🔎 Verify Certificate", use_container_width=True, on_click=navigate_to, args=("verify",))
+        if current_page == "verify":
+            st.markdown('</div>', unsafe_allow_html=True)
+        
         # Admin-only sections
         if st.session_state.role == "admin":
             st.markdown('<hr style="height: 1px; background-color: #eaeaea; margin: 12px 0;">', unsafe_allow_html=True)
@@ -499,18 +538,14 @@ def show_sidebar():
             # Admin panel button
             if current_page == "admin":
                 st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-            if st.button("⚙️ Admin Panel", use_container_width=True):
-                navigate_to("admin")
-                st.rerun()
+            st.button("⚙️ Admin Panel", use_container_width=True, on_click=navigate_to, args=("admin",))
             if current_page == "admin":
                 st.markdown('</div>', unsafe_allow_html=True)
                 
             # Documentation button
             if current_page == "documentation":
                 st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
-            if st.button("📚 Documentation", use_container_width=True):
-                navigate_to("documentation")
-                st.rerun()
+            st.button("📚 Documentation", use_container_width=True, on_click=navigate_to, args=("documentation",))
             if current_page == "documentation":
                 st.markdown('</div>', unsafe_allow_html=True)
         
@@ -519,36 +554,25 @@ def show_sidebar():
             # Theme selection
             current_theme = st.session_state.get("theme", "light")
             theme_options = {"light": "Light Mode", "dark": "Dark Mode"}
-            selected_theme = st.radio("Theme", options=list(theme_options.keys()), 
-                                     format_func=lambda x: theme_options[x],
-                                     index=0 if current_theme == "light" else 1,
-                                     horizontal=True)
-            
-            if selected_theme != current_theme:
-                st.session_state.theme = selected_theme
-                st.rerun()
+            st.radio("Theme", options=list(theme_options.keys()), 
+                     format_func=lambda x: theme_options[x],
+                     index=0 if current_theme == "light" else 1,
+                     horizontal=True,
+                     key="theme_select",
+                     on_change=_apply_display_setting, args=("theme", "theme_select"))
             
             # Font size selection
-            font_size = st.select_slider(
+            st.select_slider(
                 "Font Size",
                 options=["Small", "Medium", "Large"],
-                value=st.session_state.get("font_size", "Medium")
+                value=st.session_state.get("font_size", "Medium"),
+                key="font_size_select",
+                on_change=_apply_display_setting, args=("font_size", "font_size_select")
             )
-            
-            if font_size != st.session_state.get("font_size", "Medium"):
-                st.session_state.font_size = font_size
-                st.rerun()
         
         # Logout button
         st.markdown('<div class="danger-btn">', unsafe_allow_html=True)
-        if st.button("🚪 Logout", use_container_width=True):
-            # Clear session state
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            
-            # Reset basic state
-            initialize_session_state()
-            st.rerun()
+        st.button("🚪 Logout", use_container_width=True, on_click=logout)
         st.markdown('</div>', unsafe_allow_html=True)
         
         # App info footer - properly positioned
@@ -726,6 +750,10 @@ def show_loading(message="Loading..."):
     st.markdown(loading_html, unsafe_allow_html=True)
 
 # Create a custom tab interface
+def _set_active_tab(tab_name):
+    """Switch the active custom tab"""
+    st.session_state.active_tab = tab_name
+
 def custom_tabs(tabs_dict):
     """
     Create a custom styled tab interface
@@ -752,9 +780,8 @@ def custom_tabs(tabs_dict):
                     </div>
                 """, unsafe_allow_html=True)
             else:
-                if st.button(tab_name, key=f"tab_{tab_name}", use_container_width=True):
-                    st.session_state.active_tab = tab_name
-                    st.rerun()
+                st.button(tab_name, key=f"tab_{tab_name}", use_container_width=True,
+                          on_click=_set_active_tab, args=(tab_name,))
     
     # Display the content of the active tab
     st.markdown("""